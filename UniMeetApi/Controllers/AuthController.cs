@@ -24,14 +24,17 @@ namespace UniMeetApi.Controllers
         private readonly IEmailSender _emailSender;
         private readonly ILogger<AuthController> _logger;
         private readonly IHostEnvironment _env;
+        private readonly IRecommendationProxyService _recommendations;
 
-        public AuthController(AppDbContext db, IConfiguration cfg, IEmailSender emailSender, ILogger<AuthController> logger, IHostEnvironment env)
+        public AuthController(AppDbContext db, IConfiguration cfg, IEmailSender emailSender, ILogger<AuthController> logger, IHostEnvironment env,
+            IRecommendationProxyService recommendations)
         {
             _db = db;
             _cfg = cfg;
             _emailSender = emailSender;
             _logger = logger;
             _env = env;
+            _recommendations = recommendations;
         }
 
         // İstek/yanıt tipleri
@@ -125,6 +128,10 @@ namespace UniMeetApi.Controllers
 
             var jwt = new JwtSecurityTokenHandler().WriteToken(token);
 
+            // Öneri servisi kullanıcının önerilerini arka planda önceden hesaplasın
+            // (beklenmez: giriş yanıtı öneri servisinin gecikmesine bağlı kalmasın)
+            _ = _recommendations.SignalUserActivityAsync(user.UserId, "login");
+
             return new LoginRes(
                 user.UserId,
                 user.Email,
@@ -43,6 +43,31 @@ namespace UniMeetApi.Services
         public bool Fallback { get; set; }
     }
 
+    /// <summary>
+    /// Response from Python audience endpoint (users most interested in an event)
+    /// </summary>
+    public class PythonAudienceResponse
+    {
+        public List<PythonAudienceMember> Audience { get; set; } = new();
+        public PythonAudienceMetadata Metadata { get; set; } = new();
+    }
+
+    public class PythonAudienceMember
+    {
+        public int UserId { get; set; }
+        public double Score { get; set; }
+    }
+
+    public class PythonAudienceMetadata
+    {
+        public string Model_Version { get; set; } = string.Empty;
+        public string Computed_At { get; set; } = string.Empty;
+        public int Event_Id { get; set; }
+        public bool Index_Ready { get; set; }
+        public int Total_Users { get; set; }
+        public double Computation_Time_Ms { get; set; }
+    }
+
     /// <summary>
     /// Interface for recommendation proxy service
     /// </summary>
@@ -50,6 +75,8 @@ namespace UniMeetApi.Services
     {
         Task<List<Event>> GetRecommendedEventsAsync(int userId, int limit = 10);
         Task<PythonRecommendationResponse> GetDetailedRecommendationsAsync(int userId, int limit = 10);
+        Task<List<PythonAudienceMember>> GetEventAudienceAsync(int eventId, int limit = 100);
+        Task SignalUserActivityAsync(int userId, string signal);
         Task<bool> CheckHealthAsync();
         Task<object?> GetConfigAsync();
         Task UpdateConfigAsync(object newConfig);
@@ -67,9 +94,13 @@ namespace UniMeetApi.Services
         private readonly IConfiguration _config;
         private readonly string _pythonServiceUrl;
         private readonly int _timeoutSeconds;
+        private readonly int _latencyBudgetMs;
         private readonly bool _enableFallback;
         private readonly IRecommendationService _fallbackService;
 
+        // Pre-warm signals are only hints; do not hold a connection for them
+        private static readonly TimeSpan SignalTimeout = TimeSpan.FromSeconds(2);
+
         public RecommendationProxyService(
             HttpClient httpClient,
             ILogger<RecommendationProxyService> logger,
@@ -86,6 +117,8 @@ namespace UniMeetApi.Services
             // Load configuration
             _pythonServiceUrl = _config["RecommendationService:PythonServiceUrl"] ?? "http://localhost:5000";
             _timeoutSeconds = int.Parse(_config["RecommendationService:TimeoutSeconds"] ?? "5");
+            // Leave headroom under the HTTP timeout for network and serialization
+            _latencyBudgetMs = int.Parse(_config["RecommendationService:LatencyBudgetMs"] ?? (_timeoutSeconds * 800).ToString());
             _enableFallback = bool.Parse(_config["RecommendationService:EnableFallback"] ?? "true");
 
             // Configure HTTP client
@@ -109,6 +142,7 @@ namespace UniMeetApi.Services
                 {
                     userId = userId,
                     limit = limit,
+                    latencyBudgetMs = _latencyBudgetMs,
                     context = new
                     {
                         excludeEventIds = new int[] { },
@@ -211,6 +245,8 @@ namespace UniMeetApi.Services
                 {
                     userId = userId,
                     limit = limit,
+                    explain = true,
+                    latencyBudgetMs = _latencyBudgetMs,
                     context = new
                     {
                         excludeEventIds = new int[] { },
@@ -292,6 +328,75 @@ namespace UniMeetApi.Services
             }
         }
 
+        public async Task<List<PythonAudienceMember>> GetEventAudienceAsync(int eventId, int limit = 100)
+        {
+            try
+            {
+                var response = await _httpClient.PostAsJsonAsync("/api/v1/audience", new { eventId = eventId, limit = limit });
+
+                if (!response.IsSuccessStatusCode)
+                {
+                    // 404: unknown event; 503: audience index still building after a restart
+                    _logger.LogWarning(
+                        "Python service returned {StatusCode} for audience of EventId={EventId}",
+                        response.StatusCode, eventId);
+                    return new List<PythonAudienceMember>();
+                }
+
+                var audienceResponse = await response.Content.ReadFromJsonAsync<PythonAudienceResponse>();
+                var audience = audienceResponse?.Audience ?? new List<PythonAudienceMember>();
+
+                _logger.LogInformation(
+                    "Received audience of {Count} users for EventId={EventId}",
+                    audience.Count, eventId);
+
+                return audience;
+            }
+            catch (Exception ex)
+            {
+                _logger.LogError(ex,
+                    "Error calling Python service for audience of EventId={EventId}: {Message}",
+                    eventId, ex.Message);
+                return new List<PythonAudienceMember>();
+            }
+        }
+
+        /// <summary>
+        /// Lets the Python service pre-compute the user's recommendations before
+        /// they open the recommendations screen ("login" or "app_open"). Best effort:
+        /// gives up after a short timeout and never throws, so callers may discard the task.
+        /// </summary>
+        public async Task SignalUserActivityAsync(int userId, string signal)
+        {
+            using var timeout = new CancellationTokenSource(SignalTimeout);
+            try
+            {
+                var apiKey = _config["RecommendationService:ApiKey"];
+
+                var request = new HttpRequestMessage(HttpMethod.Post, "/api/v1/prewarm")
+                {
+                    Content = JsonContent.Create(new { userId = userId, signal = signal })
+                };
+
+                if (!string.IsNullOrWhiteSpace(apiKey))
+                {
+                    request.Headers.Add("X-API-Key", apiKey);
+                }
+
+                var response = await _httpClient.SendAsync(request, timeout.Token);
+                if (!response.IsSuccessStatusCode)
+                {
+                    _logger.LogDebug(
+                        "Python service returned {StatusCode} for {Signal} signal of UserId={UserId}",
+                        response.StatusCode, signal, userId);
+                }
+            }
+            catch (Exception ex)
+            {
+                _logger.LogWarning(ex, "Could not send {Signal} signal for UserId={UserId}", signal, userId);
+            }
+        }
+
         private async Task<List<Event>> GetFallbackRecommendationsAsync(int userId, int limit)
         {
             if (!_enableFallback)
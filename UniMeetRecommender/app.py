@@ -3,23 +3,42 @@ Flask API for UniMeet Recommendation Service
 Provides REST endpoints for event recommendations
 """
 import os
+import random
 import time
 from datetime import datetime, timezone
 from functools import wraps
 from typing import Dict, Optional
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 from models.db_connector import DatabaseConnector
 from models.recommender import HybridRecommender
+from utils import json_codec
+from utils.health import HealthProber
 from utils.logger import logger
+from utils.metrics import metrics
+from utils.profiler import profiler
+from utils.scheduler import SchedulerRejected, scheduler
+from utils.tracing import Trace, start_trace, end_trace, span, trace_id_from_headers
 
 # Load environment variables
 load_dotenv()
 
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by utils.json_codec (orjson when installed)"""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return json_codec.dumps(obj)
+    
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # CORS: Only allow .NET backend
 CORS(app, resources={
@@ -34,16 +53,23 @@ CORS(app, resources={
 # Global instances
 db_connector: Optional[DatabaseConnector] = None
 recommender: Optional[HybridRecommender] = None
-request_stats = {
-    'total_requests': 0,
-    'total_latency_ms': 0,
-    'last_request_time': None
-}
+health_prober: Optional[HealthProber] = None
+
+# Request metrics (thread-safe, exposed on /api/v1/metrics)
+REQUEST_LATENCY = metrics.histogram(
+    'recommender_request_duration_seconds', 'End-to-end latency of recommend requests'
+)
+REQUEST_ERRORS = metrics.counter(
+    'recommender_request_errors_total', 'Recommend requests that failed with an error'
+)
+LAST_REQUEST_TIME = metrics.gauge(
+    'recommender_last_request_timestamp_seconds', 'Unix time of the last completed recommend request'
+)
 
 
 def init_services():
     """Initialize database and recommender services"""
-    global db_connector, recommender
+    global db_connector, recommender, health_prober
     
     # Get configuration
     db_connection_string = os.getenv('DB_CONNECTION_STRING')
@@ -57,6 +83,10 @@ def init_services():
     with open(config_path, 'r', encoding='utf-8') as f:
         config = json.load(f)
     
+    # Switch to async, sampled logging before anything logs on the request path
+    logger.configure(config.get('logging', {}))
+    scheduler.configure(config.get('scheduler', {}))
+    
     # Initialize database connector
     db_connector = DatabaseConnector(db_connection_string, config['database'])
     
@@ -67,9 +97,49 @@ def init_services():
     # Initialize recommender
     recommender = HybridRecommender(config_path, db_connector)
     
+    # Health is probed in the background; the first round starts warming caches
+    # on their own thread (not ready until that finishes)
+    health_prober = create_health_prober(config.get('health', {}))
+    health_prober.start()
+    
     logger.info("Services initialized successfully")
 
 
+def create_health_prober(settings: Dict) -> HealthProber:
+    """
+    Register the service health checks
+    
+    Only warm-up is critical for readiness: with warm snapshots the service can
+    keep answering (marked stale) while the database is unavailable.
+    """
+    prober = HealthProber(settings)
+    saturation_threshold = settings.get('pool_saturation_threshold', 0.9)
+    
+    def check_database() -> Dict:
+        return {
+            'ok': db_connector.test_connection(),
+            'circuit': db_connector.breaker.state
+        }
+    
+    def check_pool() -> Dict:
+        pool = db_connector.pool_status()
+        return dict(pool, ok=pool['saturation'] < saturation_threshold)
+    
+    def check_warmup() -> Dict:
+        # Warm-up runs on its own thread: a slow first load must not stall the
+        # prober past stale_after_seconds and fail liveness
+        status = recommender.warmup_status()
+        if not (status['clubs_cache'] and status['club_vectors'] and status['fallback_ranking']):
+            recommender.warm_up_in_background()
+            status = recommender.warmup_status()
+        return dict(status, ok=status['club_vectors'] and status['fallback_ranking'])
+    
+    prober.add_check('database', check_database, critical=False)
+    prober.add_check('pool', check_pool, critical=False)
+    prober.add_check('warmup', check_warmup, critical=True)
+    return prober
+
+
 def require_api_key(f):
     """Decorator to require API key for admin endpoints"""
     @wraps(f)
@@ -85,27 +155,80 @@ def require_api_key(f):
     return decorated_function
 
 
+# Seconds a client should wait after a 503 from a full or slow workload queue
+SCHEDULER_RETRY_AFTER = {'interactive': '1', 'batch': '5', 'background': '30'}
+
+
+def scheduled(workload: str):
+    """
+    Decorator to run an endpoint under a slot of a workload class
+    (utils.scheduler); answers 503 with Retry-After when it is not admitted
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                with scheduler.slot(workload):
+                    return f(*args, **kwargs)
+            except SchedulerRejected as e:
+                logger.warning(f"Rejected {request.path}: {str(e)}", sample_key='scheduler_rejected')
+                response = jsonify({'error': 'Service busy', 'workload': e.workload, 'reason': e.reason})
+                response.headers['Retry-After'] = SCHEDULER_RETRY_AFTER[workload]
+                return response, 503
+        return decorated_function
+    return decorator
+
+
 def update_stats(latency_ms: float):
     """Update request statistics"""
-    request_stats['total_requests'] += 1
-    request_stats['total_latency_ms'] += latency_ms
-    request_stats['last_request_time'] = datetime.now(timezone.utc).isoformat()
+    REQUEST_LATENCY.observe(latency_ms / 1000)
+    LAST_REQUEST_TIME.set(time.time())
+
+
+def begin_request_trace(debug_timings: bool) -> Optional[Trace]:
+    """Start a trace if tracing is enabled or the caller asked for debug timings"""
+    tracing_config = recommender.config.get('tracing', {}) if recommender else {}
+    if not (tracing_config.get('enabled', False) or debug_timings):
+        return None
+    header = tracing_config.get('trace_header', 'X-Trace-Id')
+    return start_trace(trace_id_from_headers(request.headers, header))
+
+
+def finish_request_trace(trace: Trace, result: Dict, debug_timings: bool, user_id: int):
+    """Attach debug timings and sample slow-request traces into the log"""
+    timings = trace.to_dict()
+    
+    if debug_timings:
+        result.setdefault('metadata', {})['debug_timings'] = timings
+    
+    tracing_config = recommender.config.get('tracing', {})
+    slow_ms = tracing_config.get('slow_request_ms', 500)
+    if timings['total_ms'] >= slow_ms and random.random() < tracing_config.get('slow_trace_sample_rate', 0.1):
+        logger.warning(
+            f"Slow request trace: {timings['total_ms']:.1f}ms",
+            user_id=user_id,
+            trace=timings
+        )
 
 
 # ===== API ENDPOINTS =====
 
 @app.route('/api/v1/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (served from the background prober's cached state)"""
     try:
-        db_healthy = db_connector.test_connection() if db_connector else False
+        snapshot = health_prober.snapshot() if health_prober else {'live': False, 'ready': False, 'checks': {}}
+        checks = snapshot['checks']
+        db_healthy = checks.get('database', {}).get('ok', False)
+        all_ok = bool(checks) and all(check['ok'] for check in checks.values())
         
         return jsonify({
-            'status': 'ok' if db_healthy else 'degraded',
+            'status': 'ok' if all_ok else 'degraded',
             'version': recommender.config['model']['version'] if recommender else 'unknown',
             'timestamp': datetime.now(timezone.utc).isoformat(),
-            'database': 'connected' if db_healthy else 'disconnected'
-        }), 200 if db_healthy else 503
+            'database': 'connected' if db_healthy else 'disconnected',
+            **snapshot
+        }), 200 if all_ok else 503
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         return jsonify({
@@ -114,7 +237,24 @@ def health_check():
         }), 500
 
 
+@app.route('/api/v1/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and the health prober is running"""
+    live = health_prober is not None and health_prober.live()
+    return jsonify({'live': live}), 200 if live else 503
+
+
+@app.route('/api/v1/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: caches and models are warm, so requests can be served"""
+    if health_prober is None:
+        return jsonify({'ready': False, 'checks': {}}), 503
+    snapshot = health_prober.snapshot()
+    return jsonify(snapshot), 200 if snapshot['ready'] else 503
+
+
 @app.route('/api/v1/recommend', methods=['POST'])
+@scheduled('interactive')
 def recommend():
     """
     Main recommendation endpoint
@@ -123,6 +263,9 @@ def recommend():
     {
         "userId": int,
         "limit": int (optional, default 10),
+        "explain": bool (optional, attach a reason to each recommendation),
+        "debugTimings": bool (optional, attach per-stage timings to metadata),
+        "latencyBudgetMs": number (optional, overrides ranking_settings.latency_budget_ms),
         "context": {
             "excludeEventIds": [int],
             "filters": {
@@ -167,16 +310,39 @@ def recommend():
         if 'excludeEventIds' in context:
             filters['exclude_event_ids'] = context['excludeEventIds']
         
+        budget_ms = data.get('latencyBudgetMs', request.headers.get('X-Latency-Budget-Ms'))
+        if budget_ms is not None:
+            try:
+                budget_ms = float(budget_ms)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'latencyBudgetMs must be a number'}), 400
+        
+        explain = bool(data.get('explain')) or request.args.get('explain') in ('1', 'true')
+        debug_timings = bool(data.get('debugTimings')) or request.headers.get('X-Debug-Timings') == '1'
+        trace = begin_request_trace(debug_timings)
+        
         # Generate recommendations
-        result = recommender.recommend(user_id, limit, filters)
+        try:
+            with span('recommend', user_id=user_id), profiler.profile_request():
+                result = recommender.recommend(user_id, limit, filters, explain=explain, budget_ms=budget_ms)
+        finally:
+            if trace is not None:
+                end_trace()
+        
+        if trace is not None:
+            finish_request_trace(trace, result, debug_timings, user_id)
         
         # Update stats
         latency_ms = (time.time() - start_time) * 1000
         update_stats(latency_ms)
         
-        return jsonify(result), 200
+        response = jsonify(result)
+        if trace is not None:
+            response.headers['X-Trace-Id'] = trace.trace_id
+        return response, 200
         
     except Exception as e:
+        REQUEST_ERRORS.inc()
         logger.error(f"Error in recommend endpoint: {str(e)}", exc_info=True)
         return jsonify({
             'error': 'Internal server error',
@@ -184,6 +350,91 @@ def recommend():
         }), 500
 
 
+@app.route('/api/v1/audience', methods=['POST'])
+@scheduled('batch')
+def audience():
+    """
+    Reverse recommendation: users most likely to be interested in an event
+    
+    Request body:
+    {
+        "eventId": int,
+        "limit": int (optional, default audience.default_limit)
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'Request body required'}), 400
+        
+        event_id = data.get('eventId')
+        if event_id is None:
+            return jsonify({'error': 'eventId is required'}), 400
+        
+        settings = recommender.config.get('audience', {})
+        try:
+            event_id = int(event_id)
+            limit = int(data.get('limit', settings.get('default_limit', 100)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'eventId and limit must be integers'}), 400
+        limit = max(0, min(limit, settings.get('max_limit', 1000)))
+        
+        with span('audience', event_id=event_id):
+            result = recommender.audience(event_id, limit)
+        
+        if result is None:
+            return jsonify({'error': 'Event not found', 'eventId': event_id}), 404
+        if not result['metadata']['index_ready']:
+            # First call before warm-up finished: the index is building in the background
+            response = jsonify({'error': 'Audience index is warming up', **result})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        REQUEST_ERRORS.inc()
+        logger.error(f"Error in audience endpoint: {str(e)}", exc_info=True)
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+
+# Activity signals accepted by /prewarm; lower runs first
+PREWARM_SIGNAL_PRIORITIES = {'login': 0, 'app_open': 1}
+
+
+@app.route('/api/v1/prewarm', methods=['POST'])
+@require_api_key
+def prewarm():
+    """
+    Signal user activity so the user's recommendations are computed ahead of
+    the request (API key required; called by the backend on login/app open)
+    
+    Request body:
+    {
+        "userId": int,
+        "signal": "login" | "app_open" (optional, default "app_open")
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = data.get('userId')
+    if user_id is None:
+        return jsonify({'error': 'userId is required'}), 400
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'userId must be an integer'}), 400
+    
+    signal = data.get('signal', 'app_open')
+    if signal not in PREWARM_SIGNAL_PRIORITIES:
+        return jsonify({'error': f"signal must be one of {sorted(PREWARM_SIGNAL_PRIORITIES)}"}), 400
+    
+    outcome = recommender.prewarm_queue.submit(user_id, PREWARM_SIGNAL_PRIORITIES[signal])
+    return jsonify({'status': outcome, 'userId': user_id}), 202
+
+
 @app.route('/api/v1/config', methods=['GET'])
 def get_config():
     """Get current configuration (read-only view)"""
@@ -205,6 +456,7 @@ def get_config():
 
 @app.route('/api/v1/config', methods=['PUT'])
 @require_api_key
+@scheduled('batch')
 def update_config():
     """
     Update configuration (admin only, requires API key)
@@ -236,10 +488,12 @@ def update_config():
 
 @app.route('/api/v1/reload-config', methods=['POST'])
 @require_api_key
+@scheduled('batch')
 def reload_config():
     """Reload configuration from file (admin only)"""
     try:
         recommender.reload_config()
+        scheduler.configure(recommender.config.get('scheduler', {}))
         
         return jsonify({
             'status': 'reloaded',
@@ -252,23 +506,134 @@ def reload_config():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/v1/admin/user-profiles/invalidate', methods=['POST'])
+@require_api_key
+@scheduled('batch')
+def invalidate_user_profiles():
+    """
+    Drop cached user interest profiles (admin only)
+    
+    Profiles already rebuild when a user's memberships or attendance change;
+    this forces it, e.g. after club descriptions were edited.
+    
+    Request body:
+    {
+        "userIds": [int] (omit to drop every profile)
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    user_ids = data.get('userIds')
+    if user_ids is not None:
+        if not isinstance(user_ids, list):
+            return jsonify({'error': 'userIds must be a list'}), 400
+        try:
+            user_ids = [int(user_id) for user_id in user_ids]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'userIds must be integers'}), 400
+    
+    removed = recommender.profile_store.invalidate(user_ids)
+    recommender.recommendation_cache.invalidate(user_ids)
+    return jsonify({
+        'status': 'invalidated',
+        'removed': removed,
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }), 200
+
+
 @app.route('/api/v1/stats', methods=['GET'])
 def get_stats():
     """Get service statistics"""
-    avg_latency = (
-        request_stats['total_latency_ms'] / request_stats['total_requests']
-        if request_stats['total_requests'] > 0
-        else 0
-    )
+    _, total_latency_s, total_requests = REQUEST_LATENCY.snapshot()
+    avg_latency = total_latency_s * 1000 / total_requests if total_requests > 0 else 0
+    last_request = LAST_REQUEST_TIME.value()
     
     return jsonify({
-        'total_requests': request_stats['total_requests'],
+        'total_requests': int(total_requests),
         'avg_latency_ms': round(avg_latency, 2),
-        'last_request_time': request_stats['last_request_time'],
-        'model_version': recommender.config['model']['version'] if recommender else 'unknown'
+        'p50_latency_ms': round(REQUEST_LATENCY.quantile(0.50) * 1000, 2),
+        'p99_latency_ms': round(REQUEST_LATENCY.quantile(0.99) * 1000, 2),
+        'last_request_time': (
+            datetime.fromtimestamp(last_request, timezone.utc).isoformat() if last_request else None
+        ),
+        'model_version': recommender.config['model']['version'] if recommender else 'unknown',
+        'database_circuit': db_connector.breaker.status() if db_connector else None,
+        'user_profiles': recommender.profile_store.status() if recommender else None,
+        'text_memory': recommender.text_memory_report() if recommender else None,
+        'prewarm': ({**recommender.prewarm_queue.status(), 'cached_users': len(recommender.recommendation_cache)}
+                    if recommender else None),
+        'offload': recommender.scoring_pool.status() if recommender else None,
+        'scheduler': scheduler.status()
     }), 200
 
 
+@app.route('/api/v1/metrics', methods=['GET'])
+def get_metrics():
+    """Expose service metrics in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/v1/admin/profile', methods=['POST'])
+@require_api_key
+def start_profiling():
+    """
+    Profile upcoming recommend requests (admin only)
+    
+    Request body:
+    {
+        "mode": "sampling" | "deterministic" (default sampling),
+        "requests": int (profile the next N recommend requests),
+        "durationSeconds": float (or profile every request in this window),
+        "intervalMs": float (sampling interval, default 5)
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        status = profiler.start(
+            mode=data.get('mode', 'sampling'),
+            requests=data.get('requests'),
+            duration_s=data.get('durationSeconds'),
+            interval_ms=data.get('intervalMs', 5)
+        )
+        logger.info("Profiling session started", mode=status['mode'],
+                    max_requests=status['max_requests'], duration_s=status['duration_s'])
+        return jsonify(status), 202
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+
+
+@app.route('/api/v1/admin/profile', methods=['GET'])
+@require_api_key
+def get_profile():
+    """
+    Get profiling results (admin only)
+    
+    Query parameters:
+        format: "json" (default, hot functions) or "collapsed" (flamegraph input)
+        top: Number of hot functions to return (default 30)
+    """
+    status = profiler.status(top=request.args.get('top', 30, type=int))
+    if status is None:
+        return jsonify({'status': 'idle'}), 200
+    
+    if request.args.get('format') == 'collapsed':
+        return Response(profiler.collapsed_stacks(), mimetype='text/plain; charset=utf-8')
+    
+    status['collapsed_stacks'] = profiler.collapsed_stacks()
+    return jsonify(status), 200
+
+
+@app.route('/api/v1/admin/profile', methods=['DELETE'])
+@require_api_key
+def stop_profiling():
+    """Stop the running profiling session and return its results (admin only)"""
+    status = profiler.stop()
+    if status is None:
+        return jsonify({'status': 'idle'}), 200
+    return jsonify(status), 200
+
+
 @app.errorhandler(404)
 def not_found(e):
     """Handle 404 errors"""
@@ -309,5 +674,7 @@ if __name__ == '__main__':
         raise
     finally:
         # Cleanup
+        if health_prober:
+            health_prober.stop()
         if db_connector:
             db_connector.close()
@@ -0,0 +1,279 @@
+"""
+Audience index for UniMeet Recommender Service
+Reverse recommendation: scores one event against every user at once from
+users x clubs membership/attendance matrices and users x features interest
+vectors, e.g. to notify the most interested users when an event is published.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from models.co_engagement import CoEngagementModel
+from models.db_connector import DatabaseConnector
+from models.feature_engine import FeatureEngine
+from utils.logger import logger
+from utils.metrics import metrics, record_cache_lookup
+from utils.scheduler import scheduler
+
+
+AUDIENCE_REFRESH_LATENCY = metrics.histogram(
+    'recommender_audience_index_refresh_duration_seconds', 'Time to rebuild the audience index'
+)
+
+
+class _AudienceSnapshot:
+    """Users x clubs matrices of one build; replaced as a whole on refresh"""
+
+    __slots__ = ('user_ids', 'club_ids', 'club_positions', 'memberships', 'attendance',
+                 'attendance_max', 'seeds')
+
+    def __init__(self, user_ids: np.ndarray, club_ids: np.ndarray,
+                 memberships: sparse.csr_matrix, attendance: sparse.csr_matrix):
+        self.user_ids = user_ids
+        self.club_ids = club_ids
+        self.club_positions = {int(club_id): i for i, club_id in enumerate(club_ids.tolist())}
+        # Columns are read per request (one club), so keep them column-major
+        self.memberships = memberships.tocsc()
+        self.attendance = attendance.tocsc()
+        # Most attended club per user: past attendance is normalized per user
+        self.attendance_max = attendance.max(axis=1).toarray().ravel().astype(np.float64)
+        # Followed or attended clubs, row-averaged: the collaborative seeds
+        engaged = ((memberships + attendance) > 0).astype(np.float32)
+        counts = np.diff(engaged.indptr)
+        inv = np.divide(1.0, counts, out=np.zeros(len(counts)), where=counts > 0).astype(np.float32)
+        self.seeds = (sparse.diags(inv) @ engaged).tocsr()
+
+
+class AudienceIndex:
+    """All users' affinity, content and collaborative features against one event"""
+
+    def __init__(self,
+                 db_connector: DatabaseConnector,
+                 feature_engine: FeatureEngine,
+                 co_engagement: CoEngagementModel,
+                 config: dict):
+        """
+        Initialize audience index
+
+        Args:
+            db_connector: Database connector instance (iter_memberships,
+                iter_club_attendance, get_event)
+            feature_engine: Feature engine holding the fitted club vectors
+            co_engagement: Co-engagement model (club similarity)
+            config: Configuration dictionary from config.json
+        """
+        self.db = db_connector
+        self.feature_engine = feature_engine
+        self.co_engagement = co_engagement
+        self.config = config
+        settings = config.get('audience', {})
+        self.enabled = settings.get('enabled', True)
+        self.refresh_seconds = settings.get('refresh_seconds', 600)
+        self.days_back = settings.get('days_back', 365)
+
+        self._snapshot: Optional[_AudienceSnapshot] = None
+        self._built_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+        # (snapshot, vectors_version, users x features interest vectors, row of each
+        # axis club in club_vectors); rebuilt when either input changes
+        self._vectors: Optional[Tuple] = None
+        self._vectors_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether an index has been built"""
+        return self._snapshot is not None
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the users x clubs matrices from streamed memberships and attendance
+
+        Returns:
+            True if the index was rebuilt, False if another refresh was running or it failed
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            with AUDIENCE_REFRESH_LATENCY.time():
+                snapshot = self._build()
+            self._snapshot = snapshot
+            self._built_at = time.monotonic()
+            logger.info("Audience index refreshed", users=len(snapshot.user_ids),
+                        clubs=len(snapshot.club_ids), memberships=int(snapshot.memberships.nnz))
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing audience index: {str(e)}", exc_info=True)
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def _build(self) -> _AudienceSnapshot:
+        members = [chunk for chunk in self.db.iter_memberships() if not chunk.empty]
+        attended = [chunk for chunk in self.db.iter_club_attendance(self.days_back) if not chunk.empty]
+        member_users = np.concatenate([c['UserId'].to_numpy() for c in members]) if members else np.empty(0, np.int32)
+        member_clubs = np.concatenate([c['ClubId'].to_numpy() for c in members]) if members else np.empty(0, np.int32)
+        attend_users = np.concatenate([c['UserId'].to_numpy() for c in attended]) if attended else np.empty(0, np.int32)
+        attend_clubs = np.concatenate([c['ClubId'].to_numpy() for c in attended]) if attended else np.empty(0, np.int32)
+        attend_counts = (np.concatenate([c['Attended'].to_numpy() for c in attended]).astype(np.float32)
+                         if attended else np.empty(0, np.float32))
+
+        user_ids, user_codes = np.unique(np.concatenate([member_users, attend_users]), return_inverse=True)
+        club_ids, club_codes = np.unique(np.concatenate([member_clubs, attend_clubs]), return_inverse=True)
+        shape = (len(user_ids), len(club_ids))
+        n_members = len(member_users)
+
+        memberships = sparse.csr_matrix(
+            (np.ones(n_members, dtype=np.float32), (user_codes[:n_members], club_codes[:n_members])), shape=shape
+        )
+        memberships.data[:] = 1.0  # Duplicate rows would have summed
+        attendance = sparse.csr_matrix(
+            (attend_counts, (user_codes[n_members:], club_codes[n_members:])), shape=shape
+        )
+        return _AudienceSnapshot(user_ids.astype(np.int64), club_ids.astype(np.int64), memberships, attendance)
+
+    def _refresh_in_background(self):
+        if not self._refresh_lock.locked():
+            threading.Thread(target=scheduler.run, args=('background', self.refresh),
+                             name='audience-index-refresh', daemon=True).start()
+
+    def _interest_vectors(self, snapshot: _AudienceSnapshot) -> Tuple[Optional[sparse.csr_matrix], Dict[int, int]]:
+        """
+        Users x features interest vectors: the L2-normalized mean club vector of
+        each user's followed clubs (as FeatureEngine.user_club_vector), one
+        sparse product for all users
+        """
+        engine = self.feature_engine
+        version = engine.vectors_version
+        cached = self._vectors
+        if cached is not None and cached[0] is snapshot and cached[1] == version:
+            return cached[2], cached[3]
+
+        with self._vectors_lock:
+            cached = self._vectors
+            if cached is not None and cached[0] is snapshot and cached[1] == version:
+                return cached[2], cached[3]
+            club_vectors, fitted_ids = engine.club_vectors, engine.club_ids
+            if club_vectors is None or fitted_ids is None:
+                return None, {}
+            vector_rows = {int(club_id): row for row, club_id in enumerate(fitted_ids)}
+            axis = [(position, vector_rows[club_id]) for club_id, position in snapshot.club_positions.items()
+                    if club_id in vector_rows]
+            columns = np.array([position for position, _ in axis], dtype=np.int64)
+            rows = np.array([row for _, row in axis], dtype=np.int64)
+
+            followed = snapshot.memberships[:, columns].tocsr()
+            counts = np.diff(followed.indptr)
+            inv = np.divide(1.0, counts, out=np.zeros(len(counts)), where=counts > 0).astype(np.float32)
+            vectors = normalize((sparse.diags(inv) @ followed @ club_vectors[rows]).tocsr(), norm='l2', copy=False)
+            self._vectors = (snapshot, version, vectors, vector_rows)
+            return vectors, vector_rows
+
+    def audience(self, event: Dict, limit: int) -> Optional[pd.DataFrame]:
+        """
+        Top users for an event
+
+        Uses the user-dependent features of the recommend pipeline: club
+        membership, past attendance at the event's club, club and text
+        similarity against the user's interest vector, and co-engagement with the
+        user's clubs. Event-level features (temporal, popularity) are the same for
+        every user and left out. Text similarity uses the user's club vector
+        instead of the pairwise interest text match.
+
+        Args:
+            event: Dict with EventId, ClubId, Title, Description and Location (get_event)
+            limit: Maximum number of users
+
+        Returns:
+            DataFrame with UserId, score and the feature columns, best first, or
+            None when no index is built yet
+        """
+        if self._built_at is None:
+            record_cache_lookup('audience_index', hit=False)
+            self._refresh_in_background()
+            return None
+        stale = time.monotonic() - self._built_at > self.refresh_seconds
+        record_cache_lookup('audience_index', hit=not stale)
+        if stale:
+            self._refresh_in_background()
+
+        snapshot = self._snapshot
+        n_users = len(snapshot.user_ids)
+        club_id = int(event['ClubId'])
+        position = snapshot.club_positions.get(club_id)
+
+        # Affinity: membership and past attendance at the event's club (columns)
+        if position is not None:
+            following = snapshot.memberships[:, position].toarray().ravel().astype(np.float64)
+            past_attendance = snapshot.attendance[:, position].toarray().ravel().astype(np.float64)
+        else:
+            following = np.zeros(n_users)
+            past_attendance = np.zeros(n_users)
+        past_norm = np.divide(past_attendance, snapshot.attendance_max,
+                              out=np.zeros(n_users), where=snapshot.attendance_max > 0)
+        affinity = following * 0.6 + past_norm * 0.4
+
+        # Content: interest vectors against the club vector and the event text vector
+        vectors, vector_rows = self._interest_vectors(snapshot)
+        club_sim = np.zeros(n_users)
+        title_match = np.zeros(n_users)
+        if vectors is not None:
+            engine = self.feature_engine
+            if club_id in vector_rows:
+                club_vector = engine.club_vectors[vector_rows[club_id]].toarray().ravel()
+                club_sim = np.maximum(vectors @ club_vector, 0.0)
+            event_text = engine.build_event_text(event.get('Title'), event.get('Description'),
+                                                 event.get('Location'))
+            if event_text:
+                text_vector = engine.text_vectors([event_text]).toarray().ravel()
+                title_match = np.clip(vectors @ text_vector, 0.0, 1.0)
+        content = club_sim * 0.6 + title_match * 0.4
+
+        # Collaborative: mean similarity of each user's clubs towards the event's club
+        collaborative = np.zeros(n_users)
+        similarities = self.co_engagement.club_similarities(club_id)
+        if similarities:
+            by_position = np.zeros(len(snapshot.club_ids), dtype=np.float32)
+            for seed_id, similarity in similarities.items():
+                seed_position = snapshot.club_positions.get(seed_id)
+                if seed_position is not None:
+                    by_position[seed_position] = similarity
+            collaborative = np.clip(self.co_engagement.club_weight * (snapshot.seeds @ by_position), 0.0, 1.0)
+
+        weights = self.config['scoring_weights']
+        scores = (
+            content * weights.get('content_similarity', 0.20) +
+            title_match * weights.get('title_match', 0.15) +
+            affinity * weights.get('user_past_behavior', 0.15) +
+            following * weights.get('club_membership_match', 0.30) +
+            collaborative * weights.get('collaborative', 0.0)
+        )
+        scores[title_match > 0.4] *= 1.15
+
+        limit = min(limit, n_users)
+        if limit <= 0:
+            top = np.empty(0, dtype=np.int64)
+        else:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top], kind='stable')]
+        return pd.DataFrame({
+            'UserId': snapshot.user_ids[top],
+            'score': scores[top],
+            'is_following_club': following[top],
+            'past_club_attendance': past_attendance[top],
+            'content_similarity': content[top],
+            'title_match_score': title_match[top],
+            'collaborative_score': collaborative[top],
+        })
+
+    def status(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'enabled': self.enabled,
+            'users': len(snapshot.user_ids) if snapshot is not None else 0,
+            'age_s': round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None,
+        }
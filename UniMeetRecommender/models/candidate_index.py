@@ -0,0 +1,238 @@
+"""
+Candidate retrieval index for UniMeet Recommender Service
+Inverted token and club indexes over upcoming events, used to pick a bounded
+candidate set (followed clubs, lexical matches, popular/upcoming) before the
+full feature computation and scoring.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.db_connector import DatabaseConnector
+from models.event_store import EventTextStore
+from models.fallback import FallbackRanker
+from utils.logger import logger
+from utils.metrics import metrics, record_cache_lookup
+from utils.scheduler import scheduler
+
+
+INDEX_REFRESH_LATENCY = metrics.histogram(
+    'recommender_candidate_index_refresh_duration_seconds', 'Time to rebuild the candidate retrieval index'
+)
+RETRIEVAL_SOURCES = metrics.counter(
+    'recommender_retrieval_candidates_total', 'Retrieved candidate events by retrieval source', ['source']
+)
+
+_EMPTY_POSITIONS = np.empty(0, dtype=np.int64)
+
+
+class CandidateIndex:
+    """Token -> events and club -> events indexes over a snapshot of upcoming events"""
+
+    def __init__(self,
+                 db_connector: DatabaseConnector,
+                 event_store: EventTextStore,
+                 fallback: FallbackRanker,
+                 config: dict):
+        """
+        Initialize candidate index
+
+        Args:
+            db_connector: Database connector instance
+            event_store: Event text store (source of the indexed tokens)
+            fallback: Fallback ranker (source of the popular/upcoming slice)
+            config: Configuration dictionary from config.json
+        """
+        self.db = db_connector
+        self.event_store = event_store
+        self.fallback = fallback
+        settings = config.get('retrieval', {})
+        self.enabled = settings.get('enabled', True)
+        self.refresh_seconds = settings.get('refresh_seconds', 300)
+        self.followed_candidates = settings.get('followed_candidates', 200)
+        self.lexical_candidates = settings.get('lexical_candidates', 200)
+        self.popular_candidates = settings.get('popular_candidates', 100)
+        # Tokens in more than this share of events carry no signal and are skipped
+        self.max_token_df = settings.get('max_token_df', 0.3)
+
+        # (events, start_ts, positions by EventId, token postings, club postings);
+        # replaced as a whole on refresh
+        self._snapshot = self._build(pd.DataFrame())
+        self._built_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether an index has been built"""
+        return self._built_at is not None
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the index from upcoming events
+
+        Returns:
+            True if the index was rebuilt, False if another refresh was running or it failed
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            with INDEX_REFRESH_LATENCY.time():
+                events_df = self.db.get_all_events({'min_date': datetime.now(timezone.utc)})
+                if events_df.empty and len(self._snapshot[0]):
+                    logger.warning("Candidate index refresh returned no events, keeping previous index")
+                    self._built_at = time.monotonic()
+                    return False
+                snapshot = self._build(events_df)
+            self._snapshot = snapshot
+            self._built_at = time.monotonic()
+            logger.info("Candidate index refreshed", events=len(snapshot[0]),
+                        tokens=len(snapshot[3]), clubs=len(snapshot[4]))
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing candidate index: {str(e)}", exc_info=True)
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def _build(self, events_df: pd.DataFrame):
+        """Build positional postings (positions follow the StartAt order of events_df)"""
+        events_df = events_df.reset_index(drop=True)
+        event_ids = events_df['EventId'].tolist() if not events_df.empty else []
+
+        token_lists = defaultdict(list)
+        for position, text in enumerate(self.event_store.texts(event_ids) if event_ids else []):
+            for token in set(text.split()):
+                token_lists[token].append(position)
+        token_postings = {token: np.array(positions, dtype=np.int64)
+                          for token, positions in token_lists.items()}
+
+        club_postings = (
+            {int(club_id): positions.astype(np.int64)
+             for club_id, positions in events_df.groupby('ClubId', observed=True).indices.items()}
+            if not events_df.empty else {}
+        )
+        start_ts = (events_df['StartAt'].to_numpy(dtype=np.int64)
+                    if not events_df.empty else _EMPTY_POSITIONS)
+        positions = {event_id: position for position, event_id in enumerate(event_ids)}
+        return events_df, start_ts, positions, token_postings, club_postings
+
+    def _refresh_in_background(self):
+        if not self._refresh_lock.locked():
+            threading.Thread(target=scheduler.run, args=('background', self.refresh),
+                             name='candidate-index-refresh', daemon=True).start()
+
+    def retrieve(self,
+                 user_club_ids: List[int],
+                 interest_tokens: FrozenSet[str],
+                 filters: Optional[Dict] = None) -> Optional[pd.DataFrame]:
+        """
+        Select a bounded candidate set for a user
+
+        The union of: the soonest events of followed clubs, the best lexical
+        matches of the user's interest tokens (idf-weighted overlap) and the top
+        of the popular/upcoming fallback ranking. Cost depends on the user's
+        clubs and tokens, not on the total number of events.
+
+        Args:
+            user_club_ids: Clubs the user follows
+            interest_tokens: Tokens of the user's interest text (UserProfile)
+            filters: Optional filters (min_date, max_date, exclude_event_ids)
+
+        Returns:
+            Compact events DataFrame (as get_all_events) in StartAt order, or
+            None when no index is built yet (the caller scans all events instead)
+        """
+        if self._built_at is None:
+            record_cache_lookup('candidate_index', hit=False)
+            self._refresh_in_background()
+            return None
+        stale = time.monotonic() - self._built_at > self.refresh_seconds
+        record_cache_lookup('candidate_index', hit=not stale)
+        if stale:
+            self._refresh_in_background()
+
+        # One reference so a concurrent refresh cannot mix two snapshots
+        events, start_ts, positions, token_postings, club_postings = self._snapshot
+        if events.empty:
+            return events
+
+        filters = filters or {}
+        min_date = filters.get('min_date') or datetime.now(timezone.utc)
+        min_ts = int(min_date.timestamp())
+        max_ts = int(filters['max_date'].timestamp()) if filters.get('max_date') else None
+        excluded = np.fromiter((int(i) for i in (filters.get('exclude_event_ids') or ())), dtype=np.int64)
+        event_ids = events['EventId'].to_numpy()
+
+        def admissible(candidates: np.ndarray) -> np.ndarray:
+            """Mask of candidate positions passing the request filters"""
+            keep = start_ts[candidates] >= min_ts
+            if max_ts is not None:
+                keep &= start_ts[candidates] <= max_ts
+            if len(excluded):
+                keep &= ~np.isin(event_ids[candidates], excluded)
+            return keep
+
+        # 1. Followed clubs: postings are in StartAt order, keep the soonest
+        followed = [club_postings[cid] for cid in user_club_ids if cid in club_postings]
+        followed = np.sort(np.concatenate(followed)) if followed else _EMPTY_POSITIONS
+        followed = followed[admissible(followed)][:self.followed_candidates]
+
+        # 2. Lexical matches: idf-weighted count of shared tokens
+        lexical = self._lexical(interest_tokens, token_postings, len(events), admissible)
+
+        # 3. Popular / upcoming slice from the fallback ranking
+        popular_ids, _ = self.fallback.top(self.popular_candidates, filters, build=False)
+        popular = np.array([positions[event_id] for event_id, _ in popular_ids if event_id in positions],
+                           dtype=np.int64)
+
+        RETRIEVAL_SOURCES.inc(len(followed), source='followed_club')
+        RETRIEVAL_SOURCES.inc(len(lexical), source='lexical')
+        RETRIEVAL_SOURCES.inc(len(popular), source='popular')
+
+        selected = np.unique(np.concatenate([followed, lexical, popular]))
+        return events.iloc[selected].reset_index(drop=True)
+
+    def _lexical(self, interest_tokens: FrozenSet[str], token_postings: Dict[str, np.ndarray],
+                 n_events: int, admissible) -> np.ndarray:
+        """Top lexical matches, best first"""
+        max_df = max(1, int(self.max_token_df * n_events))
+        postings, weights = [], []
+        for token in interest_tokens:
+            token_positions = token_postings.get(token)
+            if token_positions is None or len(token_positions) > max_df:
+                continue
+            postings.append(token_positions)
+            weights.append(np.full(len(token_positions), math.log(n_events / len(token_positions))))
+        if not postings:
+            return _EMPTY_POSITIONS
+
+        matched, inverse = np.unique(np.concatenate(postings), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights))
+        keep = admissible(matched)
+        matched, scores = matched[keep], scores[keep]
+        if len(matched) > self.lexical_candidates:
+            top = np.argpartition(-scores, self.lexical_candidates - 1)[:self.lexical_candidates]
+            matched = matched[top]
+        return matched
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the posting arrays"""
+        _, start_ts, _, token_postings, club_postings = self._snapshot
+        return (start_ts.nbytes +
+                sum(positions.nbytes for positions in token_postings.values()) +
+                sum(positions.nbytes for positions in club_postings.values()))
+
+    def status(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'events': len(self._snapshot[0]),
+            'tokens': len(self._snapshot[3]),
+            'age_s': round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None,
+        }
@@ -0,0 +1,341 @@
+"""
+Co-engagement model for UniMeet Recommender Service
+Item-to-item collaborative signal ("people like you attended"): club x club and
+event x event co-engagement counts built in a streaming pass over attendance
+and favorites, served as normalized sparse float32 CSR matrices.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from models.db_connector import DatabaseConnector
+from utils.logger import logger
+from utils.metrics import metrics, record_cache_lookup
+from utils.scheduler import scheduler
+
+
+COENGAGEMENT_REFRESH_LATENCY = metrics.histogram(
+    'recommender_coengagement_refresh_duration_seconds', 'Time to rebuild or update the co-engagement model', ['mode']
+)
+
+
+class _Axis:
+    """Stable ID -> matrix index mapping; only grows, so existing indexes never move"""
+
+    def __init__(self):
+        self.codes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def encode(self, ids: np.ndarray) -> np.ndarray:
+        """Indexes for ids, adding unseen ones"""
+        uniques, inverse = np.unique(ids, return_inverse=True)
+        codes = np.empty(len(uniques), dtype=np.int32)
+        for i, item_id in enumerate(uniques.tolist()):
+            code = self.codes.get(item_id)
+            if code is None:
+                code = self.codes[item_id] = len(self.codes)
+            codes[i] = code
+        return codes[inverse]
+
+
+def _binary_matrix(rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """users x items engagement matrix with 1.0 for every engaged pair"""
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape)
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def _similarity(counts: sparse.csr_matrix, max_neighbors: int) -> sparse.csr_matrix:
+    """
+    Cosine-normalize co-engagement counts, drop the diagonal and keep the
+    strongest max_neighbors entries per row
+    """
+    engaged = counts.diagonal()
+    inv_norm = np.zeros(len(engaged), dtype=np.float32)
+    inv_norm[engaged > 0] = 1 / np.sqrt(engaged[engaged > 0])
+    scale = sparse.diags(inv_norm)
+    similarity = (scale @ counts @ scale).tocsr()
+    similarity = (similarity - sparse.diags(similarity.diagonal())).tocsr()
+    similarity.eliminate_zeros()
+
+    if max_neighbors > 0:
+        row_sizes = np.diff(similarity.indptr)
+        for row in np.nonzero(row_sizes > max_neighbors)[0]:
+            start, end = similarity.indptr[row], similarity.indptr[row + 1]
+            values = similarity.data[start:end]
+            weakest = np.argpartition(values, len(values) - max_neighbors)[:len(values) - max_neighbors]
+            values[weakest] = 0
+        similarity.eliminate_zeros()
+    return similarity.astype(np.float32)
+
+
+class CoEngagementModel:
+    """Club and event co-engagement matrices with a cheap per-request score"""
+
+    def __init__(self, db_connector: DatabaseConnector, config: dict):
+        """
+        Initialize co-engagement model
+
+        Args:
+            db_connector: Database connector instance (iter_engagement,
+                get_engaged_users_since)
+            config: Configuration dictionary from config.json
+        """
+        self.db = db_connector
+        settings = config.get('collaborative', {})
+        self.enabled = settings.get('enabled', True)
+        self.days_back = settings.get('days_back', 365)
+        self.refresh_seconds = settings.get('refresh_seconds', 600)
+        self.full_rebuild_seconds = settings.get('full_rebuild_seconds', 86400)
+        self.max_neighbors = settings.get('max_neighbors', 50)
+        self.club_weight = settings.get('club_weight', 0.5)
+
+        # Offline state, only touched under _refresh_lock
+        self._users = _Axis()
+        self._clubs = _Axis()
+        self._events = _Axis()
+        self._user_clubs: Optional[sparse.csr_matrix] = None
+        self._user_events: Optional[sparse.csr_matrix] = None
+        self._club_counts: Optional[sparse.csr_matrix] = None
+        self._event_counts: Optional[sparse.csr_matrix] = None
+        self._watermark = 0
+        self._refresh_lock = threading.Lock()
+
+        # Serving snapshot (club codes, event codes, club similarity, event similarity);
+        # replaced as a whole after every refresh
+        self._serving: Optional[Tuple[Dict[int, int], Dict[int, int],
+                                      sparse.csr_matrix, sparse.csr_matrix]] = None
+        self._built_at: Optional[float] = None
+        self._full_built_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a model has been built"""
+        return self._serving is not None
+
+    def refresh(self, full: bool = False) -> bool:
+        """
+        Rebuild the model, or fold in engagement recorded since the last refresh
+
+        An incremental update re-reads the complete rows of users who engaged
+        since the watermark and swaps their contribution. Rows leaving the
+        days_back window are only dropped by a full rebuild.
+
+        Args:
+            full: Rebuild from a full streaming pass (always done the first time)
+
+        Returns:
+            True if the model was refreshed, False if another refresh was running or it failed
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            full = full or self._user_clubs is None
+            with COENGAGEMENT_REFRESH_LATENCY.time(mode='full' if full else 'incremental'):
+                updated = self._rebuild() if full else self._update()
+            if updated:
+                self._publish()
+                self._built_at = time.monotonic()
+                if full:
+                    self._full_built_at = self._built_at
+            return updated
+        except Exception as e:
+            logger.error(f"Error refreshing co-engagement model: {str(e)}", exc_info=True)
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    @staticmethod
+    def _encode(chunks: Iterable[pd.DataFrame], users: _Axis, clubs: _Axis,
+                events: _Axis) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """Stream engagement chunks into (user, club, event) index arrays plus the latest CreatedAt"""
+        user_codes, club_codes, event_codes = [], [], []
+        latest = 0
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            user_codes.append(users.encode(chunk['UserId'].to_numpy()))
+            club_codes.append(clubs.encode(chunk['ClubId'].to_numpy()))
+            event_codes.append(events.encode(chunk['EventId'].to_numpy()))
+            latest = max(latest, int(chunk['CreatedAt'].max()))
+        if not user_codes:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty, empty, latest
+        return np.concatenate(user_codes), np.concatenate(club_codes), np.concatenate(event_codes), latest
+
+    def _rebuild(self) -> bool:
+        axes = (_Axis(), _Axis(), _Axis())
+        users, clubs, events, latest = self._encode(self.db.iter_engagement(self.days_back), *axes)
+
+        n_users, n_clubs, n_events = (len(axis) for axis in axes)
+        user_clubs = _binary_matrix(users, clubs, (n_users, n_clubs))
+        user_events = _binary_matrix(users, events, (n_users, n_events))
+        self._users, self._clubs, self._events = axes
+        self._user_clubs, self._user_events = user_clubs, user_events
+        self._club_counts = (user_clubs.T @ user_clubs).tocsr()
+        self._event_counts = (user_events.T @ user_events).tocsr()
+        self._watermark = latest
+        logger.info("Co-engagement model rebuilt", users=n_users, clubs=n_clubs,
+                    events=n_events, rows=len(users))
+        return True
+
+    def _update(self) -> bool:
+        since = datetime.fromtimestamp(self._watermark, timezone.utc)
+        user_ids = self.db.get_engaged_users_since(since)
+        if user_ids is None:
+            return False
+        if not user_ids:
+            return True
+
+        users, clubs, events, latest = self._encode(
+            self.db.iter_engagement(self.days_back, user_ids=user_ids), self._users, self._clubs, self._events
+        )
+        n_users, n_clubs, n_events = len(self._users), len(self._clubs), len(self._events)
+        for matrix, shape in ((self._user_clubs, (n_users, n_clubs)), (self._user_events, (n_users, n_events)),
+                              (self._club_counts, (n_clubs, n_clubs)), (self._event_counts, (n_events, n_events))):
+            matrix.resize(shape)
+
+        # Swap the changed users' rows and their contribution to the counts
+        affected = np.array(sorted({self._users.codes[u] for u in user_ids if u in self._users.codes}),
+                            dtype=np.int64)
+        mask = np.zeros(n_users, dtype=np.float32)
+        mask[affected] = 1.0
+        keep = sparse.diags(1.0 - mask)
+        new_clubs = _binary_matrix(users, clubs, (n_users, n_clubs))
+        new_events = _binary_matrix(users, events, (n_users, n_events))
+        old_clubs = self._user_clubs[affected]
+        old_events = self._user_events[affected]
+
+        self._club_counts = (self._club_counts + new_clubs.T @ new_clubs - old_clubs.T @ old_clubs).tocsr()
+        self._event_counts = (self._event_counts + new_events.T @ new_events - old_events.T @ old_events).tocsr()
+        self._club_counts.eliminate_zeros()
+        self._event_counts.eliminate_zeros()
+        self._user_clubs = (keep @ self._user_clubs + new_clubs).tocsr()
+        self._user_events = (keep @ self._user_events + new_events).tocsr()
+        self._watermark = max(self._watermark, latest)
+        logger.debug("Co-engagement model updated for %d users", len(affected), rows=len(users))
+        return True
+
+    def _publish(self):
+        self._serving = (
+            dict(self._clubs.codes),
+            dict(self._events.codes),
+            _similarity(self._club_counts, self.max_neighbors),
+            _similarity(self._event_counts, self.max_neighbors),
+        )
+
+    def _refresh_in_background(self, full: bool):
+        if not self._refresh_lock.locked():
+            threading.Thread(target=scheduler.run, args=('background', self.refresh, full),
+                             name='coengagement-refresh', daemon=True).start()
+
+    def _ensure_fresh(self):
+        """Build in the background on first use; afterwards update or rebuild when stale"""
+        if self._built_at is None:
+            record_cache_lookup('co_engagement', hit=False)
+            self._refresh_in_background(full=True)
+            return
+        age = time.monotonic() - self._built_at
+        record_cache_lookup('co_engagement', hit=age <= self.refresh_seconds)
+        if time.monotonic() - self._full_built_at > self.full_rebuild_seconds:
+            self._refresh_in_background(full=True)
+        elif age > self.refresh_seconds:
+            self._refresh_in_background(full=False)
+
+    def score(self,
+              events_df: pd.DataFrame,
+              club_ids: Iterable[int],
+              event_ids: Iterable[int]) -> Optional[pd.DataFrame]:
+        """
+        "People like you attended" score for candidate events
+
+        Averages the similarity rows of the user's clubs and engaged events (one
+        sparse row gather each) and reads them at the candidates' clubs and
+        events. Cost depends on the user's seeds and the candidates, not on the
+        number of users.
+
+        Args:
+            events_df: Candidate events (EventId, ClubId)
+            club_ids: Clubs the user follows or attended events of
+            event_ids: Events the user attended or favorited
+
+        Returns:
+            DataFrame with EventId and collaborative_score (0-1), or None while
+            no model is built or the model is disabled
+        """
+        if not self.enabled:
+            return None
+        self._ensure_fresh()
+        serving = self._serving
+        if serving is None:
+            return None
+        club_codes, event_codes, club_similarity, event_similarity = serving
+
+        # Club part: dense over clubs (few), looked up once per distinct candidate club
+        club_part = np.zeros(len(events_df))
+        club_seeds = [club_codes[c] for c in set(club_ids) if c in club_codes]
+        if club_seeds:
+            club_scores = np.asarray(club_similarity[club_seeds].sum(axis=0)).ravel() / len(club_seeds)
+            codes, uniques = pd.factorize(events_df['ClubId'])
+            lookup = np.array([club_scores[club_codes[c]] if c in club_codes else 0.0 for c in uniques] + [0.0])
+            club_part = lookup[codes]
+
+        # Event part: gather the seed rows and keep the entries at candidate events
+        event_part = np.zeros(len(events_df))
+        event_seeds = [event_codes[e] for e in set(event_ids) if e in event_codes]
+        if event_seeds:
+            gathered = event_similarity[event_seeds].tocoo()
+            candidates = np.array([event_codes.get(int(e), -1) for e in events_df['EventId'].tolist()],
+                                  dtype=np.int64)
+            order = np.argsort(candidates)
+            positions = np.clip(np.searchsorted(candidates, gathered.col, sorter=order), 0, len(order) - 1)
+            matched = candidates[order[positions]] == gathered.col
+            event_part = np.bincount(order[positions[matched]], weights=gathered.data[matched],
+                                     minlength=len(events_df)) / len(event_seeds)
+
+        scores = self.club_weight * club_part + (1 - self.club_weight) * event_part
+        return pd.DataFrame({
+            'EventId': events_df['EventId'].to_numpy(),
+            'collaborative_score': np.clip(scores, 0.0, 1.0)
+        })
+
+    def club_similarities(self, club_id: int) -> Optional[Dict[int, float]]:
+        """
+        Similarity of every seed club towards one club (the club part of
+        score() read from the candidate's side, for scoring all users at once)
+
+        Returns:
+            Dict mapping seed ClubId to similarity (non-zero entries only), or
+            None while no model is built or the model is disabled
+        """
+        if not self.enabled:
+            return None
+        self._ensure_fresh()
+        serving = self._serving
+        if serving is None:
+            return None
+        club_codes, _, club_similarity, _ = serving
+        code = club_codes.get(club_id)
+        if code is None:
+            return {}
+        column = club_similarity[:, code].tocoo()
+        ids_by_code = {c: i for i, c in club_codes.items()}
+        return {ids_by_code[row]: float(value) for row, value in zip(column.row.tolist(), column.data.tolist())}
+
+    def status(self) -> Dict:
+        serving = self._serving
+        return {
+            'enabled': self.enabled,
+            'clubs': len(serving[0]) if serving else 0,
+            'events': len(serving[1]) if serving else 0,
+            'club_pairs': int(serving[2].nnz) if serving else 0,
+            'event_pairs': int(serving[3].nnz) if serving else 0,
+            'age_s': round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None,
+        }
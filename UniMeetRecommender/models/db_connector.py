@@ -2,15 +2,154 @@
 Database connector for UniMeet Recommender Service
 Handles SQL Server connections and data extraction
 """
+import json
 import os
+import threading
+import time
 import urllib
-from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
+from pandas.api.types import union_categoricals
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.pool import QueuePool
+from models.pool_sizer import AdaptivePoolSizer
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
 from utils.logger import logger
+from utils.metrics import metrics
+from utils.tracing import span
+
+
+DB_QUERY_LATENCY = metrics.histogram(
+    'recommender_db_query_duration_seconds', 'Database query latency including pool wait', ['query']
+)
+DB_QUERY_ERRORS = metrics.counter(
+    'recommender_db_query_errors_total', 'Database queries that raised an error', ['query']
+)
+DB_POOL_WAIT = metrics.histogram(
+    'recommender_db_pool_wait_seconds', 'Time spent waiting to check out a pooled connection'
+)
+DB_POOL_CHECKOUTS = metrics.counter(
+    'recommender_db_pool_checkouts_total', 'Connections checked out from the pool'
+)
+DB_POOL_CHECKED_OUT = metrics.gauge(
+    'recommender_db_pool_checked_out', 'Connections currently checked out from the pool'
+)
+DB_POOL_SIZE = metrics.gauge(
+    'recommender_db_pool_size', 'Configured persistent pool size'
+)
+DB_POOL_MAX_OVERFLOW = metrics.gauge(
+    'recommender_db_pool_max_overflow', 'Configured maximum pool overflow'
+)
+DB_POOL_OVERFLOW = metrics.gauge(
+    'recommender_db_pool_overflow', 'Connections currently open beyond the persistent pool size'
+)
+DB_POOL_TIMEOUTS = metrics.counter(
+    'recommender_db_pool_timeouts_total', 'Checkouts that gave up waiting for a connection'
+)
+DB_POOL_CONNECTS = metrics.counter(
+    'recommender_db_pool_connects_total', 'New DBAPI connections opened by the pool'
+)
+DB_POOL_INVALIDATIONS = metrics.counter(
+    'recommender_db_pool_invalidations_total', 'Pooled connections invalidated (e.g. failed pre-ping)', ['kind']
+)
+DB_CONNECTION_AGE = metrics.histogram(
+    'recommender_db_connection_age_seconds', 'Age of pooled connections when checked out',
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200)
+)
+DB_ROWS_STREAMED = metrics.counter(
+    'recommender_db_rows_streamed_total', 'Rows fetched through chunked streaming reads', ['query']
+)
+DB_STALE_READS = metrics.counter(
+    'recommender_db_stale_reads_total', 'Queries answered from the last good result after a failure', ['query']
+)
+
+# Set when a query in the current request context was answered from the last good result
+_stale_reads: ContextVar[bool] = ContextVar('db_stale_reads', default=False)
+
+
+# Columns of the compact event frame returned by get_all_events
+EVENT_COLUMNS = ['EventId', 'ClubId', 'ClubName', 'StartAt']
+_EPOCH = pd.Timestamp(0, tz='UTC')
+
+
+def to_epoch_seconds(values) -> np.ndarray:
+    """Convert datetimes (naive values are taken as UTC) to int64 epoch seconds"""
+    timestamps = pd.to_datetime(pd.Series(values), utc=True)
+    return ((timestamps - _EPOCH) // pd.Timedelta(seconds=1)).fillna(0).to_numpy(dtype=np.int64)
+
+
+def compact_events(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the read-optimized event frame used for scoring
+    
+    int32 EventId, categorical ClubId/ClubName and int64 epoch-second StartAt.
+    Event text is not part of the frame; it is fetched once per event by
+    EventTextStore (get_event_texts).
+    """
+    return pd.DataFrame({
+        'EventId': df['EventId'].to_numpy(dtype=np.int32),
+        'ClubId': pd.Categorical(df['ClubId']),
+        'ClubName': pd.Categorical(df['ClubName'].fillna('')),
+        'StartAt': to_epoch_seconds(df['StartAt']),
+    })
+
+
+def compact_history(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact user history frame: int32 IDs and int8 flags"""
+    return pd.DataFrame({
+        'EventId': df['EventId'].to_numpy(dtype=np.int32),
+        'ClubId': df['ClubId'].to_numpy(dtype=np.int32),
+        'Attended': df['Attended'].to_numpy(dtype=np.int8),
+        'Favorited': df['Favorited'].to_numpy(dtype=np.int8),
+    })
+
+
+def concat_compact(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate compact chunks (see compact_events) into one frame
+    
+    Categorical columns are merged with union_categoricals, so chunk categories
+    never widen to object columns on the way.
+    """
+    non_empty = [frame for frame in frames if not frame.empty]
+    if not non_empty:
+        return frames[0] if frames else pd.DataFrame()
+    if len(non_empty) == 1:
+        return non_empty[0]
+    data = {}
+    for column in non_empty[0].columns:
+        if isinstance(non_empty[0][column].dtype, pd.CategoricalDtype):
+            data[column] = union_categoricals([frame[column] for frame in non_empty])
+        else:
+            data[column] = np.concatenate([frame[column].to_numpy() for frame in non_empty])
+    return pd.DataFrame(data)
+
+
+def _id_set_param(ids) -> str:
+    """
+    Encode an ID collection as one JSON array parameter for OPENJSON
+    
+    The SQL text stays the same whatever the list length, so SQL Server reuses
+    one cached plan and the 2100-parameter limit does not apply.
+    """
+    return json.dumps(sorted({int(i) for i in ids}))
+
+
+def reset_stale_reads():
+    """Start tracking stale reads for the current request"""
+    _stale_reads.set(False)
+
+
+def stale_reads() -> bool:
+    """Whether any query since reset_stale_reads() was served stale"""
+    return _stale_reads.get()
 
 
 class DatabaseConnector:
@@ -26,18 +165,26 @@ class DatabaseConnector:
         """
         self.config = config
         self.engine = self._create_engine(connection_string)
+        
+        # Optional adaptive pool sizing (tunes size/overflow from checkout wait time)
+        self.pool_sizer: Optional[AdaptivePoolSizer] = None
+        adaptive_config = config.get('adaptive_pool', {})
+        if adaptive_config.get('enabled', False) and isinstance(self.engine.pool, QueuePool):
+            self.pool_sizer = AdaptivePoolSizer(self.engine.pool, adaptive_config)
+            self.pool_sizer.start()
+        
+        self.breaker = CircuitBreaker('database', config.get('circuit_breaker', {}))
+        
+        # Last good result per query key, served (marked stale) while the DB is unavailable
+        self._last_good: OrderedDict = OrderedDict()
+        self._last_good_size = config.get('stale_cache_size', 1000)
+        self._last_good_lock = threading.Lock()
+        
+        # Rows per chunk for streaming reads (iter_* methods and full-table loads)
+        self.chunk_size = config.get('stream_chunk_size', 5000)
         logger.info("Database connector initialized", 
                    pool_size=config.get('pool_size', 5))
     
-    def _localize_datetime_columns(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
-        """Convert naive datetime columns to UTC timezone-aware"""
-        for col in columns:
-            if col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col]):
-                # If naive, localize to UTC
-                if df[col].dt.tz is None:
-                    df[col] = df[col].dt.tz_localize('UTC')
-        return df
-    
     def _create_engine(self, connection_string: str) -> Engine:
         """Create SQLAlchemy engine with connection pooling"""
         # Parse connection string for pyodbc
@@ -48,24 +195,181 @@ class DatabaseConnector:
             db_url,
             poolclass=QueuePool,
             pool_size=self.config.get('pool_size', 5),
+            max_overflow=self.config.get('max_overflow', 10),
+            pool_timeout=self.config.get('pool_timeout', 30),
             pool_recycle=self.config.get('pool_recycle', 3600),
+            pool_pre_ping=self.config.get('pool_pre_ping', True),
             echo=self.config.get('echo_sql', False),
             connect_args={'timeout': self.config.get('connection_timeout', 30)}
         )
         
+        event.listen(engine.pool, 'connect', self._on_connect)
+        event.listen(engine.pool, 'checkout', self._on_checkout)
+        event.listen(engine.pool, 'checkin', self._on_checkin)
+        event.listen(engine.pool, 'invalidate', self._on_invalidate)
+        event.listen(engine.pool, 'soft_invalidate', self._on_soft_invalidate)
+        self._update_pool_gauges(engine.pool)
+        
         return engine
     
+    @staticmethod
+    def _update_pool_gauges(pool):
+        DB_POOL_SIZE.set(pool.size())
+        DB_POOL_MAX_OVERFLOW.set(max(getattr(pool, '_max_overflow', 0), 0))
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    
+    @staticmethod
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.inc()
+        connection_record.info['connected_at'] = time.monotonic()
+    
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+        connected_at = connection_record.info.get('connected_at')
+        if connected_at is not None:
+            DB_CONNECTION_AGE.observe(time.monotonic() - connected_at)
+        self._update_pool_gauges(self.engine.pool)
+    
+    def _on_checkin(self, dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+        self._update_pool_gauges(self.engine.pool)
+    
+    @staticmethod
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.inc(kind='hard')
+    
+    @staticmethod
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.inc(kind='soft')
+    
+    @contextmanager
+    def _connect(self, query_name: str, streaming: bool = False):
+        """
+        Check out a pooled connection and record pool wait and query latency
+        
+        Args:
+            query_name: Metric label for the query (usually the method name)
+            streaming: The connection is held while a consumer processes chunks;
+                its total duration is not judged as a slow call by the breaker
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Database circuit breaker is open")
+        
+        start = time.perf_counter()
+        try:
+            with span(f'db.{query_name}'), self.engine.connect() as conn:
+                wait = time.perf_counter() - start
+                DB_POOL_WAIT.observe(wait)
+                if self.pool_sizer is not None:
+                    self.pool_sizer.record_checkout(wait)
+                yield conn
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            if self.pool_sizer is not None:
+                self.pool_sizer.record_checkout(time.perf_counter() - start, timed_out=True)
+            DB_QUERY_ERRORS.inc(query=query_name)
+            self.breaker.record_failure()
+            raise
+        except GeneratorExit:
+            # A streaming consumer stopped early; the query itself did not fail
+            self.breaker.record_success(0.0)
+            raise
+        except Exception:
+            DB_QUERY_ERRORS.inc(query=query_name)
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success(0.0 if streaming else time.perf_counter() - start)
+        finally:
+            DB_QUERY_LATENCY.observe(time.perf_counter() - start, query=query_name)
+    
+    def _remember(self, key: Tuple, value: Any) -> Any:
+        """Store the last good result for a query key and return it"""
+        with self._last_good_lock:
+            self._last_good[key] = value
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > self._last_good_size:
+                self._last_good.popitem(last=False)
+        return value
+    
+    def _recover(self, key: Optional[Tuple], default: Any, message: str, error: Exception) -> Any:
+        """
+        Handle a failed query: log it and serve the last good result (marked stale)
+        
+        Args:
+            key: Query key used with _remember, or None if the query is not cached
+            default: Value returned when there is no last good result
+            message: Error log message
+            error: The raised exception
+        """
+        if isinstance(error, CircuitOpenError):
+            logger.debug("%s: %s", message, error, sample_key='circuit_open')
+        else:
+            logger.error(f"{message}: {str(error)}")
+        
+        if key is None:
+            return default
+        with self._last_good_lock:
+            value = self._last_good.get(key)
+        if value is None:
+            return default
+        DB_STALE_READS.inc(query=key[0])
+        _stale_reads.set(True)
+        return value
+    
+    def _stream(self, query_name: str, query: str, params: Dict,
+                chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Run a query with a server-side cursor and yield it in DataFrame chunks
+        
+        Only one chunk of raw rows is held at a time. The pooled connection stays
+        checked out until the generator is exhausted or closed. Errors are raised,
+        not swallowed: a truncated stream must not pass for a complete one.
+        
+        Args:
+            query_name: Metric label for the query
+            query: SQL text
+            params: Query parameters
+            chunk_size: Rows per chunk (defaults to database.stream_chunk_size)
+        """
+        chunk_size = chunk_size or self.chunk_size
+        with self._connect(query_name, streaming=True) as conn:
+            conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_size)
+            for chunk in pd.read_sql(text(query), conn, params=params, chunksize=chunk_size):
+                DB_ROWS_STREAMED.inc(len(chunk), query=query_name)
+                yield chunk
+    
     def test_connection(self) -> bool:
         """Test database connection"""
         try:
-            with self.engine.connect() as conn:
+            with self._connect('test_connection') as conn:
                 conn.execute(text("SELECT 1"))
-            logger.info("Database connection test successful")
+            logger.debug("Database connection test successful")
             return True
+        except CircuitOpenError:
+            logger.debug("Database connection test skipped: circuit breaker is open")
+            return False
         except Exception as e:
             logger.error(f"Database connection test failed: {str(e)}", exc_info=True)
             return False
     
+    def pool_status(self) -> Dict:
+        """Connection pool usage (no connection is checked out)"""
+        pool = self.engine.pool
+        size = pool.size()
+        max_overflow = max(getattr(pool, '_max_overflow', 0), 0)
+        checked_out = pool.checkedout()
+        capacity = size + max_overflow
+        return {
+            'size': size,
+            'max_overflow': max_overflow,
+            'checked_out': checked_out,
+            'overflow': max(pool.overflow(), 0),
+            'saturation': round(checked_out / capacity, 3) if capacity else 0.0,
+            'adaptive': self.pool_sizer is not None
+        }
+    
     def get_user_followed_clubs(self, user_id: int) -> List[int]:
         """
         Get list of club IDs that a user follows
@@ -83,15 +387,15 @@ class DatabaseConnector:
         """)
         
         try:
-            with self.engine.connect() as conn:
+            with self._connect('get_user_followed_clubs') as conn:
                 result = conn.execute(query, {"user_id": user_id})
                 club_ids = [row[0] for row in result]
             
-            logger.debug(f"User {user_id} follows {len(club_ids)} clubs")
-            return club_ids
+            logger.debug("User %s follows %d clubs", user_id, len(club_ids))
+            return self._remember(('get_user_followed_clubs', user_id), club_ids)
         except Exception as e:
-            logger.error(f"Error fetching followed clubs for user {user_id}: {str(e)}")
-            return []
+            return self._recover(('get_user_followed_clubs', user_id), [],
+                                 f"Error fetching followed clubs for user {user_id}", e)
     
     def get_club_details(self, club_ids: Optional[List[int]] = None) -> pd.DataFrame:
         """
@@ -116,49 +420,72 @@ class DatabaseConnector:
         
         params = {}
         if club_ids:
-            placeholders = ','.join([f':id{i}' for i in range(len(club_ids))])
-            query += f" WHERE ClubId IN ({placeholders})"
-            params = {f'id{i}': club_id for i, club_id in enumerate(club_ids)}
+            query += " WHERE ClubId IN (SELECT CAST(value AS int) FROM OPENJSON(:club_ids))"
+            params['club_ids'] = _id_set_param(club_ids)
         
         try:
-            with self.engine.connect() as conn:
+            with self._connect('get_club_details') as conn:
                 df = pd.read_sql(text(query), conn, params=params)
             
             # Fill NaN values
             df['Description'] = df['Description'].fillna('')
             df['Purpose'] = df['Purpose'].fillna('')
             
-            logger.debug(f"Fetched {len(df)} club details")
-            return df
+            logger.debug("Fetched %d club details", len(df))
+            return self._remember(('get_club_details', tuple(club_ids or ())), df)
         except Exception as e:
-            logger.error(f"Error fetching club details: {str(e)}")
-            return pd.DataFrame()
+            return self._recover(('get_club_details', tuple(club_ids or ())), pd.DataFrame(),
+                                 "Error fetching club details", e)
     
     def get_all_events(self, filters: Optional[Dict] = None) -> pd.DataFrame:
         """
         Get all events with optional filters
         
+        The frame is built chunk by chunk from iter_events(), so peak memory is
+        the compact result plus one chunk of raw rows.
+        
         Args:
             filters: Optional dict with keys like 'min_date', 'max_date', 'exclude_event_ids'
+                (any iterable of IDs, sent as a single JSON parameter)
             
         Returns:
-            DataFrame with event details
+            Compact DataFrame with EventId, ClubId, ClubName and StartAt
+            (epoch seconds), see compact_events(); text is fetched separately
+            with get_event_texts()
+        """
+        try:
+            df = concat_compact(list(self.iter_events(filters)))
+            
+            logger.debug("Fetched %d events", len(df), filters=filters or {})
+            # Only results without an upper bound or exclusions are reusable for other filters
+            if not filters or not (filters.get('max_date') or filters.get('exclude_event_ids')):
+                self._remember(('get_all_events',), df)
+            return df
+        except Exception as e:
+            stale_df = self._recover(('get_all_events',), None, "Error fetching events", e)
+            if stale_df is None:
+                return pd.DataFrame()
+            return self._filter_events(stale_df, filters)
+    
+    def iter_events(self, filters: Optional[Dict] = None,
+                    chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream events in compact chunks, ordered by StartAt
+        
+        Args:
+            filters: Same as get_all_events()
+            chunk_size: Rows per chunk (defaults to database.stream_chunk_size)
+            
+        Yields:
+            Compact event DataFrames (see compact_events); combine them with
+            concat_compact(). Raises on database errors.
         """
         query = """
             SELECT 
                 e.EventId,
-                e.Title,
-                e.Description,
-                e.Location,
-                e.StartAt,
-                e.EndAt,
-                e.Quota,
                 e.ClubId,
-                e.IsCancelled,
-                e.IsPublic,
-                e.CreatedByUserId,
-                e.CreatedAt,
-                c.Name as ClubName
+                c.Name as ClubName,
+                e.StartAt
             FROM Events e
             LEFT JOIN Clubs c ON e.ClubId = c.ClubId
             WHERE e.IsCancelled = 0 AND e.IsPublic = 1
@@ -176,28 +503,217 @@ class DatabaseConnector:
                 params['max_date'] = filters['max_date']
             
             if 'exclude_event_ids' in filters and filters['exclude_event_ids']:
-                placeholders = ','.join([f':excl{i}' for i in range(len(filters['exclude_event_ids']))])
-                query += f" AND e.EventId NOT IN ({placeholders})"
-                params.update({f'excl{i}': eid for i, eid in enumerate(filters['exclude_event_ids'])})
+                query += " AND e.EventId NOT IN (SELECT CAST(value AS int) FROM OPENJSON(:exclude_ids))"
+                params['exclude_ids'] = _id_set_param(filters['exclude_event_ids'])
         
         query += " ORDER BY e.StartAt"
         
-        try:
-            with self.engine.connect() as conn:
-                df = pd.read_sql(text(query), conn, params=params)
+        for chunk in self._stream('get_all_events', query, params, chunk_size):
+            yield compact_events(chunk)
+    
+    @staticmethod
+    def _filter_events(events_df: pd.DataFrame, filters: Optional[Dict]) -> pd.DataFrame:
+        """Apply get_all_events filters in memory (used for stale results)"""
+        if not filters or events_df.empty:
+            return events_df
+        start_at = events_df['StartAt'].to_numpy()
+        mask = np.ones(len(events_df), dtype=bool)
+        if filters.get('min_date'):
+            mask &= start_at >= int(filters['min_date'].timestamp())
+        if filters.get('max_date'):
+            mask &= start_at <= int(filters['max_date'].timestamp())
+        if filters.get('exclude_event_ids'):
+            mask &= ~np.isin(events_df['EventId'].to_numpy(), list(filters['exclude_event_ids']))
+        return events_df[mask].reset_index(drop=True)
+    
+    def get_event(self, event_id: int) -> Optional[Dict]:
+        """
+        Get one event's club and text, whatever its date or visibility
+        
+        Args:
+            event_id: Event ID
             
-            # Fill NaN values
-            df['Description'] = df['Description'].fillna('')
-            df['EndAt'] = df['EndAt'].fillna(df['StartAt'])
+        Returns:
+            Dict with EventId, ClubId, Title, Description and Location, or None
+            if the event does not exist or the query failed
+        """
+        query = text("""
+            SELECT EventId, ClubId, Title, Description, Location
+            FROM Events
+            WHERE EventId = :event_id
+        """)
+        
+        try:
+            with self._connect('get_event') as conn:
+                row = conn.execute(query, {"event_id": event_id}).mappings().first()
+            return dict(row) if row is not None else None
+        except Exception as e:
+            return self._recover(None, None, f"Error fetching event {event_id}", e)
+    
+    def get_event_texts(self, event_ids: List[int]) -> pd.DataFrame:
+        """
+        Get title, description and location for specific events
+        
+        Args:
+            event_ids: Event IDs
             
-            # Localize datetime columns to UTC
-            df = self._localize_datetime_columns(df, ['StartAt', 'EndAt', 'CreatedAt'])
+        Returns:
+            DataFrame with EventId, Title, Description and Location
+        """
+        query = text("""
+            SELECT EventId, Title, Description, Location
+            FROM Events
+            WHERE EventId IN (SELECT CAST(value AS int) FROM OPENJSON(:event_ids))
+        """)
+        
+        try:
+            with self._connect('get_event_texts') as conn:
+                df = pd.read_sql(query, conn, params={"event_ids": _id_set_param(event_ids)})
             
-            logger.debug(f"Fetched {len(df)} events", filters=filters or {})
+            df[['Title', 'Description', 'Location']] = df[['Title', 'Description', 'Location']].fillna('')
+            logger.debug("Fetched text for %d events", len(df))
             return df
         except Exception as e:
-            logger.error(f"Error fetching events: {str(e)}")
-            return pd.DataFrame()
+            return self._recover(None, pd.DataFrame(), "Error fetching event texts", e)
+    
+    def iter_event_texts(self, min_date: Optional[datetime] = None,
+                         chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream title, description and location of public, non-cancelled events
+        
+        Args:
+            min_date: Only events starting at or after this time
+            chunk_size: Rows per chunk (defaults to database.stream_chunk_size)
+            
+        Yields:
+            DataFrames with EventId, Title, Description and Location.
+            Raises on database errors.
+        """
+        query = """
+            SELECT EventId, Title, Description, Location
+            FROM Events
+            WHERE IsCancelled = 0 AND IsPublic = 1
+        """
+        params = {}
+        if min_date:
+            query += " AND StartAt >= :min_date"
+            params['min_date'] = min_date
+        
+        for chunk in self._stream('iter_event_texts', query, params, chunk_size):
+            chunk[['Title', 'Description', 'Location']] = chunk[['Title', 'Description', 'Location']].fillna('')
+            yield chunk
+    
+    def iter_engagement(self, days_back: int = 365,
+                        user_ids: Optional[List[int]] = None,
+                        chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream attendance and favorite rows (for batch jobs over EventAttendees
+        and FavoriteEvents)
+        
+        Args:
+            days_back: Only events that started within this many days
+            user_ids: Only these users (all users when None)
+            chunk_size: Rows per chunk (defaults to database.stream_chunk_size)
+            
+        Yields:
+            DataFrames with int32 UserId, EventId and ClubId and int64 CreatedAt
+            (epoch seconds). A user may appear twice for one event (attended and
+            favorited). Raises on database errors.
+        """
+        query = """
+            SELECT x.UserId, x.EventId, e.ClubId, x.CreatedAt
+            FROM (
+                SELECT UserId, EventId, CreatedAt FROM EventAttendees
+                UNION ALL
+                SELECT UserId, EventId, CreatedAt FROM FavoriteEvents
+            ) x
+            JOIN Events e ON x.EventId = e.EventId
+            WHERE e.StartAt >= :cutoff_date
+        """
+        params = {"cutoff_date": datetime.now(timezone.utc) - timedelta(days=days_back)}
+        if user_ids is not None:
+            query += " AND x.UserId IN (SELECT CAST(value AS int) FROM OPENJSON(:user_ids))"
+            params['user_ids'] = _id_set_param(user_ids)
+        
+        for chunk in self._stream('iter_engagement', query, params, chunk_size):
+            yield pd.DataFrame({
+                'UserId': chunk['UserId'].to_numpy(dtype=np.int32),
+                'EventId': chunk['EventId'].to_numpy(dtype=np.int32),
+                'ClubId': chunk['ClubId'].to_numpy(dtype=np.int32),
+                'CreatedAt': to_epoch_seconds(chunk['CreatedAt']),
+            })
+    
+    def iter_memberships(self, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream all club memberships
+        
+        Args:
+            chunk_size: Rows per chunk (defaults to database.stream_chunk_size)
+            
+        Yields:
+            DataFrames with int32 UserId and ClubId. Raises on database errors.
+        """
+        query = "SELECT UserId, ClubId FROM ClubMembers"
+        for chunk in self._stream('iter_memberships', query, {}, chunk_size):
+            yield pd.DataFrame({
+                'UserId': chunk['UserId'].to_numpy(dtype=np.int32),
+                'ClubId': chunk['ClubId'].to_numpy(dtype=np.int32),
+            })
+    
+    def iter_club_attendance(self, days_back: int = 365,
+                             chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream attended events per user and club (the past_club_attendance
+        feature of every user at once)
+        
+        Args:
+            days_back: Only events that started within this many days
+            chunk_size: Rows per chunk (defaults to database.stream_chunk_size)
+            
+        Yields:
+            DataFrames with int32 UserId, ClubId and Attended (distinct events).
+            Raises on database errors.
+        """
+        query = """
+            SELECT ea.UserId, e.ClubId, COUNT(DISTINCT e.EventId) AS Attended
+            FROM EventAttendees ea
+            JOIN Events e ON ea.EventId = e.EventId
+            WHERE e.StartAt >= :cutoff_date
+            GROUP BY ea.UserId, e.ClubId
+        """
+        params = {"cutoff_date": datetime.now(timezone.utc) - timedelta(days=days_back)}
+        for chunk in self._stream('iter_club_attendance', query, params, chunk_size):
+            yield pd.DataFrame({
+                'UserId': chunk['UserId'].to_numpy(dtype=np.int32),
+                'ClubId': chunk['ClubId'].to_numpy(dtype=np.int32),
+                'Attended': chunk['Attended'].to_numpy(dtype=np.int32),
+            })
+    
+    def get_engaged_users_since(self, since: datetime) -> Optional[List[int]]:
+        """
+        Get users who attended or favorited an event at or after a point in time
+        
+        Args:
+            since: Lower bound on EventAttendees/FavoriteEvents CreatedAt
+            
+        Returns:
+            List of user IDs, or None if the query failed
+        """
+        query = text("""
+            SELECT UserId FROM EventAttendees WHERE CreatedAt >= :since
+            UNION
+            SELECT UserId FROM FavoriteEvents WHERE CreatedAt >= :since
+        """)
+        
+        try:
+            with self._connect('get_engaged_users_since') as conn:
+                result = conn.execute(query, {"since": since})
+                user_ids = [row[0] for row in result]
+            
+            logger.debug("%d users engaged since %s", len(user_ids), since)
+            return user_ids
+        except Exception as e:
+            return self._recover(None, None, "Error fetching recently engaged users", e)
     
     def get_user_event_history(self, user_id: int, days_back: int = 365) -> pd.DataFrame:
         """
@@ -208,7 +724,7 @@ class DatabaseConnector:
             days_back: How many days back to look
             
         Returns:
-            DataFrame with user's event interaction history
+            Compact DataFrame with EventId, ClubId, Attended and Favorited
         """
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_back)
         
@@ -216,31 +732,26 @@ class DatabaseConnector:
             SELECT DISTINCT
                 e.EventId,
                 e.ClubId,
-                e.StartAt,
                 CASE WHEN ea.UserId IS NOT NULL THEN 1 ELSE 0 END as Attended,
-                CASE WHEN fe.UserId IS NOT NULL THEN 1 ELSE 0 END as Favorited,
-                ea.CreatedAt as AttendedAt,
-                fe.CreatedAt as FavoritedAt
+                CASE WHEN fe.UserId IS NOT NULL THEN 1 ELSE 0 END as Favorited
             FROM Events e
             LEFT JOIN EventAttendees ea ON e.EventId = ea.EventId AND ea.UserId = :user_id
             LEFT JOIN FavoriteEvents fe ON e.EventId = fe.EventId AND fe.UserId = :user_id
             WHERE (ea.UserId IS NOT NULL OR fe.UserId IS NOT NULL)
               AND e.StartAt >= :cutoff_date
-            ORDER BY e.StartAt DESC
         """)
         
         try:
-            with self.engine.connect() as conn:
-                df = pd.read_sql(query, conn, params={"user_id": user_id, "cutoff_date": cutoff_date})
+            with self._connect('get_user_event_history') as conn:
+                df = compact_history(
+                    pd.read_sql(query, conn, params={"user_id": user_id, "cutoff_date": cutoff_date})
+                )
             
-            # Localize datetime columns to UTC
-            df = self._localize_datetime_columns(df, ['StartAt', 'AttendedAt', 'FavoritedAt'])
-            
-            logger.debug(f"Fetched {len(df)} history records for user {user_id}")
-            return df
+            logger.debug("Fetched %d history records for user %s", len(df), user_id)
+            return self._remember(('get_user_event_history', user_id, days_back), df)
         except Exception as e:
-            logger.error(f"Error fetching event history for user {user_id}: {str(e)}")
-            return pd.DataFrame()
+            return self._recover(('get_user_event_history', user_id, days_back), pd.DataFrame(),
+                                 f"Error fetching event history for user {user_id}", e)
     
     def get_user_favorites(self, user_id: int) -> List[int]:
         """
@@ -259,15 +770,15 @@ class DatabaseConnector:
         """)
         
         try:
-            with self.engine.connect() as conn:
+            with self._connect('get_user_favorites') as conn:
                 result = conn.execute(query, {"user_id": user_id})
                 event_ids = [row[0] for row in result]
             
-            logger.debug(f"User {user_id} has {len(event_ids)} favorited events")
-            return event_ids
+            logger.debug("User %s has %d favorited events", user_id, len(event_ids))
+            return self._remember(('get_user_favorites', user_id), event_ids)
         except Exception as e:
-            logger.error(f"Error fetching favorites for user {user_id}: {str(e)}")
-            return []
+            return self._recover(('get_user_favorites', user_id), [],
+                                 f"Error fetching favorites for user {user_id}", e)
     
     def get_club_member_counts(self) -> Dict[int, int]:
         """
@@ -283,15 +794,15 @@ class DatabaseConnector:
         """)
         
         try:
-            with self.engine.connect() as conn:
+            with self._connect('get_club_member_counts') as conn:
                 result = conn.execute(query)
                 counts = {row[0]: row[1] for row in result}
             
-            logger.debug(f"Fetched member counts for {len(counts)} clubs")
-            return counts
+            logger.debug("Fetched member counts for %d clubs", len(counts))
+            return self._remember(('get_club_member_counts',), counts)
         except Exception as e:
-            logger.error(f"Error fetching club member counts: {str(e)}")
-            return {}
+            return self._recover(('get_club_member_counts',), {},
+                                 "Error fetching club member counts", e)
     
     def get_club_event_counts(self, days_back: int = 30) -> Dict[int, int]:
         """
@@ -314,18 +825,20 @@ class DatabaseConnector:
         """)
         
         try:
-            with self.engine.connect() as conn:
+            with self._connect('get_club_event_counts') as conn:
                 result = conn.execute(query, {"cutoff_date": cutoff_date})
                 counts = {row[0]: row[1] for row in result}
             
-            logger.debug(f"Fetched event counts for {len(counts)} clubs (last {days_back} days)")
-            return counts
+            logger.debug("Fetched event counts for %d clubs (last %d days)", len(counts), days_back)
+            return self._remember(('get_club_event_counts', days_back), counts)
         except Exception as e:
-            logger.error(f"Error fetching club event counts: {str(e)}")
-            return {}
+            return self._recover(('get_club_event_counts', days_back), {},
+                                 "Error fetching club event counts", e)
     
     def close(self):
         """Close database connections"""
+        if self.pool_sizer is not None:
+            self.pool_sizer.stop()
         if self.engine:
             self.engine.dispose()
             logger.info("Database connections closed")
@@ -0,0 +1,277 @@
+"""
+Event text store for UniMeet Recommender Service
+Holds the preprocessed text of each event once per worker, with its text
+vector (when event texts are scored in a shared space), keyword tokens and
+(in minhash mode) MinHash signature encoded once, so candidate queries and
+per-request frames carry no text columns and requests do not re-vectorize or
+re-hash candidate texts.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models.db_connector import DatabaseConnector
+from models.text_model import EventTextFeatures, stack_rows
+from utils.logger import logger
+from utils.metrics import record_cache_lookup
+
+if TYPE_CHECKING:
+    from models.feature_engine import FeatureEngine
+
+# Per-entry overhead beyond the string and arrays (entry object, array headers,
+# key int, ordered dict links)
+_ENTRY_OVERHEAD = 384
+
+_NO_COLUMNS = np.empty(0, dtype=np.int32)
+_NO_VALUES = np.empty(0, dtype=np.float32)
+_NO_SIGNATURE = np.empty(0, dtype=np.uint64)
+
+
+class _EventText:
+    """
+    Text of one event, its keyword token columns and MinHash signature, and its
+    cached vector row (columns and values)
+    """
+
+    __slots__ = ('event_id', 'text', 'token_columns', 'signature', 'vector_indices', 'vector_data',
+                 'vector_version', 'nbytes')
+
+    def __init__(self, event_id: int, text: str, token_columns: np.ndarray = _NO_COLUMNS,
+                 signature: np.ndarray = _NO_SIGNATURE):
+        self.event_id = event_id
+        self.text = text
+        # Copies, so an entry does not keep its whole load batch alive
+        self.token_columns = np.array(token_columns, dtype=np.int32)
+        self.signature = np.array(signature, dtype=np.uint64)
+        self.vector_indices = _NO_COLUMNS
+        self.vector_data = _NO_VALUES
+        self.vector_version: Optional[int] = None
+        self.nbytes = self._size()
+
+    def set_vector(self, indices: np.ndarray, data: np.ndarray, version: int):
+        self.vector_indices = np.array(indices, dtype=np.int32)
+        self.vector_data = np.array(data, dtype=np.float32)
+        self.vector_version = version
+        self.nbytes = self._size()
+
+    def _size(self) -> int:
+        return (sys.getsizeof(self.text) + self.token_columns.nbytes + self.signature.nbytes +
+                self.vector_indices.nbytes + self.vector_data.nbytes + _ENTRY_OVERHEAD)
+
+
+_EMPTY = _EventText(-1, '')
+
+
+class EventTextStore:
+    """Preprocessed event text and text vector keyed by EventId, fetched on first use"""
+
+    def __init__(self,
+                 db_connector: DatabaseConnector,
+                 feature_engine: 'FeatureEngine',
+                 max_events: int = 50000,
+                 max_bytes: Optional[int] = None,
+                 reserved_bytes: Optional[Callable[[], int]] = None):
+        """
+        Initialize event text store
+
+        Args:
+            db_connector: Database connector instance (get_event_texts)
+            feature_engine: Builds the preprocessed texts (build_event_text),
+                counts them towards document frequencies (observe_event_texts),
+                encodes their vectors (event_vector_rows), keyword tokens
+                (keyword_overlap.token_rows) and, in minhash mode, their
+                signatures (keyword_overlap.signatures)
+            max_events: Entries kept; least recently used events are evicted
+            max_bytes: Optional memory budget shared with the other text components
+            reserved_bytes: Bytes those components hold; the store is trimmed to
+                what they leave of max_bytes whenever it loads or re-encodes entries
+        """
+        self.db = db_connector
+        self.feature_engine = feature_engine
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.reserved_bytes = reserved_bytes
+        self._bytes = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated memory held by stored texts and vectors"""
+        return self._bytes
+
+    def byte_limit(self) -> Optional[int]:
+        """Bytes entries may hold: max_bytes less what the other text components reserve"""
+        if self.max_bytes is None:
+            return None
+        reserved = self.reserved_bytes() if self.reserved_bytes is not None else 0
+        if reserved > self.max_bytes:
+            logger.warning("Text models exceed the memory budget before event texts",
+                           reserved_bytes=reserved, budget_bytes=self.max_bytes, sample_key='text_budget')
+        return max(self.max_bytes - reserved, 0)
+
+    def trim(self):
+        """Evict least recently used entries over the current byte limit"""
+        limit = self.byte_limit()
+        with self._lock:
+            self._evict(limit)
+
+    def texts(self, event_ids: Sequence[int]) -> List[str]:
+        """
+        Get preprocessed text for events, in the given order
+
+        Missing events are fetched with one query; events the database does not
+        return get an empty text.
+        """
+        return [entry.text for entry in self._entries_for(event_ids)]
+
+    def features(self, event_ids: Sequence[int]) -> EventTextFeatures:
+        """
+        Texts, text vectors, keyword token rows and MinHash signatures of events,
+        in the given order
+
+        Token rows and signatures are hashed when a text is loaded. Vectors are encoded then too
+        and re-encoded only after the vector space changed (a TF-IDF refit); in
+        hashing mode the cached counts get the current IDF applied here, in one
+        pass over the batch.
+        """
+        entries = self._entries_for(event_ids)
+        engine = self.feature_engine
+        texts = [entry.text for entry in entries]
+        token_columns = [entry.token_columns for entry in entries]
+        tokens = stack_rows(token_columns, None, engine.keyword_overlap.n_features)
+        cardinality = np.fromiter((len(columns) for columns in token_columns), dtype=np.int64,
+                                  count=len(token_columns))
+        signatures = self._signatures(entries)
+        version = engine.event_vector_version
+        if version is None:
+            return EventTextFeatures(texts, None, tokens, cardinality, signatures)
+
+        stale = [entry for entry in entries if entry.vector_version != version and entry is not _EMPTY]
+        if stale:
+            self._encode(stale, version)
+        rows = stack_rows([entry.vector_indices for entry in entries],
+                          [entry.vector_data for entry in entries], engine.event_vector_features)
+        return EventTextFeatures(texts, engine.weigh_event_vectors(rows), tokens, cardinality, signatures)
+
+    def _signatures(self, entries: List[_EventText]) -> Optional[np.ndarray]:
+        """Stacked cached signatures (minhash mode), events without text get the empty-row signature"""
+        overlap = self.feature_engine.keyword_overlap
+        if overlap.mode != 'minhash':
+            return None
+        signatures = np.full((len(entries), overlap.permutations), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for i, entry in enumerate(entries):
+            if len(entry.signature):
+                signatures[i] = entry.signature
+        return signatures
+
+    def _entries_for(self, event_ids: Sequence[int]) -> List[_EventText]:
+        event_ids = [int(event_id) for event_id in event_ids]
+        with self._lock:
+            missing = [event_id for event_id in event_ids if event_id not in self._entries]
+        record_cache_lookup('event_text', hit=not missing)
+
+        fetched = self._load(missing) if missing else {}
+        limit = self.byte_limit() if fetched else None
+        with self._lock:
+            self._store(fetched)
+            result = []
+            for event_id in event_ids:
+                entry = self._entries.get(event_id)
+                if entry is not None:
+                    self._entries.move_to_end(event_id)
+                result.append(entry if entry is not None else fetched.get(event_id, _EMPTY))
+            if fetched:
+                self._evict(limit)
+        return result
+
+    def _encode(self, entries: List[_EventText], version: int):
+        """Encode the vectors of entries in one batch, keeping the byte count of stored ones"""
+        rows = self.feature_engine.event_vector_rows([entry.text for entry in entries])
+        limit = self.byte_limit()
+        with self._lock:
+            for i, entry in enumerate(entries):
+                start, end = rows.indptr[i], rows.indptr[i + 1]
+                before = entry.nbytes
+                entry.set_vector(rows.indices[start:end], rows.data[start:end], version)
+                if self._entries.get(entry.event_id) is entry:
+                    self._bytes += entry.nbytes - before
+            self._evict(limit)
+
+    def preload(self, min_date: Optional[datetime] = None) -> int:
+        """
+        Fill the store from a streaming read of event texts
+
+        Chunks are preprocessed, encoded and stored one at a time, so memory stays
+        bounded by max_events however many events the table holds.
+
+        Args:
+            min_date: Only events starting at or after this time
+
+        Returns:
+            Number of events loaded
+        """
+        loaded = 0
+        for chunk in self.db.iter_event_texts(min_date=min_date):
+            entries = self._build(chunk)
+            limit = self.byte_limit()
+            with self._lock:
+                self._store(entries)
+                self._evict(limit)
+            loaded += len(entries)
+        logger.info("Preloaded text for %d events", loaded, stored=len(self._entries))
+        return loaded
+
+    def _store(self, entries: Dict[int, _EventText]):
+        """Insert entries, keeping the byte count (lock held)"""
+        for event_id, entry in entries.items():
+            previous = self._entries.get(event_id)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[event_id] = entry
+            self._bytes += entry.nbytes
+
+    def _evict(self, limit: Optional[int]):
+        """Drop least recently used entries over max_events or the byte limit (lock held)"""
+        while self._entries and (len(self._entries) > self.max_events or
+                                 (limit is not None and self._bytes > limit)):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+
+    def _load(self, event_ids: List[int]) -> Dict[int, _EventText]:
+        df = self.db.get_event_texts(event_ids)
+        if df.empty:
+            logger.warning("No text returned for %d events", len(event_ids))
+            return {}
+        return self._build(df)
+
+    def _build(self, df) -> Dict[int, _EventText]:
+        engine = self.feature_engine
+        event_ids = [int(event_id) for event_id in df['EventId'].tolist()]
+        texts = [
+            engine.build_event_text(title, description, location)
+            for title, description, location in zip(
+                df['Title'].tolist(), df['Description'].tolist(), df['Location'].tolist()
+            )
+        ]
+        tokens, _ = engine.keyword_overlap.token_rows(texts)
+        signatures = (engine.keyword_overlap.signatures(tokens) if engine.keyword_overlap.mode == 'minhash'
+                      else [_NO_SIGNATURE] * len(texts))
+        entries = {
+            event_id: _EventText(event_id, text, tokens.indices[tokens.indptr[i]:tokens.indptr[i + 1]],
+                                 signatures[i])
+            for i, (event_id, text) in enumerate(zip(event_ids, texts))
+        }
+        if entries:
+            engine.observe_event_texts(texts)
+            version = engine.event_vector_version
+            if version is not None:
+                self._encode(list(entries.values()), version)
+        return entries
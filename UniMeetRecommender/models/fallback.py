@@ -0,0 +1,174 @@
+"""
+Precomputed fallback ranking for UniMeet Recommender Service
+Cold-start users (no followed clubs) and error paths are served from an
+in-memory ranking of upcoming, popular events that is refreshed periodically.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from models.db_connector import DatabaseConnector
+from models.feature_engine import FeatureEngine
+from utils.logger import logger
+from utils.metrics import metrics, record_cache_lookup
+from utils.scheduler import scheduler
+
+
+FALLBACK_REFRESH_LATENCY = metrics.histogram(
+    'recommender_fallback_refresh_duration_seconds', 'Time to rebuild the fallback ranking'
+)
+
+
+_EMPTY_RANKING = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+
+class FallbackRanker:
+    """In-memory ranking of upcoming public events by recency and club popularity"""
+
+    def __init__(self, db_connector: DatabaseConnector, feature_engine: FeatureEngine, config: dict):
+        """
+        Initialize fallback ranker
+
+        Args:
+            db_connector: Database connector instance
+            feature_engine: Feature engine used for temporal and popularity scores
+            config: Configuration dictionary from config.json
+        """
+        self.db = db_connector
+        self.feature_engine = feature_engine
+        ranking_config = config.get('ranking_settings', {})
+        self.refresh_seconds = ranking_config.get('fallback_refresh_seconds', 300)
+        self.popularity_weight = ranking_config.get('fallback_popularity_weight', 0.5)
+
+        # (event ids, start timestamps, scores), best first; replaced as a whole
+        # on refresh, so readers never pair arrays of two rankings
+        self._ranking: Tuple[np.ndarray, np.ndarray, np.ndarray] = _EMPTY_RANKING
+        self._built_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether a ranking has been built"""
+        return self._built_at is not None
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        return time.monotonic() - self._built_at if self._built_at is not None else None
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the ranking from the database
+
+        Returns:
+            True if the ranking was rebuilt, False if another refresh was running or it failed
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            with FALLBACK_REFRESH_LATENCY.time():
+                events_df = self.db.get_all_events({'min_date': datetime.now(timezone.utc)})
+                if events_df.empty and len(self._ranking[0]):
+                    # Most likely the database is unavailable; past events in the old
+                    # ranking are filtered out by top() anyway
+                    logger.warning("Fallback refresh returned no events, keeping previous ranking")
+                    self._built_at = time.monotonic()
+                    return False
+                if events_df.empty:
+                    ranked = _EMPTY_RANKING
+                else:
+                    ranked = self._rank(
+                        events_df,
+                        self.db.get_club_member_counts(),
+                        self.db.get_club_event_counts()
+                    )
+            self._ranking = ranked
+            self._built_at = time.monotonic()
+            logger.debug("Fallback ranking refreshed with %d events", len(ranked[0]))
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing fallback ranking: {str(e)}", exc_info=True)
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    def _rank(self,
+              events_df: pd.DataFrame,
+              club_member_counts: Dict[int, int],
+              club_event_counts: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Score events by temporal score and club popularity and sort best first"""
+        temporal = self.feature_engine.calculate_temporal_features(events_df)
+        popularity = self.feature_engine.calculate_popularity_features(
+            events_df, club_member_counts, club_event_counts
+        )
+        scores = (
+            (1 - self.popularity_weight) * temporal['temporal_score'].to_numpy(dtype=np.float64) +
+            self.popularity_weight * popularity['popularity_score'].to_numpy(dtype=np.float64)
+        )
+        start_ts = events_df['StartAt'].to_numpy(dtype=np.int64)
+
+        # Stable sort keeps StartAt order (the query order) among equal scores
+        order = np.argsort(-scores, kind='stable')
+        return (
+            events_df['EventId'].to_numpy(dtype=np.int64)[order],
+            start_ts[order],
+            scores[order]
+        )
+
+    def _refresh_in_background(self):
+        if not self._refresh_lock.locked():
+            threading.Thread(target=scheduler.run, args=('background', self.refresh),
+                             name='fallback-refresh', daemon=True).start()
+
+    def _ensure_fresh(self, build: bool = True):
+        """Build synchronously on first use; afterwards refresh in the background when stale"""
+        if self._built_at is None:
+            record_cache_lookup('fallback', hit=False)
+            if build:
+                self.refresh()
+            else:
+                self._refresh_in_background()
+            return
+        stale = time.monotonic() - self._built_at > self.refresh_seconds
+        record_cache_lookup('fallback', hit=not stale)
+        if stale:
+            self._refresh_in_background()
+
+    def top(self, limit: int, filters: Optional[Dict] = None,
+            build: bool = True) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        Get the best fallback events
+
+        Args:
+            limit: Maximum number of events
+            filters: Optional filters (min_date, max_date, exclude_event_ids), applied in memory
+            build: Build the ranking synchronously if none exists yet; when False an
+                empty result is returned and the ranking is built in the background
+
+        Returns:
+            Tuple of ([(event_id, score), ...], number of ranked events)
+        """
+        self._ensure_fresh(build)
+        # One reference so a concurrent refresh cannot mix two rankings
+        event_ids, start_ts, scores = self._ranking
+
+        filters = filters or {}
+        min_date = filters.get('min_date') or datetime.now(timezone.utc)
+        min_ts = int(min_date.timestamp())
+        max_ts = int(filters['max_date'].timestamp()) if filters.get('max_date') else None
+        excluded = set(filters.get('exclude_event_ids') or ())
+
+        selected = []
+        for i in range(len(event_ids)):
+            ts = start_ts[i]
+            if ts < min_ts or (max_ts is not None and ts > max_ts):
+                continue
+            event_id = int(event_ids[i])
+            if event_id in excluded:
+                continue
+            selected.append((event_id, float(scores[i])))
+            if len(selected) >= limit:
+                break
+
+        return selected, len(event_ids)
@@ -2,14 +2,44 @@
 Feature engineering module for UniMeet Recommender Service
 Extracts and computes features for recommendation scoring
 """
-import re
-from typing import List, Dict, Tuple, Optional
+from typing import TYPE_CHECKING, Callable, List, Dict, Tuple, Optional, Sequence
 from datetime import datetime, timedelta, timezone
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from models.text_model import EventTextFeatures, HashingTextModel, KeywordOverlap
 from utils.logger import logger
+from utils.text_normalizer import configured_stopwords, normalize_text
+
+if TYPE_CHECKING:
+    from models.profile_store import UserProfile
+
+
+def map_by_club(club_ids, values: Dict, default: float = 0.0) -> np.ndarray:
+    """
+    Map per-club values onto events, looking each distinct club up once
+    
+    Args:
+        club_ids: ClubId column (Series or array) of an events DataFrame
+        values: Dict mapping ClubId to a value
+        default: Value for clubs missing from `values` (and null ClubIds)
+        
+    Returns:
+        Float array aligned with club_ids
+    """
+    codes, uniques = pd.factorize(club_ids)
+    lookup = np.array([values.get(club_id, default) for club_id in uniques] + [default], dtype=np.float64)
+    return lookup[codes]
+
+
+def sparse_nbytes(matrix: Optional[sparse.spmatrix]) -> int:
+    """Memory held by a CSR/CSC matrix (data, indices and indptr)"""
+    if matrix is None:
+        return 0
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
 
 
 class FeatureEngine:
@@ -26,42 +56,51 @@ class FeatureEngine:
         self.content_config = config.get('content_settings', {})
         self.temporal_config = config.get('temporal_settings', {})
         
-        # Initialize TF-IDF vectorizer
+        # Initialize TF-IDF vectorizer; in 'hashing' text mode a stateless hashing
+        # model with running IDF replaces the fitted vocabulary
         self.vectorizer = self._create_vectorizer()
+        self.text_mode = self.content_config.get('text_mode', 'tfidf')
+        self.text_model = HashingTextModel(self.content_config) if self.text_mode == 'hashing' else None
+        self.keyword_overlap = KeywordOverlap(self.content_config)
+        self.text_cosine_weight = float(self.content_config.get('text_cosine_weight', 0.7))
+        # Event text cosine in TF-IDF mode: 'pairwise' fits a vectorizer on each
+        # (user, event) pair; 'shared_space' scores event vectors cached in the
+        # fitted club vocabulary with one sparse product (faster, ranks differently)
+        self.text_similarity = self.content_config.get('text_similarity', 'pairwise')
         self.club_vectors = None
         self.club_ids = None
+        # Bumped on every successful fit, so cached user profiles know to rebuild
+        self.vectors_version = 0
         
         logger.info("Feature engine initialized")
     
     def _create_vectorizer(self) -> TfidfVectorizer:
         """Create TF-IDF vectorizer with Turkish stopwords"""
-        stopwords = None
-        if self.content_config.get('use_turkish_stopwords', True):
-            stopwords = self.content_config.get('turkish_stopwords', [])
-        
         vectorizer = TfidfVectorizer(
             max_features=self.content_config.get('tfidf_max_features', 200),
-            stop_words=stopwords,
+            stop_words=configured_stopwords(self.content_config),
             ngram_range=(1, 2),  # Unigrams and bigrams
             min_df=1,
-            lowercase=True,
-            strip_accents='unicode'
+            lowercase=False,  # Documents arrive normalized (normalize_text)
+            strip_accents=None,
+            dtype=np.float32  # Rows are L2-normalized, so cosine is a dot product
         )
         
         return vectorizer
     
-    def _preprocess_text(self, text: str) -> str:
-        """Preprocess text for TF-IDF"""
+    def _preprocess_text(self, text) -> str:
+        """Normalize one text field for TF-IDF (Turkish-aware, see normalize_text)"""
         if pd.isna(text) or not text:
             return ""
-        
-        # Convert to lowercase
-        text = str(text).lower()
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return normalize_text(str(text))
+    
+    def _join_fields(self, *fields) -> str:
+        """Normalize fields one by one (repeated fields hit the cache) and join them"""
+        return ' '.join(text for text in map(self._preprocess_text, fields) if text)
+    
+    def build_event_text(self, title, description, location) -> str:
+        """Preprocessed event text for content matching (title gets double weight)"""
+        return self._join_fields(title, title, description, location)
     
     def fit_club_vectors(self, clubs_df: pd.DataFrame):
         """
@@ -76,37 +115,147 @@ class FeatureEngine:
         
         # Combine text fields - Name gets more weight (repeated 2x)
         clubs_df = clubs_df.copy()
-        clubs_df['combined_text'] = (
-            clubs_df['Name'].fillna('') + ' ' +
-            clubs_df['Name'].fillna('') + ' ' +
-            clubs_df['Description'].fillna('') + ' ' +
-            clubs_df['Purpose'].fillna('')
-        ).apply(self._preprocess_text)
+        clubs_df['combined_text'] = [
+            self._join_fields(name, name, description, purpose)
+            for name, description, purpose in zip(
+                clubs_df['Name'].tolist(), clubs_df['Description'].tolist(), clubs_df['Purpose'].tolist()
+            )
+        ]
         
         # Fit and transform
         try:
-            self.club_vectors = self.vectorizer.fit_transform(clubs_df['combined_text'])
+            if self.text_model is not None:
+                # No fit step: club texts only count towards document frequencies
+                # (once per engine, so refits do not double count them)
+                if self.vectors_version == 0:
+                    self.text_model.partial_fit(clubs_df['combined_text'].tolist())
+                self.club_vectors = self.text_model.transform(clubs_df['combined_text'].tolist())
+            else:
+                # Fitted aside and swapped in, so concurrent requests never see
+                # a half-fitted vocabulary
+                vectorizer = self._create_vectorizer()
+                self.club_vectors = vectorizer.fit_transform(clubs_df['combined_text'])
+                self.vectorizer = vectorizer
             self.club_ids = clubs_df['ClubId'].tolist()
+            self.vectors_version += 1
             
-            logger.info(f"Fitted TF-IDF vectors for {len(self.club_ids)} clubs",
-                       vocab_size=len(self.vectorizer.vocabulary_))
+            if self.text_model is not None:
+                logger.info(f"Hashed text vectors for {len(self.club_ids)} clubs",
+                           n_features=self.text_model.n_features)
+            else:
+                logger.info(f"Fitted TF-IDF vectors for {len(self.club_ids)} clubs",
+                           vocab_size=len(self.vectorizer.vocabulary_))
         except Exception as e:
             logger.error(f"Error fitting club vectors: {str(e)}", exc_info=True)
             self.club_vectors = None
             self.club_ids = None
     
+    def text_vectors(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        Vectorize preprocessed texts in the club vector space (L2-normalized rows)
+        
+        Requires fitted club vectors in TF-IDF mode; hashing mode has no fit step.
+        """
+        if self.text_model is not None:
+            return self.text_model.transform(list(texts))
+        return self.vectorizer.transform(list(texts))
+    
+    @property
+    def event_vector_version(self) -> Optional[int]:
+        """
+        Version of the space event_vector_rows encodes into (EventTextStore
+        re-encodes rows cached under another version), or None while TF-IDF
+        mode has no fitted vocabulary or scores text pairwise (no event vectors)
+        """
+        if self.text_model is not None:
+            return 0  # Raw hashed counts never go stale, IDF is applied per request
+        if self.text_similarity == 'pairwise':
+            return None
+        return self.vectors_version if self.club_vectors is not None else None
+    
+    @property
+    def event_vector_features(self) -> int:
+        """Columns of event vector rows"""
+        if self.text_model is not None:
+            return self.text_model.n_features
+        return len(self.vectorizer.vocabulary_)
+    
+    def event_vector_rows(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        Rows cached per event: TF-IDF vectors, or hashed term counts in hashing
+        mode (weighted by weigh_event_vectors with the IDF current at request time)
+        """
+        if self.text_model is not None:
+            return self.text_model.hash(list(texts))
+        return self.vectorizer.transform(list(texts))
+    
+    def weigh_event_vectors(self, rows: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Turn stacked event_vector_rows into L2-normalized text vectors (in place)"""
+        if self.text_model is not None:
+            return self.text_model.weigh(rows)
+        return rows
+    
+    def event_text_features(self, texts: Sequence[str]) -> EventTextFeatures:
+        """Text features of events without the EventTextStore cache"""
+        texts = list(texts)
+        vectors = None
+        if self.event_vector_version is not None:
+            vectors = self.weigh_event_vectors(self.event_vector_rows(texts))
+        tokens, cardinality = self.keyword_overlap.token_rows(texts)
+        return EventTextFeatures(texts, vectors, tokens, cardinality)
+    
+    def user_club_vector(self, user_club_ids: List[int]) -> Optional[sparse.csr_matrix]:
+        """
+        Average TF-IDF vector of the user's clubs, L2-normalized
+        
+        Returns:
+            Sparse float32 1 x features row (hashing mode has 2^18 columns, so it
+            is never densified), or None when no club has a fitted vector
+        """
+        if self.club_vectors is None or self.club_ids is None:
+            return None
+        club_positions = {cid: i for i, cid in enumerate(self.club_ids)}
+        user_club_indices = [club_positions[cid] for cid in user_club_ids if cid in club_positions]
+        if not user_club_indices:
+            return None
+        weights = sparse.csr_matrix(np.full((1, len(user_club_indices)), 1 / len(user_club_indices),
+                                            dtype=np.float32))
+        return normalize((weights @ self.club_vectors[user_club_indices]).tocsr(), norm='l2', copy=False)
+    
+    def build_interest_text(self, user_clubs_df: pd.DataFrame) -> str:
+        """Preprocessed interest text from the user's clubs (name, description, purpose)"""
+        return self._join_fields(*(
+            field
+            for fields in zip(user_clubs_df['Name'].tolist(), user_clubs_df['Description'].tolist(),
+                              user_clubs_df['Purpose'].tolist())
+            for field in fields
+        ))
+    
     def calculate_content_similarity(self, 
                                      user_club_ids: List[int],
                                      events_df: pd.DataFrame,
-                                     clubs_df: pd.DataFrame) -> pd.DataFrame:
+                                     clubs_df: pd.DataFrame,
+                                     include_text: bool = True,
+                                     text_features: Optional[EventTextFeatures] = None,
+                                     profile: Optional['UserProfile'] = None,
+                                     offload: Optional[Callable] = None) -> pd.DataFrame:
         """
         Calculate content similarity between user's clubs and events
         Now analyzes: club content + event title + event description
         
         Args:
             user_club_ids: List of club IDs the user follows
-            events_df: DataFrame with events (Title, Description, Location, ClubId)
+            events_df: DataFrame with events (EventId, ClubId)
             clubs_df: DataFrame with all clubs
+            include_text: Match event title/description against user interests;
+                when False only club-to-club similarity is computed (cheaper)
+            text_features: Text features of the events, aligned with events_df
+                (EventTextStore.features); built from Title/Description/Location
+                columns when omitted
+            profile: Cached UserProfile for these clubs; its club vector and
+                interest text are used instead of rebuilding them
+            offload: Computes content_scores elsewhere (ScoringPool.content_scores);
+                returns None to have it computed in this thread
             
         Returns:
             DataFrame with EventId, content_similarity, and title_match_score columns
@@ -114,6 +263,8 @@ class FeatureEngine:
         if events_df.empty or not user_club_ids:
             return pd.DataFrame({'EventId': [], 'content_similarity': [], 'title_match_score': []})
         
+        event_ids = events_df['EventId'].to_numpy()
+        
         # Ensure club vectors are fitted
         if self.club_vectors is None or self.club_ids is None:
             self.fit_club_vectors(clubs_df)
@@ -121,91 +272,140 @@ class FeatureEngine:
         if self.club_vectors is None:
             logger.warning("Club vectors not available, returning zero similarity")
             return pd.DataFrame({
-                'EventId': events_df['EventId'],
+                'EventId': event_ids,
                 'content_similarity': 0.0,
                 'title_match_score': 0.0
             })
         
-        # Get user's club combined text for keyword extraction
-        user_clubs_df = clubs_df[clubs_df['ClubId'].isin(user_club_ids)]
-        user_interests_text = ' '.join(
-            (user_clubs_df['Name'].fillna('') + ' ' +
-             user_clubs_df['Description'].fillna('') + ' ' +
-             user_clubs_df['Purpose'].fillna('')).tolist()
-        )
-        user_interests_text = self._preprocess_text(user_interests_text)
-        
-        # Get indices of user's clubs
-        user_club_indices = [self.club_ids.index(cid) for cid in user_club_ids 
-                           if cid in self.club_ids]
+        # User club vector (average if multiple)
+        user_vector_avg = profile.club_vector if profile is not None else self.user_club_vector(user_club_ids)
         
-        if not user_club_indices:
+        if user_vector_avg is None:
             return pd.DataFrame({
-                'EventId': events_df['EventId'],
+                'EventId': event_ids,
                 'content_similarity': 0.0,
                 'title_match_score': 0.0
             })
         
-        # Get user club vectors (average if multiple)
-        user_vectors = self.club_vectors[user_club_indices]
-        user_vector_avg = np.asarray(user_vectors.mean(axis=0))
-        
-        # Calculate similarity for each event
-        similarities = []
-        title_scores = []
-        
-        for _, event in events_df.iterrows():
-            # Part 1: Club-to-Club similarity
-            event_club_id = event['ClubId']
-            club_sim = 0.0
-            
-            if event_club_id in self.club_ids:
-                event_club_idx = self.club_ids.index(event_club_id)
-                event_vector = self.club_vectors[event_club_idx]
-                club_sim = cosine_similarity(user_vector_avg, event_vector)[0][0]
-                club_sim = max(0.0, club_sim)
-            
-            # Part 2: Event content similarity (title + description)
-            event_text = (
-                str(event.get('Title', '')) + ' ' +
-                str(event.get('Title', '')) + ' ' +  # Title gets more weight
-                str(event.get('Description', '')) + ' ' +
-                str(event.get('Location', ''))
-            )
-            event_text = self._preprocess_text(event_text)
-            
-            # Calculate keyword overlap and semantic similarity
-            title_score = self._calculate_text_similarity(user_interests_text, event_text)
-            
-            # Combined similarity: 60% club similarity + 40% event content
-            combined_sim = club_sim * 0.6 + title_score * 0.4
+        user_interests_text = ''
+        if include_text:
+            if profile is not None:
+                user_interests_text = profile.interest_text
+            else:
+                user_interests_text = self.build_interest_text(clubs_df[clubs_df['ClubId'].isin(user_club_ids)])
             
-            similarities.append(combined_sim)
-            title_scores.append(title_score)
+            if text_features is None:
+                text_features = self.event_text_features(
+                    self.build_event_text(title, description, location)
+                    for title, description, location in zip(
+                        events_df['Title'].tolist(), events_df['Description'].tolist(),
+                        events_df['Location'].tolist()
+                    )
+                )
+            elif text_features.vectors is None and self.event_vector_version is not None:
+                # Fetched before the first fit above
+                text_features = self.event_text_features(text_features.texts)
+        else:
+            text_features = None
+        
+        event_club_ids = events_df['ClubId'].to_numpy()
+        scores = None
+        if offload is not None:
+            scores = offload(self, user_vector_avg, user_interests_text, event_club_ids, text_features,
+                             include_text)
+        if scores is None:
+            scores = self.content_scores(user_vector_avg, user_interests_text, event_club_ids, text_features,
+                                         include_text)
+        similarities, title_scores = scores
         
         result_df = pd.DataFrame({
-            'EventId': events_df['EventId'],
+            'EventId': event_ids,
             'content_similarity': similarities,
             'title_match_score': title_scores
         })
         
-        logger.debug(f"Calculated enhanced content similarity for {len(result_df)} events",
-                    avg_similarity=np.mean(similarities),
-                    avg_title_match=np.mean(title_scores))
+        if logger.is_enabled('DEBUG'):
+            logger.debug("Calculated enhanced content similarity for %d events", len(result_df),
+                         avg_similarity=float(np.mean(similarities)),
+                         avg_title_match=float(np.mean(title_scores)))
         
         return result_df
     
-    def _calculate_text_similarity(self, text1: str, text2: str) -> float:
+    def content_scores(self,
+                       user_vector: sparse.csr_matrix,
+                       interest_text: str,
+                       event_club_ids: np.ndarray,
+                       text_features: Optional[EventTextFeatures],
+                       include_text: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Content similarity and title match of events against a user (club
+        vectors must be fitted)
+        
+        Args:
+            user_vector: The user's averaged club vector (user_club_vector)
+            interest_text: Preprocessed interest text (ignored without include_text)
+            event_club_ids: ClubId of each event
+            text_features: Text features aligned with event_club_ids (ignored
+                without include_text)
+            include_text: Match event texts against the interest text
+            
+        Returns:
+            (content_similarity, title_match_score) arrays aligned with event_club_ids
+        """
+        # Part 1: Club-to-Club similarity, computed once per club and mapped onto events
+        # (club and user rows are L2-normalized, so cosine is a sparse dot product)
+        club_sims = np.maximum((self.club_vectors @ user_vector.T).toarray().ravel(), 0.0)
+        club_sim = map_by_club(event_club_ids, dict(zip(self.club_ids, club_sims)))
+        
+        if not include_text:
+            return club_sim * 0.6, np.zeros(len(club_sim))
+        
+        # Part 2: Event content similarity (title + description)
+        title_scores = self._calculate_text_similarity(interest_text, text_features)
+        
+        # Combined similarity: 60% club similarity + 40% event content
+        return club_sim * 0.6 + title_scores * 0.4, title_scores
+    
+    def _calculate_text_similarity(self, user_text: str, features: EventTextFeatures) -> np.ndarray:
         """
-        Calculate similarity between two text strings using TF-IDF
+        Calculate similarity between the user's interest text and each event text
+        
+        Cosine similarity (text_cosine_weight, default 70%) blended with keyword
+        overlap (the rest). With event vectors (hashing mode, or TF-IDF mode with
+        text_similarity 'shared_space') event and user vectors share one
+        L2-normalized space, so cosine is one sparse product; otherwise each pair
+        gets its own TF-IDF vectorizer.
         
         Args:
-            text1: First text (e.g., user interests)
-            text2: Second text (e.g., event description)
+            user_text: User interests text
+            features: Event text features (texts and vectors)
             
         Returns:
-            Similarity score between 0 and 1
+            Similarity scores between 0 and 1, aligned with features
         """
+        if not user_text or not len(features):
+            return np.zeros(len(features))
+        
+        if features.vectors is not None:
+            user_vector = self.text_vectors([user_text])
+            event_vectors = features.vectors
+            if event_vectors.shape[1] != user_vector.shape[1]:
+                # Encoded before a concurrent refit changed the vocabulary
+                event_vectors = self.event_text_features(features.texts).vectors
+            cosine = (event_vectors @ user_vector.T).toarray().ravel()
+        elif self.text_model is None and self.text_similarity == 'pairwise':
+            cosine = np.array([self._pair_cosine(user_text, event_text) for event_text in features.texts],
+                              dtype=np.float64)
+        else:
+            cosine = np.zeros(len(features))
+        
+        overlap = self.keyword_overlap.row_scores(user_text, features.tokens, features.cardinality,
+                                                  features.signatures)
+        combined = cosine * self.text_cosine_weight + overlap * (1.0 - self.text_cosine_weight)
+        return np.clip(combined, 0.0, 1.0)
+    
+    def _pair_cosine(self, text1: str, text2: str) -> float:
+        """TF-IDF cosine similarity of two texts, with a vectorizer fitted on just the pair"""
         if not text1 or not text2:
             return 0.0
         
@@ -214,36 +414,41 @@ class FeatureEngine:
             temp_vectorizer = TfidfVectorizer(
                 max_features=100,
                 ngram_range=(1, 2),
-                lowercase=True,
-                strip_accents='unicode'
+                lowercase=False,
+                strip_accents=None
             )
             
             vectors = temp_vectorizer.fit_transform([text1, text2])
-            similarity = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
-            
-            # Also check for keyword overlap
-            words1 = set(text1.split())
-            words2 = set(text2.split())
-            
-            if words1 and words2:
-                jaccard = len(words1 & words2) / len(words1 | words2)
-            else:
-                jaccard = 0.0
-            
-            # Combine cosine similarity (70%) and keyword overlap (30%)
-            combined = similarity * 0.7 + jaccard * 0.3
-            return max(0.0, min(1.0, combined))
+            return float(cosine_similarity(vectors[0:1], vectors[1:2])[0][0])
             
         except Exception as e:
             logger.warning(f"Error calculating text similarity: {str(e)}")
             return 0.0
     
+    def memory_report(self) -> Dict[str, int]:
+        """Bytes held per text model component"""
+        report = {'club_vectors': sparse_nbytes(self.club_vectors)}
+        if self.text_model is not None:
+            report['hashing_idf'] = self.text_model.nbytes
+        else:
+            vocabulary = getattr(self.vectorizer, 'vocabulary_', None) or {}
+            idf = getattr(self.vectorizer, 'idf_', None)
+            # Rough: key string plus dict entry per term
+            report['vocabulary'] = (sum(len(term) + 120 for term in vocabulary) +
+                                    (idf.nbytes if idf is not None else 0))
+        return report
+    
+    def observe_event_texts(self, event_texts: Sequence[str]):
+        """Count newly loaded event texts towards document frequencies (hashing mode)"""
+        if self.text_model is not None and len(event_texts):
+            self.text_model.partial_fit(list(event_texts))
+    
     def calculate_temporal_features(self, events_df: pd.DataFrame) -> pd.DataFrame:
         """
         Calculate temporal features for events
         
         Args:
-            events_df: DataFrame with events (must have StartAt column)
+            events_df: DataFrame with events (StartAt as epoch seconds)
             
         Returns:
             DataFrame with EventId and temporal features
@@ -255,35 +460,29 @@ class FeatureEngine:
                 'temporal_score': []
             })
         
-        now = datetime.now(timezone.utc)
-        
         # Calculate days until event
-        events_df = events_df.copy()
-        events_df['days_until_event'] = events_df['StartAt'].apply(
-            lambda x: (x - now).total_seconds() / 86400 if pd.notna(x) else 999
-        )
+        now = datetime.now(timezone.utc).timestamp()
+        days_until = (events_df['StartAt'].to_numpy(dtype=np.float64) - now) / 86400
         
         # Temporal score: higher for upcoming events, decay over time
         decay_days = self.temporal_config.get('decay_days', 30)
         max_days_ahead = self.temporal_config.get('max_days_ahead', 90)
         recency_weight = self.temporal_config.get('recency_weight', 0.7)
         
-        def temporal_score_fn(days_until):
-            if days_until < 0:  # Past events
-                return 0.0
-            elif days_until > max_days_ahead:  # Too far in future
-                return 0.1
-            else:
-                # Exponential decay: closer events get higher scores
-                score = np.exp(-days_until / decay_days)
-                return score * recency_weight + (1 - recency_weight) * 0.5
-        
-        events_df['temporal_score'] = events_df['days_until_event'].apply(temporal_score_fn)
+        # Exponential decay: closer events get higher scores;
+        # past events score 0, events too far in the future 0.1
+        decayed = np.exp(-np.clip(days_until, 0, None) / decay_days) * recency_weight + (1 - recency_weight) * 0.5
+        temporal_score = np.where(days_until < 0, 0.0, np.where(days_until > max_days_ahead, 0.1, decayed))
         
-        result_df = events_df[['EventId', 'days_until_event', 'temporal_score']].copy()
+        result_df = pd.DataFrame({
+            'EventId': events_df['EventId'].to_numpy(),
+            'days_until_event': days_until,
+            'temporal_score': temporal_score
+        })
         
-        logger.debug(f"Calculated temporal features for {len(result_df)} events",
-                    avg_temporal_score=result_df['temporal_score'].mean())
+        if logger.is_enabled('DEBUG'):
+            logger.debug("Calculated temporal features for %d events", len(result_df),
+                         avg_temporal_score=float(result_df['temporal_score'].mean()))
         
         return result_df
     
@@ -291,7 +490,8 @@ class FeatureEngine:
                                user_id: int,
                                events_df: pd.DataFrame,
                                user_club_ids: List[int],
-                               user_history_df: pd.DataFrame) -> pd.DataFrame:
+                               user_history_df: pd.DataFrame,
+                               club_attendance: Optional[Dict[int, int]] = None) -> pd.DataFrame:
         """
         Calculate user affinity scores for events
         
@@ -300,6 +500,8 @@ class FeatureEngine:
             events_df: DataFrame with events
             user_club_ids: List of club IDs user follows
             user_history_df: User's past event interactions
+            club_attendance: Attended events per club (from a cached UserProfile);
+                derived from user_history_df when omitted
             
         Returns:
             DataFrame with EventId and affinity features
@@ -312,41 +514,33 @@ class FeatureEngine:
                 'user_affinity_score': []
             })
         
-        events_df = events_df.copy()
-        
         # Feature 1: Is user following the event's club?
-        events_df['is_following_club'] = events_df['ClubId'].apply(
-            lambda cid: 1.0 if cid in user_club_ids else 0.0
-        )
+        is_following = map_by_club(events_df['ClubId'], dict.fromkeys(user_club_ids, 1.0))
         
         # Feature 2: Past attendance count for this club
-        if not user_history_df.empty:
+        if club_attendance is not None:
+            past_attendance = map_by_club(events_df['ClubId'], club_attendance)
+        elif not user_history_df.empty:
             club_attendance = user_history_df[user_history_df['Attended'] == 1].groupby('ClubId').size()
-            events_df['past_club_attendance'] = events_df['ClubId'].apply(
-                lambda cid: club_attendance.get(cid, 0)
-            )
+            past_attendance = map_by_club(events_df['ClubId'], club_attendance.to_dict())
         else:
-            events_df['past_club_attendance'] = 0
+            past_attendance = np.zeros(len(events_df))
         
         # Normalize past attendance (0-1 scale)
-        max_attendance = events_df['past_club_attendance'].max()
-        if max_attendance > 0:
-            events_df['past_club_attendance_norm'] = events_df['past_club_attendance'] / max_attendance
-        else:
-            events_df['past_club_attendance_norm'] = 0.0
-        
-        # Combined affinity score
-        events_df['user_affinity_score'] = (
-            events_df['is_following_club'] * 0.6 +
-            events_df['past_club_attendance_norm'] * 0.4
-        )
+        max_attendance = past_attendance.max()
+        past_attendance_norm = past_attendance / max_attendance if max_attendance > 0 else 0.0
         
-        result_df = events_df[[
-            'EventId', 'is_following_club', 'past_club_attendance', 'user_affinity_score'
-        ]].copy()
+        result_df = pd.DataFrame({
+            'EventId': events_df['EventId'].to_numpy(),
+            'is_following_club': is_following,
+            'past_club_attendance': past_attendance,
+            # Combined affinity score
+            'user_affinity_score': is_following * 0.6 + past_attendance_norm * 0.4
+        })
         
-        logger.debug(f"Calculated user affinity for {len(result_df)} events",
-                    avg_affinity=result_df['user_affinity_score'].mean())
+        if logger.is_enabled('DEBUG'):
+            logger.debug("Calculated user affinity for %d events", len(result_df),
+                         avg_affinity=float(result_df['user_affinity_score'].mean()))
         
         return result_df
     
@@ -373,35 +567,25 @@ class FeatureEngine:
                 'popularity_score': []
             })
         
-        events_df = events_df.copy()
-        
         # Map club metrics to events
-        events_df['club_member_count'] = events_df['ClubId'].apply(
-            lambda cid: club_member_counts.get(cid, 0)
-        )
-        events_df['club_event_count'] = events_df['ClubId'].apply(
-            lambda cid: club_event_counts.get(cid, 0)
-        )
+        member_counts = map_by_club(events_df['ClubId'], club_member_counts)
+        event_counts = map_by_club(events_df['ClubId'], club_event_counts)
         
         # Normalize to 0-1 scale
         max_members = max(club_member_counts.values()) if club_member_counts else 1
         max_events = max(club_event_counts.values()) if club_event_counts else 1
         
-        events_df['member_norm'] = events_df['club_member_count'] / max_members
-        events_df['event_norm'] = events_df['club_event_count'] / max_events
-        
-        # Combined popularity score
-        events_df['popularity_score'] = (
-            events_df['member_norm'] * 0.6 +
-            events_df['event_norm'] * 0.4
-        )
-        
-        result_df = events_df[[
-            'EventId', 'club_member_count', 'club_event_count', 'popularity_score'
-        ]].copy()
+        result_df = pd.DataFrame({
+            'EventId': events_df['EventId'].to_numpy(),
+            'club_member_count': member_counts,
+            'club_event_count': event_counts,
+            # Combined popularity score
+            'popularity_score': (member_counts / max_members) * 0.6 + (event_counts / max_events) * 0.4
+        })
         
-        logger.debug(f"Calculated popularity features for {len(result_df)} events",
-                    avg_popularity=result_df['popularity_score'].mean())
+        if logger.is_enabled('DEBUG'):
+            logger.debug("Calculated popularity features for %d events", len(result_df),
+                         avg_popularity=float(result_df['popularity_score'].mean()))
         
         return result_df
     
@@ -418,18 +602,25 @@ class FeatureEngine:
         if not feature_dfs:
             return pd.DataFrame()
         
-        # Start with first DataFrame
-        combined = feature_dfs[0].copy()
-        
-        # Merge others
-        for df in feature_dfs[1:]:
-            if not df.empty:
+        frames = [df for df in feature_dfs[1:] if not df.empty]
+        event_ids = feature_dfs[0]['EventId'].to_numpy()
+        if all(len(df) == len(event_ids) and np.array_equal(df['EventId'].to_numpy(), event_ids)
+               for df in frames):
+            # Feature frames are built row-aligned with the candidates: join by position
+            combined = pd.concat(
+                [feature_dfs[0].reset_index(drop=True)] +
+                [df.drop(columns='EventId').reset_index(drop=True) for df in frames],
+                axis=1
+            )
+        else:
+            combined = feature_dfs[0]
+            for df in frames:
                 combined = combined.merge(df, on='EventId', how='left')
         
         # Fill any NaN values with 0
         combined = combined.fillna(0)
         
-        logger.debug(f"Combined features for {len(combined)} events",
-                    feature_count=len(combined.columns) - 1)  # -1 for EventId
+        logger.debug("Combined features for %d events", len(combined),
+                     feature_count=len(combined.columns) - 1)  # -1 for EventId
         
         return combined
@@ -0,0 +1,265 @@
+"""
+CPU offload for UniMeet Recommender Service
+Runs content similarity, the CPU-bound feature stage, in a persistent process
+pool so concurrent requests are not serialized on the GIL. Workers hold the
+fitted text model as a versioned snapshot; a request ships the user's vector,
+interest text and the candidates' clubs and cached text features, and gets two
+score arrays back. Large candidate sets are split into shards scored by several workers.
+"""
+import atexit
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from models.feature_engine import FeatureEngine
+from models.text_model import EventTextFeatures
+from utils.deadline import Deadline
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+OFFLOAD_REQUESTS = metrics.counter(
+    'recommender_offload_requests_total',
+    'Content similarity computations by where they ran (offloaded, inline, failed)', ['result']
+)
+OFFLOAD_SHARDS = metrics.counter(
+    'recommender_offload_shards_total', 'Shards sent to the CPU offload pool'
+)
+OFFLOAD_SNAPSHOTS = metrics.counter(
+    'recommender_offload_snapshots_total', 'Text model snapshots published to the CPU offload pool'
+)
+
+
+# ===== WORKER PROCESS SIDE =====
+
+# (snapshot path, FeatureEngine restored from it); one per worker process
+_worker_engine: Optional[Tuple[str, FeatureEngine]] = None
+
+
+def _engine_for(path: str) -> FeatureEngine:
+    """The worker's FeatureEngine, reloaded when a newer snapshot is referenced"""
+    global _worker_engine
+    if _worker_engine is None or _worker_engine[0] != path:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+        engine = FeatureEngine(snapshot['config'])
+        engine.club_ids = snapshot['club_ids']
+        engine.club_vectors = snapshot['club_vectors']
+        engine.text_model = snapshot['text_model']
+        if snapshot['vectorizer'] is not None:
+            engine.vectorizer = snapshot['vectorizer']
+        engine.vectors_version = snapshot['vectors_version']
+        _worker_engine = (path, engine)
+    return _worker_engine[1]
+
+
+def _load_snapshot(path: str) -> int:
+    """Warm-up task: load a snapshot ahead of the first request"""
+    _engine_for(path)
+    return os.getpid()
+
+
+def _content_task(path: str,
+                  user_vector: sparse.csr_matrix,
+                  interest_text: str,
+                  event_club_ids: np.ndarray,
+                  text_features: Optional[EventTextFeatures],
+                  include_text: bool) -> Tuple[np.ndarray, np.ndarray]:
+    return _engine_for(path).content_scores(user_vector, interest_text, event_club_ids, text_features, include_text)
+
+
+# ===== REQUEST SIDE =====
+
+class ScoringPool:
+    """Persistent worker processes computing FeatureEngine.content_scores"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        """
+        Initialize CPU offload pool (processes start on first use or start())
+
+        Args:
+            settings: Dict with optional keys 'enabled', 'workers' (default: CPU
+                count), 'start_method', 'min_candidates' (smaller candidate sets
+                are scored in the request thread), 'shard_min_candidates'
+                (candidates per shard before a request is split; 0 disables
+                sharding), 'task_timeout_seconds' and 'snapshot_refresh_seconds'
+                (how often running IDF updates are republished in hashing mode)
+        """
+        settings = settings or {}
+        self.enabled = settings.get('enabled', False)
+        self.workers = int(settings.get('workers') or os.cpu_count() or 1)
+        self.start_method = settings.get('start_method', 'spawn')
+        self.min_candidates = int(settings.get('min_candidates', 200))
+        self.shard_min_candidates = int(settings.get('shard_min_candidates', 4000))
+        self.timeout = float(settings.get('task_timeout_seconds', 10))
+        self.snapshot_refresh_seconds = float(settings.get('snapshot_refresh_seconds', 60))
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dir: Optional[str] = None
+        # (engine weakref, vectors_version, documents counted, path, published_at);
+        # replaced as a whole when a new snapshot is published
+        self._snapshot: Optional[Tuple] = None
+        self._published = 0
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> ProcessPoolExecutor:
+        executor = self._executor
+        if executor is not None:
+            return executor
+        with self._lock:
+            if self._executor is None:
+                if self._dir is None:
+                    self._dir = tempfile.mkdtemp(prefix='unimeet-offload-')
+                    atexit.register(self.shutdown)
+                # spawn: request threads hold locks a forked child would inherit
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(self.start_method)
+                )
+                logger.info("CPU offload pool started", workers=self.workers, start_method=self.start_method)
+            return self._executor
+
+    def _snapshot_path(self, engine: FeatureEngine) -> str:
+        """Path of a snapshot matching the engine's fitted state, publishing one if needed"""
+        documents = engine.text_model.n_documents if engine.text_model is not None else 0
+        current = self._snapshot
+        if self._is_current(current, engine, documents):
+            return current[3]
+
+        with self._lock:
+            current = self._snapshot
+            if self._is_current(current, engine, documents):
+                return current[3]
+            self._published += 1
+            path = os.path.join(self._dir, f'snapshot-{self._published}.pkl')
+            snapshot = {
+                'config': engine.config,
+                'club_ids': engine.club_ids,
+                'club_vectors': engine.club_vectors,
+                'text_model': engine.text_model,
+                # TF-IDF mode vectorizes the interest text in the fitted vocabulary
+                'vectorizer': engine.vectorizer if engine.text_model is None else None,
+                'vectors_version': engine.vectors_version,
+            }
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+            # Keep the previous snapshot for tasks already submitted against it
+            if current is not None:
+                stale = os.path.join(self._dir, f'snapshot-{self._published - 2}.pkl')
+                if os.path.exists(stale):
+                    os.remove(stale)
+            self._snapshot = (weakref.ref(engine), engine.vectors_version, documents, path, time.monotonic())
+            OFFLOAD_SNAPSHOTS.inc()
+            return path
+
+    def _is_current(self, snapshot: Optional[Tuple], engine: FeatureEngine, documents: int) -> bool:
+        if snapshot is None or snapshot[0]() is not engine or snapshot[1] != engine.vectors_version:
+            return False
+        # Running IDF drifts slowly: republish it at most every snapshot_refresh_seconds
+        return snapshot[2] == documents or time.monotonic() - snapshot[4] < self.snapshot_refresh_seconds
+
+    def start(self, engine: FeatureEngine):
+        """Start the worker processes and load the engine's snapshot in each (warm-up)"""
+        if not self.enabled or engine.club_vectors is None:
+            return
+        try:
+            executor = self._ensure_started()
+            path = self._snapshot_path(engine)
+            futures = [executor.submit(_load_snapshot, path) for _ in range(self.workers)]
+            pids = {future.result(timeout=max(self.timeout, 60)) for future in futures}
+            logger.info("CPU offload pool warmed up", processes=len(pids))
+        except Exception as e:
+            logger.warning(f"CPU offload pool warm-up failed: {str(e)}")
+
+    def content_scores(self,
+                       engine: FeatureEngine,
+                       user_vector: sparse.csr_matrix,
+                       interest_text: str,
+                       event_club_ids: np.ndarray,
+                       text_features: Optional[EventTextFeatures],
+                       include_text: bool,
+                       deadline: Optional[Deadline] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        FeatureEngine.content_scores computed in the pool
+
+        Waits at most task_timeout_seconds, or what is left of the request's
+        deadline if that is shorter.
+
+        Returns:
+            (content_similarity, title_match_score) arrays, or None when the
+            candidate set is too small to be worth shipping or the pool failed;
+            the caller then computes them in its own thread
+        """
+        n_events = len(event_club_ids)
+        if not self.enabled or n_events < self.min_candidates:
+            OFFLOAD_REQUESTS.inc(result='inline')
+            return None
+
+        n_shards = 1
+        if self.shard_min_candidates > 0:
+            n_shards = max(1, min(self.workers, n_events // self.shard_min_candidates))
+        bounds = np.linspace(0, n_events, n_shards + 1).astype(np.int64).tolist()
+        futures = []
+        try:
+            executor = self._ensure_started()
+            path = self._snapshot_path(engine)
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                futures.append(executor.submit(
+                    _content_task, path, user_vector, interest_text, event_club_ids[start:end],
+                    text_features.rows(start, end) if include_text else None, include_text
+                ))
+            OFFLOAD_SHARDS.inc(len(futures))
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(max(deadline.remaining_ms(), 0.0) / 1000, timeout)
+            wait_until = time.monotonic() + timeout
+            parts = [future.result(timeout=max(wait_until - time.monotonic(), 0)) for future in futures]
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (e.g. OOM-killed): start a fresh pool on the next call
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            logger.warning(f"CPU offload failed, scoring in the request thread: {type(e).__name__} {str(e)}")
+            OFFLOAD_REQUESTS.inc(result='failed')
+            return None
+
+        OFFLOAD_REQUESTS.inc(result='offloaded')
+        if len(parts) == 1:
+            return parts[0]
+        return (np.concatenate([part[0] for part in parts]),
+                np.concatenate([part[1] for part in parts]))
+
+    def shutdown(self):
+        """Stop the worker processes and remove published snapshots"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            directory, self._dir = self._dir, None
+            self._snapshot = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def status(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'enabled': self.enabled,
+            'workers': self.workers,
+            'started': self._executor is not None,
+            'snapshot_age_s': round(time.monotonic() - snapshot[4], 1) if snapshot is not None else None,
+        }
@@ -0,0 +1,142 @@
+"""
+Adaptive connection pool sizing for UniMeet Recommender Service
+Grows the SQLAlchemy QueuePool when requests wait for connections and
+shrinks it again when the pool sits idle, within configured bounds.
+"""
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy.pool import QueuePool
+
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+DB_POOL_RESIZES = metrics.counter(
+    'recommender_db_pool_resizes_total', 'Adaptive pool resizes', ['direction']
+)
+
+
+class AdaptivePoolSizer:
+    """Tunes QueuePool size and max overflow from observed checkout wait time"""
+
+    def __init__(self, pool: QueuePool, settings: Optional[Dict] = None):
+        """
+        Initialize adaptive pool sizer
+
+        Args:
+            pool: The engine's QueuePool
+            settings: Dict with optional keys 'min_size', 'max_size',
+                'min_overflow', 'max_overflow', 'target_wait_ms',
+                'interval_seconds' and 'step'
+        """
+        settings = settings or {}
+        self.pool = pool
+        self.min_size = int(settings.get('min_size', 2))
+        self.max_size = int(settings.get('max_size', 20))
+        self.min_overflow = int(settings.get('min_overflow', 0))
+        self.max_overflow = int(settings.get('max_overflow', 20))
+        self.target_wait_s = float(settings.get('target_wait_ms', 5)) / 1000
+        self.interval_seconds = float(settings.get('interval_seconds', 30))
+        self.step = max(1, int(settings.get('step', 1)))
+
+        # Observations since the last tick
+        self._lock = threading.Lock()
+        self._wait_total = 0.0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._peak_checked_out = 0
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_checkout(self, wait_s: float, timed_out: bool = False):
+        """Record one checkout attempt (called from DatabaseConnector._connect)"""
+        checked_out = self.pool.checkedout()
+        with self._lock:
+            self._wait_total += wait_s
+            self._checkouts += 1
+            if timed_out:
+                self._timeouts += 1
+            if checked_out > self._peak_checked_out:
+                self._peak_checked_out = checked_out
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='pool-sizer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Adaptive pool sizing failed: {str(e)}", exc_info=True)
+
+    def tick(self):
+        """Evaluate the last interval and resize the pool by one step if needed"""
+        with self._lock:
+            checkouts, wait_total = self._checkouts, self._wait_total
+            timeouts, peak = self._timeouts, self._peak_checked_out
+            self._wait_total = 0.0
+            self._checkouts = 0
+            self._timeouts = 0
+            self._peak_checked_out = self.pool.checkedout()
+
+        if checkouts == 0:
+            return
+        mean_wait = wait_total / checkouts
+        size = self.pool.size()
+        overflow = self.pool._max_overflow
+
+        if timeouts or mean_wait > self.target_wait_s:
+            # Starving: grow the persistent pool first, then the overflow
+            if size < self.max_size:
+                self._resize(min(size + self.step, self.max_size), overflow, 'grow', mean_wait)
+            elif overflow < self.max_overflow:
+                self._resize(size, min(overflow + self.step, self.max_overflow), 'grow', mean_wait)
+        elif mean_wait < self.target_wait_s / 4:
+            # Idle: give back overflow first, then persistent connections nobody used
+            if overflow > self.min_overflow and peak <= size + overflow - self.step:
+                self._resize(size, max(overflow - self.step, self.min_overflow), 'shrink', mean_wait)
+            elif size > self.min_size and peak < size:
+                self._resize(max(size - self.step, self.min_size, peak), overflow, 'shrink', mean_wait)
+
+    def _resize(self, size: int, max_overflow: int, direction: str, mean_wait: float):
+        """
+        Change QueuePool size and overflow in place
+
+        QueuePool counts created connections as _overflow + size, so _overflow
+        is shifted by the size change to keep that count. Idle connections above
+        a smaller size are closed when they are next returned.
+        """
+        pool = self.pool
+        if size == pool.size() and max_overflow == pool._max_overflow:
+            return
+        with pool._overflow_lock:
+            delta = size - pool._pool.maxsize
+            pool._pool.maxsize = size
+            pool._overflow -= delta
+            pool._max_overflow = max_overflow
+        DB_POOL_RESIZES.inc(direction=direction)
+        logger.info("Resized connection pool to size=%d max_overflow=%d (mean wait %.1f ms)",
+                    size, max_overflow, mean_wait * 1000)
+
+    def status(self) -> Dict:
+        return {
+            'size': self.pool.size(),
+            'max_overflow': self.pool._max_overflow,
+            'bounds': {
+                'size': [self.min_size, self.max_size],
+                'overflow': [self.min_overflow, self.max_overflow],
+            },
+            'target_wait_ms': self.target_wait_s * 1000,
+        }
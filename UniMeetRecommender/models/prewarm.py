@@ -0,0 +1,293 @@
+"""
+Recommendation pre-warming for UniMeet Recommender Service
+A short-lived per-user cache of recommendations computed ahead of the request,
+filled by a deduplicated, rate-limited background priority queue that reacts
+to activity signals (login, app open) and sheds work under load.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from utils.logger import logger
+from utils.metrics import metrics, record_cache_lookup
+from utils.scheduler import SchedulerRejected
+
+
+PREWARM_SIGNALS = metrics.counter(
+    'recommender_prewarm_signals_total', 'Pre-warm signals by outcome (queued, duplicate, recent, dropped)',
+    ['result']
+)
+PREWARM_TASKS = metrics.counter(
+    'recommender_prewarm_tasks_total', 'Pre-warm tasks by outcome (done, expired, shed, failed)', ['result']
+)
+PREWARM_QUEUE_DEPTH = metrics.gauge(
+    'recommender_prewarm_queue_depth', 'Users waiting to be pre-warmed'
+)
+
+
+class RecommendationCache:
+    """Per-user recommendation results with a short TTL, LRU-bounded"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        """
+        Initialize recommendation cache
+
+        Args:
+            settings: Dict with optional keys 'ttl_seconds', 'max_users' and
+                'max_min_date_skew_seconds' (how far a request's minDate may be
+                ahead of the lookup time and still be answered from the cache)
+        """
+        settings = settings or {}
+        self.ttl_seconds = float(settings.get('ttl_seconds', 120))
+        self.max_users = int(settings.get('max_users', 10000))
+        self.max_min_date_skew = float(settings.get('max_min_date_skew_seconds', 60))
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, user_id: int, result: Dict, limit: int, starts_at: Dict[int, float]):
+        """
+        Store a result computed with explain=True for up to `limit` events
+
+        Args:
+            user_id: User ID
+            result: recommend() result
+            limit: Number of events the result was computed for
+            starts_at: Start time (epoch seconds) of each recommended event; events
+                that have started by the time the entry is served are left out
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, result, limit, starts_at)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def expires_in(self, user_id: int) -> Optional[float]:
+        """Seconds until a user's entry expires, or None without a live entry"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        remaining = entry[0] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def get(self, user_id: int, limit: int, filters: Optional[Dict], explain: bool) -> Optional[Dict]:
+        """
+        Cached recommendations for a request, if its filters are the default view
+
+        Only requests for upcoming events with no upper date bound or exclusions
+        are answered (what the recommendations screen asks for).
+
+        Returns:
+            Result dict with metadata 'cached' set, or None
+        """
+        filters = filters or {}
+        if filters.get('max_date') or filters.get('exclude_event_ids'):
+            return None
+        now = time.time()
+        min_date = filters.get('min_date')
+        if min_date is not None and min_date.timestamp() > now + self.max_min_date_skew:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                entry = None
+        recommendations = []
+        usable = False
+        if entry is not None:
+            _, result, cached_limit, starts_at = entry
+            # Drop events that started since the result was computed; the rest keep
+            # their ranks, as the events ranked below them stayed eligible too
+            threshold = max(now, min_date.timestamp()) if min_date is not None else now
+            recommendations = [rec for rec in result['recommendations']
+                               if starts_at.get(rec['eventId'], 0.0) >= threshold]
+            # A shorter list than requested is only complete if fewer events qualified
+            usable = limit <= len(recommendations) or len(result['recommendations']) < cached_limit
+        record_cache_lookup('recommendations', hit=usable)
+        if not usable:
+            return None
+
+        recommendations = recommendations[:limit]
+        if not explain:
+            recommendations = [{'eventId': rec['eventId'], 'score': rec['score']} for rec in recommendations]
+        return {
+            'recommendations': recommendations,
+            'metadata': {**result['metadata'], 'cached': True},
+        }
+
+    def invalidate(self, user_ids: Optional[List[int]] = None) -> int:
+        """Drop entries (all of them when user_ids is None); returns the number removed"""
+        with self._lock:
+            if user_ids is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            return sum(self._entries.pop(user_id, None) is not None for user_id in user_ids)
+
+
+class PrewarmQueue:
+    """Background priority queue of users to pre-warm, served by worker threads"""
+
+    def __init__(self,
+                 work: Callable[[int], None],
+                 overloaded: Callable[[], bool],
+                 settings: Optional[Dict] = None):
+        """
+        Initialize pre-warm queue
+
+        Args:
+            work: Pre-warms one user (HybridRecommender.prewarm)
+            overloaded: Whether interactive traffic needs the capacity right now;
+                queued tasks are dropped instead of run while it returns True
+            settings: Dict with optional keys 'enabled', 'workers', 'max_queue',
+                'min_interval_seconds' (per-user dedupe window), 'max_per_second'
+                and 'max_wait_seconds' (tasks waiting longer are dropped)
+        """
+        settings = settings or {}
+        self.work = work
+        self.overloaded = overloaded
+        self.enabled = settings.get('enabled', True)
+        self.workers = int(settings.get('workers', 1))
+        self.max_queue = int(settings.get('max_queue', 1000))
+        self.min_interval = float(settings.get('min_interval_seconds', 60))
+        self.max_per_second = float(settings.get('max_per_second', 20))
+        self.max_wait = float(settings.get('max_wait_seconds', 30))
+
+        # Heap of (priority, sequence, enqueued_at, user_id); lower priority runs first
+        self._heap: List = []
+        self._queued: Dict[int, int] = {}
+        self._last_started: OrderedDict = OrderedDict()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        # Token bucket shared by the workers
+        self._tokens = self.max_per_second
+        self._tokens_at = time.monotonic()
+
+    def submit(self, user_id: int, priority: int = 1) -> str:
+        """
+        Queue a user for pre-warming
+
+        Args:
+            user_id: User ID
+            priority: Lower runs first (e.g. 0 login, 1 app open)
+
+        Returns:
+            'queued', 'duplicate' (already queued), 'recent' (pre-warmed within
+            min_interval_seconds) or 'dropped' (disabled, overloaded or full)
+        """
+        outcome = self._submit(user_id, priority)
+        PREWARM_SIGNALS.inc(result=outcome)
+        return outcome
+
+    def _submit(self, user_id: int, priority: int) -> str:
+        if not self.enabled or self.overloaded():
+            return 'dropped'
+        now = time.monotonic()
+        with self._lock:
+            queued_priority = self._queued.get(user_id)
+            if queued_priority is not None:
+                if priority < queued_priority:
+                    # Stronger signal for a queued user: re-queue at the higher priority
+                    self._push(user_id, priority, now)
+                return 'duplicate'
+            started = self._last_started.get(user_id)
+            if started is not None and now - started < self.min_interval:
+                return 'recent'
+            if len(self._queued) >= self.max_queue and not self._evict_weaker(priority):
+                return 'dropped'
+            self._push(user_id, priority, now)
+            self._ensure_workers()
+            self._available.notify()
+        return 'queued'
+
+    def _push(self, user_id: int, priority: int, now: float):
+        """Queue an entry (lock held); superseded heap entries are skipped when popped"""
+        self._queued[user_id] = priority
+        heapq.heappush(self._heap, (priority, next(self._sequence), now, user_id))
+        PREWARM_QUEUE_DEPTH.set(len(self._queued))
+
+    def _evict_weaker(self, priority: int) -> bool:
+        """Make room by dropping the weakest queued user if it is weaker than priority (lock held)"""
+        weakest = max(self._queued.items(), key=lambda item: item[1], default=None)
+        if weakest is None or weakest[1] <= priority:
+            return False
+        del self._queued[weakest[0]]
+        PREWARM_TASKS.inc(result='shed')
+        return True
+
+    def _pop(self) -> Optional[tuple]:
+        """Next live entry, waiting for one (lock held)"""
+        while True:
+            while not self._heap:
+                self._available.wait()
+            priority, _, enqueued_at, user_id = heapq.heappop(self._heap)
+            if self._queued.get(user_id) == priority:
+                del self._queued[user_id]
+                PREWARM_QUEUE_DEPTH.set(len(self._queued))
+                return enqueued_at, user_id
+
+    def _ensure_workers(self):
+        """Start worker threads on first use (lock held)"""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f'prewarm-{len(self._threads)}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _take_token(self):
+        """Block until the rate limit allows another task"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.max_per_second,
+                                   self._tokens + (now - self._tokens_at) * self.max_per_second)
+                self._tokens_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.max_per_second
+            time.sleep(wait)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                enqueued_at, user_id = self._pop()
+            self._take_token()
+            if time.monotonic() - enqueued_at > self.max_wait:
+                PREWARM_TASKS.inc(result='expired')
+                continue
+            if self.overloaded():
+                PREWARM_TASKS.inc(result='shed')
+                continue
+            with self._lock:
+                self._last_started[user_id] = time.monotonic()
+                self._last_started.move_to_end(user_id)
+                # Entries older than the dedupe window no longer matter
+                while self._last_started and \
+                        time.monotonic() - next(iter(self._last_started.values())) > self.min_interval:
+                    self._last_started.popitem(last=False)
+            try:
+                self.work(user_id)
+                PREWARM_TASKS.inc(result='done')
+            except SchedulerRejected:
+                # Waited too long behind interactive and batch work
+                PREWARM_TASKS.inc(result='shed')
+            except Exception as e:
+                PREWARM_TASKS.inc(result='failed')
+                logger.warning(f"Pre-warm failed for user {user_id}: {str(e)}")
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'queued': len(self._queued),
+                'workers': len(self._threads),
+            }
@@ -0,0 +1,212 @@
+"""
+User profile store for UniMeet Recommender Service
+Keeps each user's averaged club vector, interest text/tokens and attendance
+by club, so requests and batch jobs do not rebuild them from club text.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from models.db_connector import DatabaseConnector
+from models.feature_engine import FeatureEngine, sparse_nbytes
+from utils.logger import logger
+from utils.metrics import metrics, record_cache_lookup
+
+
+PROFILE_STORE_USERS = metrics.gauge(
+    'recommender_profile_store_users', 'User profiles held in memory'
+)
+PROFILE_STORE_BYTES = metrics.gauge(
+    'recommender_profile_store_bytes', 'Estimated memory held by user profiles'
+)
+
+
+class UserProfile:
+    """Interest profile of one user, derived from memberships and attendance"""
+
+    __slots__ = ('user_id', 'club_ids', 'club_vector', 'interest_text', 'interest_tokens',
+                 'club_attendance', 'fingerprint', 'nbytes')
+
+    def __init__(self,
+                 user_id: int,
+                 club_ids: Tuple[int, ...],
+                 club_vector: Optional[sparse.csr_matrix],
+                 interest_text: str,
+                 club_attendance: Dict[int, int],
+                 fingerprint: Tuple):
+        self.user_id = user_id
+        self.club_ids = club_ids
+        self.club_vector = club_vector
+        self.interest_text = interest_text
+        self.interest_tokens: FrozenSet[str] = frozenset(interest_text.split())
+        self.club_attendance = club_attendance
+        self.fingerprint = fingerprint
+        # Rough footprint: vector, text, token set and attendance dict entries
+        self.nbytes = (
+            sparse_nbytes(club_vector) +
+            len(interest_text) * 2 +
+            len(self.interest_tokens) * 64 +
+            len(club_attendance) * 64 + 256
+        )
+
+
+class UserProfileStore:
+    """LRU of UserProfile keyed by user, rebuilt when memberships or attendance change"""
+
+    def __init__(self,
+                 feature_engine: FeatureEngine,
+                 db_connector: DatabaseConnector,
+                 clubs_provider: Callable[[], pd.DataFrame],
+                 settings: Optional[Dict] = None):
+        """
+        Initialize user profile store
+
+        Args:
+            feature_engine: Feature engine holding the fitted club vectors
+            db_connector: Database connector (used when the caller does not
+                pass memberships/history, e.g. batch jobs)
+            clubs_provider: Returns the clubs DataFrame (the recommender's clubs cache)
+            settings: Dict with optional keys 'max_users' and 'max_memory_mb'
+        """
+        settings = settings or {}
+        self.feature_engine = feature_engine
+        self.db = db_connector
+        self.clubs_provider = clubs_provider
+        self.max_users = int(settings.get('max_users', 10000))
+        self.max_bytes = int(float(settings.get('max_memory_mb', 64)) * 1024 * 1024)
+
+        self._profiles: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def get(self,
+            user_id: int,
+            club_ids: Optional[List[int]] = None,
+            history_df: Optional[pd.DataFrame] = None) -> UserProfile:
+        """
+        Get a user's profile, rebuilding it if memberships or attendance changed
+
+        Args:
+            user_id: User ID
+            club_ids: Clubs the user follows (fetched when omitted)
+            history_df: User event history (fetched when omitted)
+
+        Returns:
+            Current UserProfile
+        """
+        if club_ids is None:
+            club_ids = self.db.get_user_followed_clubs(user_id)
+        if history_df is None:
+            history_df = self.db.get_user_event_history(user_id)
+
+        attended = self._attended(history_df)
+        fingerprint = self._fingerprint(club_ids, attended)
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is not None and profile.fingerprint == fingerprint:
+                self._profiles.move_to_end(user_id)
+                record_cache_lookup('user_profile', hit=True)
+                return profile
+        record_cache_lookup('user_profile', hit=False)
+
+        profile = self._build(user_id, club_ids, attended, fingerprint)
+        self._put(profile)
+        return profile
+
+    def invalidate(self, user_ids: Optional[List[int]] = None) -> int:
+        """
+        Drop profiles (all of them when user_ids is None)
+
+        Returns:
+            Number of profiles removed
+        """
+        with self._lock:
+            if user_ids is None:
+                removed = len(self._profiles)
+                self._profiles.clear()
+                self._bytes = 0
+            else:
+                removed = 0
+                for user_id in user_ids:
+                    profile = self._profiles.pop(user_id, None)
+                    if profile is not None:
+                        self._bytes -= profile.nbytes
+                        removed += 1
+            self._update_gauges()
+        if removed:
+            logger.debug("Invalidated %d user profiles", removed)
+        return removed
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'users': len(self._profiles),
+                'bytes': self._bytes,
+                'max_users': self.max_users,
+                'max_bytes': self.max_bytes,
+            }
+
+    @staticmethod
+    def _attended(history_df: pd.DataFrame) -> pd.DataFrame:
+        if history_df.empty:
+            return history_df
+        return history_df[history_df['Attended'] == 1]
+
+    def _fingerprint(self, club_ids: List[int], attended: pd.DataFrame) -> Tuple:
+        """Identifies the inputs a profile was built from (and the club vectors it used)"""
+        attended_ids = (np.sort(attended['EventId'].to_numpy(dtype=np.int64)).tobytes()
+                        if not attended.empty else b'')
+        return (
+            self.feature_engine.vectors_version,
+            tuple(sorted({int(club_id) for club_id in club_ids})),
+            hash(attended_ids),
+        )
+
+    def _build(self, user_id: int, club_ids: List[int], attended: pd.DataFrame,
+               fingerprint: Tuple) -> UserProfile:
+        engine = self.feature_engine
+        clubs_df = self.clubs_provider()
+        if engine.club_vectors is None and not clubs_df.empty:
+            engine.fit_club_vectors(clubs_df)
+            # Vectors changed: the fingerprint must name the version actually used
+            fingerprint = (engine.vectors_version,) + fingerprint[1:]
+
+        user_clubs_df = clubs_df[clubs_df['ClubId'].isin(club_ids)] if not clubs_df.empty else clubs_df
+        club_attendance = (
+            {int(k): int(v) for k, v in attended.groupby('ClubId').size().items()}
+            if not attended.empty else {}
+        )
+        return UserProfile(
+            user_id=user_id,
+            club_ids=fingerprint[1],
+            club_vector=engine.user_club_vector(club_ids),
+            interest_text=engine.build_interest_text(user_clubs_df) if not user_clubs_df.empty else '',
+            club_attendance=club_attendance,
+            fingerprint=fingerprint,
+        )
+
+    def _put(self, profile: UserProfile):
+        """Insert a profile and evict least recently used ones over the caps"""
+        with self._lock:
+            previous = self._profiles.pop(profile.user_id, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._profiles[profile.user_id] = profile
+            self._bytes += profile.nbytes
+            while len(self._profiles) > 1 and (len(self._profiles) > self.max_users or
+                                               self._bytes > self.max_bytes):
+                _, evicted = self._profiles.popitem(last=False)
+                self._bytes -= evicted.nbytes
+            self._update_gauges()
+
+    def _update_gauges(self):
+        """Publish store size (lock held)"""
+        PROFILE_STORE_USERS.set(len(self._profiles))
+        PROFILE_STORE_BYTES.set(self._bytes)
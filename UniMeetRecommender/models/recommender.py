@@ -4,13 +4,51 @@ Combines content-based, temporal, user affinity, and popularity features
 """
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
-from models.db_connector import DatabaseConnector
+from models.db_connector import DatabaseConnector, reset_stale_reads, stale_reads
 from models.feature_engine import FeatureEngine
+from models.fallback import FallbackRanker
+from models.event_store import EventTextStore
+from models.profile_store import UserProfile, UserProfileStore
+from models.candidate_index import CandidateIndex
+from models.co_engagement import CoEngagementModel
+from models.audience import AudienceIndex
+from models.prewarm import PrewarmQueue, RecommendationCache
+from models.offload import ScoringPool
 from utils.logger import logger
+from utils.deadline import Deadline, StageCostEstimator
+from utils.metrics import metrics, record_cache_lookup, DEFAULT_SIZE_BUCKETS
+from utils.scheduler import scheduler
+from utils.tracing import span
+
+
+STAGE_LATENCY = metrics.histogram(
+    'recommender_stage_duration_seconds', 'Latency of recommendation pipeline stages', ['stage']
+)
+CANDIDATE_SET_SIZE = metrics.histogram(
+    'recommender_candidate_set_size', 'Candidate events scored per request', buckets=DEFAULT_SIZE_BUCKETS
+)
+DEGRADED_REQUESTS = metrics.counter(
+    'recommender_degraded_requests_total',
+    'Requests that skipped or approximated stages to stay within the latency budget', ['action']
+)
+TEXT_MEMORY_BYTES = metrics.gauge(
+    'recommender_text_memory_bytes', 'Estimated memory held per text model component', ['component']
+)
+
+
+@contextmanager
+def _stage(name: str):
+    """Time a pipeline stage into the stage histogram and the active trace"""
+    with STAGE_LATENCY.time(stage=name), span(name) as stage_span:
+        yield stage_span
 
 
 class HybridRecommender:
@@ -28,12 +66,50 @@ class HybridRecommender:
         self.config_path = config_path
         self.db = db_connector
         self.feature_engine = FeatureEngine(self.config)
+        self.fallback = FallbackRanker(self.db, self.feature_engine, self.config)
+        content_settings = self.config.get('content_settings', {})
+        budget_mb = content_settings.get('text_memory_budget_mb')
+        self.text_memory_budget = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self.event_store = EventTextStore(
+            self.db, self.feature_engine,
+            content_settings.get('event_text_cache_size', 50000),
+            max_bytes=self.text_memory_budget,
+            reserved_bytes=self._fixed_text_bytes
+        )
+        self.profile_store = UserProfileStore(
+            self.feature_engine, self.db, self._get_clubs_data, self.config.get('profile_store', {})
+        )
+        self.candidate_index = CandidateIndex(self.db, self.event_store, self.fallback, self.config)
+        self.co_engagement = CoEngagementModel(self.db, self.config)
+        self.audience_index = AudienceIndex(self.db, self.feature_engine, self.co_engagement, self.config)
         
         # Cache for clubs data (refresh periodically)
         self._clubs_cache = None
         self._clubs_cache_time = None
         self._cache_ttl = 300  # 5 minutes
         
+        # Last fetched popularity stats, reused when the latency budget is tight
+        self._popularity_cache: Optional[Tuple[Dict[int, int], Dict[int, int]]] = None
+        
+        # Learned per-candidate stage costs for latency budget decisions
+        self.stage_costs = StageCostEstimator(
+            probe_seconds=self.config['ranking_settings'].get('stage_probe_seconds', 30)
+        )
+        
+        # Recommendations computed ahead of the request on activity signals;
+        # the queue's workers outlive config reloads, so it is built once
+        prewarm_settings = self.config.get('prewarm', {})
+        self.recommendation_cache = RecommendationCache(prewarm_settings)
+        self.prewarm_queue = PrewarmQueue(self.prewarm, self._overloaded, prewarm_settings)
+        self._active_requests = 0
+        self._active_lock = threading.Lock()
+        # Held while warm_up_in_background runs
+        self._warm_up_lock = threading.Lock()
+        
+        # Content similarity in worker processes (off by default); like the
+        # pre-warm queue it outlives config reloads and picks up the new engine
+        self.scoring_pool = ScoringPool(self.config.get('offload', {}))
+        
         logger.info("HybridRecommender initialized",
                    model_version=self.config['model']['version'])
     
@@ -52,27 +128,176 @@ class HybridRecommender:
         """Reload configuration from file"""
         self.config = self._load_config(self.config_path)
         self.feature_engine = FeatureEngine(self.config)
+        self.fallback = FallbackRanker(self.db, self.feature_engine, self.config)
+        content_settings = self.config.get('content_settings', {})
+        budget_mb = content_settings.get('text_memory_budget_mb')
+        self.text_memory_budget = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self.event_store = EventTextStore(
+            self.db, self.feature_engine,
+            content_settings.get('event_text_cache_size', 50000),
+            max_bytes=self.text_memory_budget,
+            reserved_bytes=self._fixed_text_bytes
+        )
+        self.profile_store = UserProfileStore(
+            self.feature_engine, self.db, self._get_clubs_data, self.config.get('profile_store', {})
+        )
+        self.candidate_index = CandidateIndex(self.db, self.event_store, self.fallback, self.config)
+        self.co_engagement = CoEngagementModel(self.db, self.config)
+        self.audience_index = AudienceIndex(self.db, self.feature_engine, self.co_engagement, self.config)
+        # Cached results were scored with the previous weights
+        self.recommendation_cache.invalidate()
         logger.info("Configuration reloaded")
     
     def _get_clubs_data(self, force_refresh: bool = False) -> pd.DataFrame:
         """Get clubs data with caching"""
         now = datetime.now(timezone.utc)
         
-        if (force_refresh or 
-            self._clubs_cache is None or 
-            self._clubs_cache_time is None or
-            (now - self._clubs_cache_time).total_seconds() > self._cache_ttl):
-            
-            self._clubs_cache = self.db.get_club_details()
+        stale = (force_refresh or 
+                 self._clubs_cache is None or 
+                 self._clubs_cache_time is None or
+                 (now - self._clubs_cache_time).total_seconds() > self._cache_ttl)
+        record_cache_lookup('clubs', hit=not stale)
+        
+        if stale:
+            clubs_df = self.db.get_club_details()
+            # Keep serving the old snapshot if the database is unavailable
+            if not clubs_df.empty or self._clubs_cache is None:
+                self._clubs_cache = clubs_df
             self._clubs_cache_time = now
             logger.debug("Clubs cache refreshed")
         
         return self._clubs_cache
     
+    def warm_up(self):
+        """
+        Load the clubs cache, fit club vectors, build the fallback ranking,
+        preload upcoming event texts and build the candidate index,
+        co-engagement model and audience index if missing, then start the
+        CPU offload pool (when enabled)
+        """
+        clubs_df = self._get_clubs_data()
+        if self.feature_engine.club_vectors is None and not clubs_df.empty:
+            self.feature_engine.fit_club_vectors(clubs_df)
+        if not self.fallback.ready:
+            self.fallback.refresh()
+        if not len(self.event_store):
+            try:
+                self.event_store.preload(min_date=datetime.now(timezone.utc))
+            except Exception as e:
+                # Texts are still fetched on demand per request
+                logger.warning(f"Event text preload failed: {str(e)}")
+        # Built after the preload so indexing reads texts from the store
+        if self.candidate_index.enabled and not self.candidate_index.ready:
+            self.candidate_index.refresh()
+        if self.co_engagement.enabled and not self.co_engagement.ready:
+            self.co_engagement.refresh(full=True)
+        if self.audience_index.enabled and not self.audience_index.ready:
+            self.audience_index.refresh()
+        # The index postings built after the preload count against the text budget
+        self.event_store.trim()
+        self.text_memory_report()
+        if self.scoring_pool.enabled and not self.scoring_pool.status()['started']:
+            self.scoring_pool.start(self.feature_engine)
+    
+    def _fixed_text_bytes(self) -> int:
+        """Bytes held by the text components other than the event text store"""
+        return sum(self.feature_engine.memory_report().values()) + self.candidate_index.nbytes
+    
+    def warm_up_in_background(self) -> bool:
+        """
+        Run warm_up on its own thread, so callers (the health prober) never
+        block on it
+
+        Returns:
+            True if a warm-up was started, False if one is already running
+        """
+        if not self._warm_up_lock.acquire(blocking=False):
+            return False
+        
+        def run():
+            try:
+                self.warm_up()
+            except Exception as e:
+                logger.error(f"Warm-up failed: {str(e)}", exc_info=True)
+            finally:
+                self._warm_up_lock.release()
+        
+        threading.Thread(target=run, name='warm-up', daemon=True).start()
+        return True
+    
+    def text_memory_report(self) -> Dict:
+        """
+        Bytes held per text model component, checked against
+        content_settings.text_memory_budget_mb
+        
+        Read only: the event text store, the only component that can shed memory
+        without a refit or rebuild, trims itself to what the others leave of the
+        budget as it loads entries.
+        
+        Returns:
+            Dict with 'components' (bytes by component), 'total_bytes' and 'budget_bytes'
+        """
+        components = self.feature_engine.memory_report()
+        components['candidate_postings'] = self.candidate_index.nbytes
+        components['event_texts'] = self.event_store.nbytes
+        
+        for component, nbytes in components.items():
+            TEXT_MEMORY_BYTES.set(nbytes, component=component)
+        return {
+            'components': components,
+            'total_bytes': sum(components.values()),
+            'budget_bytes': self.text_memory_budget,
+        }
+    
+    def warmup_status(self) -> Dict:
+        """Which caches and models are loaded"""
+        return {
+            'warming_up': self._warm_up_lock.locked(),
+            'clubs_cache': self._clubs_cache is not None and not self._clubs_cache.empty,
+            'club_vectors': self.feature_engine.club_vectors is not None,
+            'event_texts': len(self.event_store),
+            'candidate_index': self.candidate_index.ready,
+            'co_engagement': self.co_engagement.ready,
+            'audience_index': self.audience_index.ready,
+            'fallback_ranking': self.fallback.ready,
+            'fallback_age_s': (round(self.fallback.age_seconds, 1)
+                               if self.fallback.age_seconds is not None else None)
+        }
+    
+    def _get_popularity_stats(self, deadline: Deadline, degraded: List[str]) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """Fetch club popularity stats, or reuse the last fetched ones when the budget is tight"""
+        if (self._popularity_cache is not None and
+                not deadline.can_afford(self.stage_costs.estimate('fetch.popularity_stats')) and
+                not self.stage_costs.probe_due('fetch.popularity_stats')):
+            degraded.append('popularity_cached')
+            return self._popularity_cache
+        
+        started = time.perf_counter()
+        stats = (self.db.get_club_member_counts(), self.db.get_club_event_counts())
+        self.stage_costs.observe('fetch.popularity_stats', (time.perf_counter() - started) * 1000)
+        if not stats[0] and self._popularity_cache is not None:
+            # Empty member counts mean the database is unavailable; keep the last stats
+            return self._popularity_cache
+        self._popularity_cache = stats
+        return stats
+    
+    def _budget_fallback(self, user_id: int, limit: int, filters: Optional[Dict],
+                         explain: bool, deadline: Deadline) -> Dict:
+        """Serve the cached fallback ranking once the latency budget is exhausted"""
+        logger.warning("Latency budget of %.0f ms exhausted for user %s after %.0f ms, serving fallback",
+                       deadline.budget_ms, user_id, deadline.elapsed_ms(), sample_key='budget_exhausted')
+        DEGRADED_REQUESTS.inc(action='budget_exhausted')
+        result = self._fallback_recommendations(user_id, limit, filters, explain, cached_only=True)
+        result['metadata']['degraded'] = ['budget_exhausted']
+        result['metadata']['latency_budget_ms'] = deadline.budget_ms
+        return result
+    
     def recommend(self, 
                   user_id: int, 
                   limit: int = 10,
-                  filters: Optional[Dict] = None) -> Dict:
+                  filters: Optional[Dict] = None,
+                  explain: bool = False,
+                  budget_ms: Optional[float] = None) -> Dict:
         """
         Generate event recommendations for a user
         
@@ -80,39 +305,135 @@ class HybridRecommender:
             user_id: User ID
             limit: Maximum number of recommendations
             filters: Optional filters (min_date, max_date, exclude_event_ids)
+            explain: Attach a 'reason' explanation to each recommendation
+            budget_ms: Latency budget in milliseconds (defaults to
+                ranking_settings.latency_budget_ms; 0 disables the budget)
             
         Returns:
-            Dict with recommendations and metadata
+            Dict with recommendations and metadata ('stale' is set when any
+            data came from last good results because the database was unavailable,
+            'cached' when the result was pre-warmed, see prewarm())
+        """
+        cached = self.recommendation_cache.get(user_id, limit, filters, explain)
+        if cached is not None:
+            return cached
+        
+        with self._active_lock:
+            self._active_requests += 1
+        try:
+            reset_stale_reads()
+            result = self._recommend(user_id, limit, filters, explain, budget_ms)
+            if stale_reads():
+                result['metadata']['stale'] = True
+            return result
+        finally:
+            with self._active_lock:
+                self._active_requests -= 1
+    
+    def _overloaded(self) -> bool:
+        """Whether background pre-warming should yield to interactive requests"""
+        max_active = self.config.get('prewarm', {}).get('max_active_requests', 8)
+        breaker = getattr(self.db, 'breaker', None)
+        return (self._active_requests >= max_active or
+                scheduler.waiting('interactive') > 0 or
+                (breaker is not None and breaker.status()['state'] != 'closed'))
+    
+    def prewarm(self, user_id: int):
+        """
+        Compute and cache a user's profile and default recommendations
+        
+        Runs on the pre-warm queue's workers as background work (see
+        utils.scheduler) without a latency budget, over the same upcoming events
+        as a live request. The cache leaves out events that have started by the
+        time it serves the entry. Degraded, fallback and stale results are not
+        cached.
+        
+        Args:
+            user_id: User ID
+            
+        Raises:
+            SchedulerRejected: No background slot within its queue timeout
+        """
+        settings = self.config.get('prewarm', {})
+        limit = min(settings.get('limit', 50), self.config['ranking_settings']['max_limit'])
+        starts_at: Dict[int, float] = {}
+        
+        with scheduler.slot('background'):
+            reset_stale_reads()
+            result = self._recommend(user_id, limit, None, explain=True, budget_ms=0, starts_at=starts_at)
+        metadata = result['metadata']
+        if stale_reads() or metadata.get('fallback') or metadata.get('degraded') or metadata.get('error'):
+            logger.debug("Pre-warm result for user %s not cached", user_id)
+            return
+        self.recommendation_cache.put(user_id, result, limit, starts_at)
+    
+    def _recommend(self,
+                   user_id: int,
+                   limit: int,
+                   filters: Optional[Dict],
+                   explain: bool,
+                   budget_ms: Optional[float],
+                   starts_at: Optional[Dict[int, float]] = None) -> Dict:
+        """
+        Run the recommendation pipeline (see recommend())
+        
+        Args:
+            starts_at: Filled with the StartAt (epoch seconds) of the recommended events
         """
         start_time = datetime.now(timezone.utc)
+        if budget_ms is None:
+            budget_ms = self.config['ranking_settings'].get('latency_budget_ms')
+        deadline = Deadline(budget_ms)
+        # Stages skipped or approximated to stay within the budget
+        degraded: List[str] = []
         
         try:
             # Step 1: Get user's followed clubs
-            user_club_ids = self.db.get_user_followed_clubs(user_id)
+            with span('fetch.user_clubs'):
+                user_club_ids = self.db.get_user_followed_clubs(user_id)
             
-            logger.info(f"User {user_id} follows {len(user_club_ids)} clubs: {user_club_ids}")
+            logger.debug("User %s follows %d clubs: %s", user_id, len(user_club_ids), user_club_ids)
             
             if not user_club_ids:
-                logger.info(f"User {user_id} follows no clubs, using fallback")
-                return self._fallback_recommendations(user_id, limit, filters)
+                logger.debug("User %s follows no clubs, using fallback", user_id)
+                return self._fallback_recommendations(user_id, limit, filters, explain)
+            
+            # Step 2: Get user history; attended events are excluded in the candidate query
+            with span('fetch.user_history'):
+                user_history_df = self.db.get_user_event_history(user_id)
             
-            # Step 2: Get candidate events
-            event_filters = filters or {}
+            event_filters = dict(filters or {})
             if 'min_date' not in event_filters:
                 event_filters['min_date'] = datetime.now(timezone.utc)
             
-            events_df = self.db.get_all_events(event_filters)
-            
-            # Step 2.5: Get user history and exclude attended events
-            user_history_df = self.db.get_user_event_history(user_id)
+            excluded_event_ids = set(event_filters.get('exclude_event_ids') or ())
             if not user_history_df.empty:
-                attended_event_ids = user_history_df[user_history_df['Attended'] == 1]['EventId'].tolist()
-                if attended_event_ids:
-                    events_df = events_df[~events_df['EventId'].isin(attended_event_ids)]
-                    logger.info(f"Filtered out {len(attended_event_ids)} attended events for user {user_id}")
+                attended_event_ids = user_history_df.loc[user_history_df['Attended'] == 1, 'EventId']
+                excluded_event_ids.update(attended_event_ids.tolist())
+                logger.debug("Excluding %d attended events for user %s", len(attended_event_ids), user_id)
+            if excluded_event_ids:
+                event_filters['exclude_event_ids'] = excluded_event_ids
+            
+            # Cached interest profile (rebuilt only when memberships or attendance changed)
+            with _stage('profile'):
+                profile = self.profile_store.get(user_id, user_club_ids, user_history_df)
+            
+            # Step 3: Get candidate events: a bounded set from the retrieval index,
+            # or every upcoming event until the index is built
+            with span('fetch.candidates') as fetch_span:
+                events_df = None
+                if self.candidate_index.enabled:
+                    with _stage('retrieval'):
+                        events_df = self.candidate_index.retrieve(
+                            user_club_ids, profile.interest_tokens, event_filters
+                        )
+                source = 'index' if events_df is not None else 'scan'
+                if events_df is None:
+                    events_df = self.db.get_all_events(event_filters)
+                fetch_span.set(rows=len(events_df), excluded=len(excluded_event_ids), source=source)
             
             if events_df.empty:
-                logger.info(f"No candidate events found for user {user_id}")
+                logger.debug("No candidate events found for user %s", user_id)
                 return {
                     'recommendations': [],
                     'metadata': {
@@ -123,12 +444,21 @@ class HybridRecommender:
                     }
                 }
             
-            # Step 3: Get clubs data
-            clubs_df = self._get_clubs_data()
+            CANDIDATE_SET_SIZE.observe(len(events_df))
+            
+            if deadline.expired():
+                return self._budget_fallback(user_id, limit, filters, explain, deadline)
             
-            # Step 4: Get popularity metrics
-            club_member_counts = self.db.get_club_member_counts()
-            club_event_counts = self.db.get_club_event_counts()
+            # Step 4: Get clubs data
+            with span('fetch.clubs'):
+                clubs_df = self._get_clubs_data()
+            
+            # Step 5: Get popularity metrics
+            with span('fetch.popularity_stats'):
+                club_member_counts, club_event_counts = self._get_popularity_stats(deadline, degraded)
+            
+            if deadline.expired():
+                return self._budget_fallback(user_id, limit, filters, explain, deadline)
             
             # Step 6: Calculate features
             features = self._calculate_all_features(
@@ -138,26 +468,43 @@ class HybridRecommender:
                 clubs_df=clubs_df,
                 user_history_df=user_history_df,
                 club_member_counts=club_member_counts,
-                club_event_counts=club_event_counts
+                club_event_counts=club_event_counts,
+                deadline=deadline,
+                degraded=degraded,
+                profile=profile
             )
             
             # Step 7: Score and rank
-            scored_events = self._score_events(features, events_df)
+            with _stage('scoring'):
+                scored_events = self._score_events(features, events_df)
             
             # Step 8: Select ONLY the best (top 1) recommendation
-            if scored_events.empty:
-                recommendations = scored_events
-            else:
-                recommendations = scored_events.head(1)
-                logger.info(f"Selected best recommendation with score: {recommendations.iloc[0]['final_score']:.3f}")
+            with _stage('ranking'):
+                if scored_events.empty:
+                    recommendations = scored_events
+                else:
+                    recommendations = scored_events.head(1)
+                    logger.debug("Selected best recommendation with score: %.3f", recommendations.iloc[0]['final_score'])
+                    if starts_at is not None:
+                        selected = events_df[events_df['EventId'].isin(recommendations['EventId'])]
+                        starts_at.update(zip(selected['EventId'].tolist(), selected['StartAt'].tolist()))
             
             # Step 9: Format output
-            result = self._format_recommendations(
-                recommendations,
-                events_df,
-                user_club_ids,
-                start_time
-            )
+            with _stage('formatting'):
+                result = self._format_recommendations(
+                    recommendations,
+                    len(events_df),
+                    user_club_ids,
+                    start_time,
+                    explain
+                )
+            
+            if deadline.budget_ms is not None:
+                result['metadata']['latency_budget_ms'] = deadline.budget_ms
+            if degraded:
+                result['metadata']['degraded'] = degraded
+                for action in degraded:
+                    DEGRADED_REQUESTS.inc(action=action)
             
             # Log
             latency_ms = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
@@ -173,7 +520,7 @@ class HybridRecommender:
         except Exception as e:
             logger.error(f"Error generating recommendations for user {user_id}: {str(e)}", 
                         exc_info=True)
-            return self._fallback_recommendations(user_id, limit, filters)
+            return self._fallback_recommendations(user_id, limit, filters, explain)
     
     def _calculate_all_features(self,
                                user_id: int,
@@ -182,34 +529,98 @@ class HybridRecommender:
                                clubs_df: pd.DataFrame,
                                user_history_df: pd.DataFrame,
                                club_member_counts: Dict[int, int],
-                               club_event_counts: Dict[int, int]) -> pd.DataFrame:
-        """Calculate all features for events"""
+                               club_event_counts: Dict[int, int],
+                               deadline: Optional[Deadline] = None,
+                               degraded: Optional[List[str]] = None,
+                               profile: Optional[UserProfile] = None) -> pd.DataFrame:
+        """
+        Calculate all features for events
         
-        # Content similarity
-        content_features = self.feature_engine.calculate_content_similarity(
-            user_club_ids, events_df, clubs_df
-        )
+        Content similarity is the expensive family: when the learned cost of the
+        full computation does not fit the remaining budget, title matching is
+        skipped, and if even club similarity does not fit, content is skipped.
+        """
+        deadline = deadline or Deadline(None)
+        degraded = degraded if degraded is not None else []
+        n_events = len(events_df)
+        if profile is None:
+            with _stage('profile'):
+                profile = self.profile_store.get(user_id, user_club_ids, user_history_df)
+        core_ms = self.stage_costs.estimate('feature.core', n_events)
+        
+        # Content similarity; a skipped mode is still run now and then (probe_due)
+        # so one slow sample does not disable it for good
+        if (deadline.can_afford(self.stage_costs.estimate('feature.content', n_events), core_ms) or
+                self.stage_costs.probe_due('feature.content')):
+            content_mode = 'feature.content'
+        elif (deadline.can_afford(self.stage_costs.estimate('feature.content.club_only', n_events), core_ms) or
+                self.stage_costs.probe_due('feature.content.club_only')):
+            content_mode = 'feature.content.club_only'
+            degraded.append('title_match_skipped')
+        else:
+            content_mode = None
+            degraded.append('content_skipped')
+        
+        with _stage('feature.content') as content_span:
+            if content_mode is None:
+                content_features = pd.DataFrame({
+                    'EventId': events_df['EventId'].to_numpy(),
+                    'content_similarity': 0.0,
+                    'title_match_score': 0.0
+                })
+            else:
+                include_text = content_mode == 'feature.content'
+                text_features = None
+                if include_text:
+                    # Fetched before timing: cold-cache database reads are not a
+                    # per-candidate compute cost and would inflate the estimate
+                    with span('fetch.event_texts'):
+                        text_features = self.event_store.features(events_df['EventId'].tolist())
+                started = time.perf_counter()
+                content_features = self.feature_engine.calculate_content_similarity(
+                    user_club_ids, events_df, clubs_df,
+                    include_text=include_text,
+                    text_features=text_features,
+                    profile=profile,
+                    offload=(partial(self.scoring_pool.content_scores, deadline=deadline)
+                             if self.scoring_pool.enabled else None)
+                )
+                self.stage_costs.observe(content_mode, (time.perf_counter() - started) * 1000, n_events)
+            content_span.set(mode=content_mode or 'skipped')
+        
+        core_started = time.perf_counter()
         
         # Temporal features
-        temporal_features = self.feature_engine.calculate_temporal_features(events_df)
+        with _stage('feature.temporal'):
+            temporal_features = self.feature_engine.calculate_temporal_features(events_df)
         
         # User affinity
-        affinity_features = self.feature_engine.calculate_user_affinity(
-            user_id, events_df, user_club_ids, user_history_df
-        )
+        with _stage('feature.affinity'):
+            affinity_features = self.feature_engine.calculate_user_affinity(
+                user_id, events_df, user_club_ids, user_history_df,
+                club_attendance=profile.club_attendance
+            )
         
         # Popularity
-        popularity_features = self.feature_engine.calculate_popularity_features(
-            events_df, club_member_counts, club_event_counts
-        )
+        with _stage('feature.popularity'):
+            popularity_features = self.feature_engine.calculate_popularity_features(
+                events_df, club_member_counts, club_event_counts
+            )
+        
+        # Collaborative ("people like you attended"); absent until the model is built
+        with _stage('feature.collaborative'):
+            engaged_clubs = set(user_club_ids) | set(profile.club_attendance)
+            engaged_events = user_history_df['EventId'].tolist() if not user_history_df.empty else []
+            collaborative_features = self.co_engagement.score(events_df, engaged_clubs, engaged_events)
         
         # Combine all features
-        all_features = self.feature_engine.combine_features(
-            content_features,
-            temporal_features,
-            affinity_features,
-            popularity_features
-        )
+        with _stage('feature.combine'):
+            feature_frames = [content_features, temporal_features, affinity_features, popularity_features]
+            if collaborative_features is not None:
+                feature_frames.append(collaborative_features)
+            all_features = self.feature_engine.combine_features(*feature_frames)
+        
+        self.stage_costs.observe('feature.core', (time.perf_counter() - core_started) * 1000, n_events)
         
         return all_features
     
@@ -226,9 +637,8 @@ class HybridRecommender:
         """
         weights = self.config['scoring_weights']
         
-        # Calculate weighted score
-        features_df = features_df.copy()
-        
+        # Calculate weighted score (final_score is added to features_df in place;
+        # the frame is built per request by _calculate_all_features)
         # Handle missing features gracefully
         content_sim = features_df.get('content_similarity', 0)
         title_match = features_df.get('title_match_score', 0)
@@ -236,6 +646,7 @@ class HybridRecommender:
         affinity = features_df.get('user_affinity_score', 0)
         popularity = features_df.get('popularity_score', 0)
         is_following = features_df.get('is_following_club', 0)
+        collaborative = features_df.get('collaborative_score', 0)
         
         # Enhanced scoring formula
         features_df['final_score'] = (
@@ -244,7 +655,8 @@ class HybridRecommender:
             temporal * weights.get('temporal_score', 0.15) +
             affinity * weights.get('user_past_behavior', 0.15) +
             popularity * weights.get('club_popularity', 0.05) +
-            is_following * weights.get('club_membership_match', 0.30)
+            is_following * weights.get('club_membership_match', 0.30) +
+            collaborative * weights.get('collaborative', 0.0)
         )
         
         # Boost score if event title has high match (indicates strong relevance)
@@ -257,24 +669,33 @@ class HybridRecommender:
         features_df = features_df[features_df['final_score'] >= min_threshold]
         after_filter = len(features_df)
         
-        logger.info(f"Threshold filter: {before_filter} events -> {after_filter} events (min_score={min_threshold})")
+        logger.debug("Threshold filter: %d events -> %d events (min_score=%s)",
+                     before_filter, after_filter, min_threshold)
         
         # Sort by score
         features_df = features_df.sort_values('final_score', ascending=False)
         
-        # Log top scores for debugging
-        if not features_df.empty:
+        # Log top scores for debugging (sampled, one record instead of one per event)
+        if not features_df.empty and logger.should_log('DEBUG', sample_key='score_details'):
             top_events = features_df.head(10)
-            logger.info(f"Top 10 scored events:")
-            for idx, row in top_events.iterrows():
-                logger.info(f"  EventId={row['EventId']}, Score={row['final_score']:.3f}, "
-                           f"Following={row.get('is_following_club', 0):.1f}, "
-                           f"Content={row.get('content_similarity', 0):.3f}, "
-                           f"Title={row.get('title_match_score', 0):.3f}")
+            logger.debug(
+                "Top %d scored events", len(top_events),
+                top_events=[
+                    {
+                        'EventId': int(row['EventId']),
+                        'Score': round(float(row['final_score']), 3),
+                        'Following': float(row.get('is_following_club', 0)),
+                        'Content': round(float(row.get('content_similarity', 0)), 3),
+                        'Title': round(float(row.get('title_match_score', 0)), 3)
+                    }
+                    for _, row in top_events.iterrows()
+                ]
+            )
         
-        logger.debug(f"Scored {len(features_df)} events",
-                    avg_score=features_df['final_score'].mean() if not features_df.empty else 0,
-                    max_score=features_df['final_score'].max() if not features_df.empty else 0)
+        if logger.is_enabled('DEBUG'):
+            logger.debug("Scored %d events", len(features_df),
+                         avg_score=float(features_df['final_score'].mean()) if not features_df.empty else 0,
+                         max_score=float(features_df['final_score'].max()) if not features_df.empty else 0)
         
         return features_df
     
@@ -330,16 +751,79 @@ class HybridRecommender:
         
         result_df = pd.DataFrame(selected).head(limit)
         
-        logger.debug(f"Selected {len(result_df)} diverse recommendations")
+        logger.debug("Selected %d diverse recommendations", len(result_df))
         
         return result_df
     
+    def audience(self, event_id: int, limit: int = 100) -> Optional[Dict]:
+        """
+        Users most likely to be interested in an event (reverse recommendation)
+        
+        Args:
+            event_id: Event ID
+            limit: Maximum number of users
+            
+        Returns:
+            Dict with 'audience' ({userId, score} best first) and 'metadata'
+            ('index_ready' is False while the audience index is being built),
+            or None if the event does not exist
+        """
+        start_time = datetime.now(timezone.utc)
+        event = self.db.get_event(event_id)
+        if event is None:
+            return None
+        
+        clubs_df = self._get_clubs_data()
+        if self.feature_engine.club_vectors is None and not clubs_df.empty:
+            self.feature_engine.fit_club_vectors(clubs_df)
+        
+        with _stage('audience'):
+            top_users = self.audience_index.audience(event, limit)
+        
+        metadata = {
+            'model_version': self.config['model']['version'],
+            'computed_at': datetime.now(timezone.utc).isoformat(),
+            'event_id': event_id,
+            'club_id': int(event['ClubId']),
+            'index_ready': top_users is not None,
+            'total_users': self.audience_index.status()['users'],
+        }
+        audience = []
+        if top_users is not None:
+            audience = [
+                {'userId': int(user_id), 'score': score}
+                for user_id, score in zip(top_users['UserId'].tolist(), top_users['score'].tolist())
+            ]
+        metadata['computation_time_ms'] = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
+        
+        logger.log_request(
+            user_id=None,
+            action='audience',
+            latency_ms=metadata['computation_time_ms'],
+            result_count=len(audience),
+            event_id=event_id
+        )
+        return {'audience': audience, 'metadata': metadata}
+    
     def _format_recommendations(self,
                                recommendations: pd.DataFrame,
-                               events_df: pd.DataFrame,
+                               total_candidates: int,
                                user_club_ids: List[int],
-                               start_time: datetime) -> Dict:
-        """Format recommendations for API response"""
+                               start_time: datetime,
+                               explain: bool = False) -> Dict:
+        """
+        Format recommendations for API response
+        
+        Built straight from the scored feature rows of the selected top-k, so the
+        cost depends on k only, not on the candidate set size.
+        
+        Args:
+            recommendations: Top-k rows of the scored feature matrix
+            total_candidates: Number of candidate events that were scored
+            user_club_ids: Club IDs the user follows
+            start_time: Request start time
+            explain: Attach a 'reason' block to each recommendation
+        """
         
         if recommendations.empty:
             return {
@@ -347,41 +831,39 @@ class HybridRecommender:
                 'metadata': {
                     'model_version': self.config['model']['version'],
                     'computed_at': datetime.now(timezone.utc).isoformat(),
-                    'total_candidates': len(events_df),
+                    'total_candidates': total_candidates,
                     'computation_time_ms': (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
                 }
             }
         
-        # Merge with events for full details
-        recs_with_events = recommendations.merge(
-            events_df, on='EventId', how='left'
-        )
+        # tolist() yields native ints/floats, no per-row conversion needed
+        event_ids = recommendations['EventId'].tolist()
+        scores = recommendations['final_score'].tolist()
         
-        formatted_recs = []
-        for _, row in recs_with_events.iterrows():
-            # Determine primary reason
-            reason = self._generate_reason(row, user_club_ids)
-            
-            rec = {
-                'eventId': int(row['EventId']),
-                'score': float(row['final_score']),
-                'reason': reason
-            }
-            
-            formatted_recs.append(rec)
+        if explain:
+            rows = recommendations.to_dict('records')
+            formatted_recs = [
+                {'eventId': int(event_id), 'score': score, 'reason': self._generate_reason(row, user_club_ids)}
+                for event_id, score, row in zip(event_ids, scores, rows)
+            ]
+        else:
+            formatted_recs = [
+                {'eventId': int(event_id), 'score': score}
+                for event_id, score in zip(event_ids, scores)
+            ]
         
         return {
             'recommendations': formatted_recs,
             'metadata': {
                 'model_version': self.config['model']['version'],
                 'computed_at': datetime.now(timezone.utc).isoformat(),
-                'total_candidates': len(events_df),
+                'total_candidates': total_candidates,
                 'computation_time_ms': (datetime.now(timezone.utc) - start_time).total_seconds() * 1000,
                 'user_follows_clubs': len(user_club_ids)
             }
         }
     
-    def _generate_reason(self, row: pd.Series, user_club_ids: List[int]) -> Dict:
+    def _generate_reason(self, row: Dict, user_club_ids: List[int]) -> Dict:
         """Generate explanation for recommendation"""
         
         # Get all feature scores
@@ -390,6 +872,7 @@ class HybridRecommender:
         title_match = row.get('title_match_score', 0)
         past_attendance = row.get('past_club_attendance', 0)
         temporal = row.get('temporal_score', 0)
+        collaborative = row.get('collaborative_score', 0)
         
         # Determine primary reason (in priority order)
         if is_following:
@@ -401,6 +884,9 @@ class HybridRecommender:
         elif past_attendance > 0:
             primary = "user_history"
             details = f"You've attended {int(past_attendance)} event(s) from this club"
+        elif collaborative > 0.3:
+            primary = "similar_users"
+            details = "People who attend events like yours also attended this club's events"
         elif content_sim > 0.4:
             primary = "similar_content"
             details = f"Similar to clubs you follow ({int(content_sim*100)}% similarity)"
@@ -428,28 +914,29 @@ class HybridRecommender:
                 'title_match': round(float(title_match), 3),
                 'temporal_score': round(float(temporal), 3),
                 'user_affinity': round(float(row.get('user_affinity_score', 0)), 3),
-                'popularity': round(float(row.get('popularity_score', 0)), 3)
+                'popularity': round(float(row.get('popularity_score', 0)), 3),
+                'collaborative': round(float(collaborative), 3)
             }
         }
     
     def _fallback_recommendations(self, 
                                  user_id: int, 
                                  limit: int,
-                                 filters: Optional[Dict]) -> Dict:
+                                 filters: Optional[Dict],
+                                 explain: bool = False,
+                                 cached_only: bool = False) -> Dict:
         """
         Fallback recommendations when user has no followed clubs
-        Returns most popular upcoming events
+        Returns most popular upcoming events from the precomputed fallback ranking
+        (cached_only: never build the ranking synchronously)
         """
-        logger.info(f"Using fallback recommendations for user {user_id}")
+        logger.info("Using fallback recommendations for user %s", user_id, sample_key='fallback')
         
         try:
-            event_filters = filters or {}
-            if 'min_date' not in event_filters:
-                event_filters['min_date'] = datetime.now(timezone.utc)
+            with _stage('fallback'):
+                top_events, total_ranked = self.fallback.top(limit, filters, build=not cached_only)
             
-            events_df = self.db.get_all_events(event_filters)
-            
-            if events_df.empty:
+            if not top_events:
                 return {
                     'recommendations': [],
                     'metadata': {
@@ -460,20 +947,19 @@ class HybridRecommender:
                     }
                 }
             
-            # Sort by start date (upcoming first)
-            events_df = events_df.sort_values('StartAt').head(limit)
-            
             recommendations = []
-            for _, event in events_df.iterrows():
-                recommendations.append({
-                    'eventId': int(event['EventId']),
-                    'score': 0.5,  # Neutral score for fallback
-                    'reason': {
+            for event_id, _ in top_events:
+                rec = {
+                    'eventId': event_id,
+                    'score': 0.5  # Neutral score for fallback
+                }
+                if explain:
+                    rec['reason'] = {
                         'primary': 'fallback',
-                        'details': 'Upcoming public event',
+                        'details': 'Upcoming popular public event',
                         'features': {}
                     }
-                })
+                recommendations.append(rec)
             
             return {
                 'recommendations': recommendations,
@@ -481,7 +967,7 @@ class HybridRecommender:
                     'model_version': self.config['model']['version'],
                     'computed_at': datetime.now(timezone.utc).isoformat(),
                     'fallback': True,
-                    'total_candidates': len(events_df)
+                    'total_candidates': total_ranked
                 }
             }
             
@@ -510,6 +996,8 @@ class HybridRecommender:
         # Only allow updating scoring weights for safety
         if 'scoring_weights' in new_config:
             self.config['scoring_weights'].update(new_config['scoring_weights'])
+            # Cached results were scored with the previous weights
+            self.recommendation_cache.invalidate()
             
             # Save to file
             try:
@@ -0,0 +1,271 @@
+"""
+Hashing text models for UniMeet Recommender Service
+Stateless feature hashing with incrementally maintained document frequencies,
+used instead of a fitted TF-IDF vocabulary when content_settings.text_mode
+is 'hashing', and keyword overlap (Jaccard) over hashed binary token rows.
+"""
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from utils.text_normalizer import configured_stopwords
+
+
+# Mersenne prime for the MinHash permutations (a * x + b) mod p
+_MINHASH_PRIME = (1 << 61) - 1
+_MINHASH_SEED = 1729
+
+
+class HashingTextModel:
+    """Fixed-dimension hashed term vectors weighted by a running IDF"""
+
+    def __init__(self, content_config: dict):
+        """
+        Initialize hashing text model
+
+        Args:
+            content_config: content_settings from config.json ('hashing_features',
+                'use_turkish_stopwords', 'turkish_stopwords')
+        """
+        self.n_features = int(content_config.get('hashing_features', 2 ** 18))
+        # No vocabulary: the same text hashes to the same columns in every worker
+        self.hasher = HashingVectorizer(
+            n_features=self.n_features,
+            stop_words=configured_stopwords(content_config),
+            ngram_range=(1, 2),  # Unigrams and bigrams, as in TF-IDF mode
+            lowercase=False,  # Texts arrive normalized (normalize_text)
+            strip_accents=None,
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32
+        )
+
+        self._doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        self._n_docs = 0
+        self._idf: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        # Pickled into CPU offload snapshots (models/offload.py); locks do not pickle
+        with self._lock:
+            state = self.__dict__.copy()
+            state['_doc_freq'] = self._doc_freq.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def n_documents(self) -> int:
+        """Documents counted so far"""
+        return self._n_docs
+
+    def hash(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """Raw hashed term counts (stateless)"""
+        return self.hasher.transform(texts)
+
+    def partial_fit(self, texts: Sequence[str]):
+        """Count documents towards the document frequencies"""
+        counts = self.hash(texts)
+        doc_freq = np.bincount(counts.indices, minlength=self.n_features)
+        with self._lock:
+            self._doc_freq += doc_freq
+            self._n_docs += counts.shape[0]
+            self._idf = None
+
+    @property
+    def idf(self) -> np.ndarray:
+        """Smoothed IDF over the documents seen so far (same formula as TfidfVectorizer)"""
+        with self._lock:
+            if self._idf is None:
+                self._idf = (np.log((1 + self._n_docs) / (1 + self._doc_freq)) + 1).astype(np.float32)
+            return self._idf
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """L2-normalized float32 TF-IDF vectors; each text is vectorized independently"""
+        return self.weigh(self.hash(texts))
+
+    def weigh(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        """IDF-weight and L2-normalize hashed counts (in place), e.g. counts cached per event"""
+        counts.data *= self.idf[counts.indices]
+        return normalize(counts, norm='l2', copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by document frequencies and the cached IDF"""
+        return self._doc_freq.nbytes + (self._idf.nbytes if self._idf is not None else 0)
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'n_features': self.n_features,
+                'documents': self._n_docs,
+                'terms': int(np.count_nonzero(self._doc_freq)),
+            }
+
+
+def stack_rows(indices: List[np.ndarray], data: Optional[List[np.ndarray]], n_features: int,
+               dtype=np.float32) -> sparse.csr_matrix:
+    """
+    CSR matrix from per-row column and value arrays (much cheaper than
+    sparse.vstack of single-row matrices)
+
+    Args:
+        indices: Column indices of each row
+        data: Values of each row, or None for a binary matrix
+        n_features: Number of columns
+    """
+    indptr = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in indices], out=indptr[1:])
+    columns = np.concatenate(indices) if indices else np.empty(0, dtype=np.int32)
+    values = (np.concatenate(data).astype(dtype, copy=False) if data is not None and data
+              else np.ones(len(columns), dtype=dtype))
+    return sparse.csr_matrix((values, columns, indptr), shape=(len(indices), n_features))
+
+
+class EventTextFeatures:
+    """Text vectors and keyword token rows of a batch of events, row-aligned with their texts"""
+
+    __slots__ = ('texts', 'vectors', 'tokens', 'cardinality', 'signatures')
+
+    def __init__(self, texts: List[str], vectors: Optional[sparse.csr_matrix],
+                 tokens: sparse.csr_matrix, cardinality: np.ndarray,
+                 signatures: Optional[np.ndarray] = None):
+        """
+        Args:
+            texts: Preprocessed event texts
+            vectors: L2-normalized float32 text vectors in the club vector space,
+                or None while no space is fitted (TF-IDF mode before the first fit)
+            tokens: Binary token rows (KeywordOverlap.token_rows)
+            cardinality: Distinct tokens per text
+            signatures: MinHash signatures of the token rows (KeywordOverlap.signatures),
+                or None to compute them when needed
+        """
+        self.texts = texts
+        self.vectors = vectors
+        self.tokens = tokens
+        self.cardinality = cardinality
+        self.signatures = signatures
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def rows(self, start: int, end: int) -> 'EventTextFeatures':
+        """Features of events start..end (a shard)"""
+        return EventTextFeatures(self.texts[start:end],
+                                 self.vectors[start:end] if self.vectors is not None else None,
+                                 self.tokens[start:end], self.cardinality[start:end],
+                                 self.signatures[start:end] if self.signatures is not None else None)
+
+
+class KeywordOverlap:
+    """Jaccard overlap of whitespace token sets, one user against many texts"""
+
+    def __init__(self, content_config: dict):
+        """
+        Initialize keyword overlap
+
+        Args:
+            content_config: content_settings from config.json ('keyword_overlap'
+                'exact' or 'minhash', 'minhash_permutations')
+        """
+        self.mode = content_config.get('keyword_overlap', 'exact')
+        self.permutations = int(content_config.get('minhash_permutations', 64))
+        # Binary token rows over a shared hashed vocabulary; 2^20 columns keep
+        # collisions between the few dozen tokens of two texts negligible
+        self.hasher = HashingVectorizer(
+            n_features=2 ** 20,
+            tokenizer=str.split,
+            token_pattern=None,
+            preprocessor=None,
+            lowercase=False,  # Texts arrive normalized (normalize_text)
+            binary=True,
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32
+        )
+        # Fixed seed: every worker draws the same permutations
+        rng = np.random.default_rng(_MINHASH_SEED)
+        self._a = rng.integers(1, 1 << 43, size=(self.permutations, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MINHASH_PRIME, size=(self.permutations, 1), dtype=np.uint64)
+
+    @property
+    def n_features(self) -> int:
+        """Columns of token rows"""
+        return self.hasher.n_features
+
+    def token_rows(self, texts: Sequence[str]) -> Tuple[sparse.csr_matrix, np.ndarray]:
+        """Binary token rows and their cardinalities (distinct tokens per text)"""
+        if not len(texts):
+            return sparse.csr_matrix((0, self.n_features), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        rows = self.hasher.transform(texts)
+        return rows, np.diff(rows.indptr)
+
+    def scores(self, text: str, texts: Sequence[str]) -> np.ndarray:
+        """
+        Jaccard overlap of a text's tokens with each of texts
+
+        Args:
+            text: Query text (e.g. user interests)
+            texts: Texts to compare against (e.g. event texts)
+
+        Returns:
+            Float array aligned with texts, 0 for empty texts
+        """
+        rows, cardinality = self.token_rows(list(texts))
+        return self.row_scores(text, rows, cardinality)
+
+    def row_scores(self, text: str, rows: sparse.csr_matrix, cardinality: np.ndarray,
+                   signatures: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Jaccard overlap of a text's tokens with token rows computed beforehand
+        (cached per event by EventTextStore, so requests only hash the query)
+
+        Args:
+            text: Query text (e.g. user interests)
+            rows: Binary token rows of the texts to compare against
+            cardinality: Distinct tokens per row
+            signatures: MinHash signatures of rows (minhash mode); computed
+                from rows when None
+
+        Returns:
+            Float array aligned with rows, 0 for empty rows
+        """
+        query, query_cardinality = self.token_rows([text])
+        if not query_cardinality[0] or not len(cardinality):
+            return np.zeros(len(cardinality))
+        if self.mode == 'minhash':
+            if signatures is None:
+                signatures = self.signatures(rows)
+            return self._minhash_scores(query, signatures, cardinality)
+
+        # |A & B| by matching row columns against the query's (a product with
+        # query.T would allocate an indptr over all 2^20 columns); |A | B| from
+        # the row cardinalities
+        shared = np.isin(rows.indices, query.indices).astype(np.float64)
+        intersection = np.bincount(np.repeat(np.arange(len(cardinality)), cardinality),
+                                   weights=shared, minlength=len(cardinality))
+        union = cardinality + query_cardinality[0] - intersection
+        return np.divide(intersection, union, out=np.zeros(len(union)), where=union > 0)
+
+    def signatures(self, rows: sparse.csr_matrix) -> np.ndarray:
+        """MinHash signatures (texts x permutations); empty rows get the maximum value"""
+        signatures = np.full((rows.shape[0], self.permutations), np.iinfo(np.uint64).max, dtype=np.uint64)
+        nonempty = np.flatnonzero(np.diff(rows.indptr))
+        if len(nonempty):
+            # a < 2^43, columns < 2^20 and b < 2^61 keep a * x + b below 2^64
+            hashed = (self._a * rows.indices.astype(np.uint64) + self._b) % np.uint64(_MINHASH_PRIME)
+            signatures[nonempty] = np.minimum.reduceat(hashed, rows.indptr[nonempty], axis=1).T
+        return signatures
+
+    def _minhash_scores(self, query: sparse.csr_matrix, signatures: np.ndarray,
+                        cardinality: np.ndarray) -> np.ndarray:
+        """Share of equal MinHash values approximates Jaccard (only the query is hashed)"""
+        estimate = (signatures == self.signatures(query)).mean(axis=1)
+        return np.where(cardinality > 0, estimate, 0.0)
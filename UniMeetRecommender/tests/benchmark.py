@@ -0,0 +1,275 @@
+"""
+Benchmark suite for the UniMeet recommendation pipeline
+Times HybridRecommender.recommend and each pipeline stage on synthetic data,
+records p50/p99 latency, peak memory and allocations, and compares against
+stored JSON baselines.
+
+Usage:
+    python -m tests.benchmark                      # small scale, compare to baseline
+    python -m tests.benchmark --scale full         # 100 .. 100k events
+    python -m tests.benchmark --update-baseline    # rewrite the stored baseline
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+
+from models.recommender import HybridRecommender
+from tests.synthetic import SyntheticDataset, InMemoryConnector
+from utils.logger import logger
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(BASE_DIR, 'config.json')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# (events, clubs) pairs per scale
+SCALES: Dict[str, List[Tuple[int, int]]] = {
+    'small': [(100, 10), (1000, 100)],
+    'full': [(100, 10), (1000, 100), (10000, 1000), (100000, 1000)],
+}
+
+# Regression thresholds (relative) and absolute noise floors
+# p99 is gated at twice the p50 threshold since it is far noisier over few runs
+LATENCY_THRESHOLD = float(os.getenv('BENCH_LATENCY_THRESHOLD', '0.75'))
+MEMORY_THRESHOLD = float(os.getenv('BENCH_MEMORY_THRESHOLD', '0.25'))
+LATENCY_FLOOR_MS = 10.0
+MEMORY_FLOOR_KIB = 256.0
+
+# Each stage is repeated until this much time is spent (bounded by the repeat limits)
+TIME_BUDGET_S = float(os.getenv('BENCH_TIME_BUDGET_S', '2.0'))
+MIN_REPEATS = 3
+MAX_REPEATS = 50
+
+
+def case_key(n_events: int, n_clubs: int) -> str:
+    """Stable baseline key for a dataset size"""
+    return f"events={n_events},clubs={n_clubs}"
+
+
+def _silence_logs():
+    """Send log output to /dev/null so formatting cost is measured without flooding the console"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        logger.configure(json.load(f).get('logging', {}))
+    logger.set_stream(open(os.devnull, 'w'))
+
+
+def _build_stages(dataset: SyntheticDataset) -> Dict[str, Callable[[], object]]:
+    """Prepare the inputs of every stage and return zero-argument callables"""
+    connector = InMemoryConnector(dataset)
+    recommender = HybridRecommender(CONFIG_PATH, connector)
+    engine = recommender.feature_engine
+    # Build the indexes up front: refreshes started by the first request would
+    # otherwise run in the background while later stages are timed
+    recommender.warm_up()
+
+    user_id = dataset.sample_user()
+    user_club_ids = connector.get_user_followed_clubs(user_id)
+    events_df = connector.get_all_events({'min_date': dataset.now})
+    clubs_df = connector.get_club_details()
+    history_df = connector.get_user_event_history(user_id)
+    member_counts = connector.get_club_member_counts()
+    event_counts = connector.get_club_event_counts()
+
+    engine.fit_club_vectors(clubs_df)
+    text_features = recommender.event_store.features(events_df['EventId'].tolist())
+    content = engine.calculate_content_similarity(user_club_ids, events_df, clubs_df, text_features=text_features)
+    temporal = engine.calculate_temporal_features(events_df)
+    affinity = engine.calculate_user_affinity(user_id, events_df, user_club_ids, history_df)
+    popularity = engine.calculate_popularity_features(events_df, member_counts, event_counts)
+    features = engine.combine_features(content, temporal, affinity, popularity)
+    scored = recommender._score_events(features, events_df)
+    top = scored.head(1)
+
+    return {
+        # budget_ms=0 disables the latency budget so the full pipeline is measured
+        'recommend': lambda: recommender.recommend(user_id, 10, None, budget_ms=0),
+        'feature.fit_club_vectors': lambda: engine.fit_club_vectors(clubs_df),
+        'feature.calculate_content_similarity':
+            lambda: engine.calculate_content_similarity(user_club_ids, events_df, clubs_df,
+                                                        text_features=text_features),
+        'feature.calculate_temporal_features': lambda: engine.calculate_temporal_features(events_df),
+        'feature.calculate_user_affinity':
+            lambda: engine.calculate_user_affinity(user_id, events_df, user_club_ids, history_df),
+        'feature.calculate_popularity_features':
+            lambda: engine.calculate_popularity_features(events_df, member_counts, event_counts),
+        'feature.combine_features':
+            lambda: engine.combine_features(content, temporal, affinity, popularity),
+        'score_events': lambda: recommender._score_events(features, events_df),
+        'format_recommendations':
+            lambda: recommender._format_recommendations(top, len(events_df), user_club_ids,
+                                                        datetime.now(timezone.utc), explain=True),
+    }
+
+
+def measure(fn: Callable[[], object]) -> Dict[str, float]:
+    """
+    Measure a single stage
+
+    Returns:
+        Dict with p50_ms, p99_ms, mean_ms, runs, peak_kib and alloc_blocks
+    """
+    # Warm-up run also decides how many repeats fit in the time budget
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    repeats = int(min(MAX_REPEATS, max(MIN_REPEATS, math.ceil(TIME_BUDGET_S / max(first, 1e-6)))))
+
+    # Collector off while timing (as timeit does): a full collection lands in
+    # whichever stage crosses the allocation threshold, not the one that caused it
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - t0) * 1000)
+    finally:
+        gc.enable()
+
+    # Memory is measured on a separate run since tracing skews timings
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    alloc_blocks = sum(max(0, stat.count_diff) for stat in after.compare_to(before, 'lineno'))
+
+    timings_arr = np.asarray(timings)
+    return {
+        'p50_ms': round(float(np.percentile(timings_arr, 50)), 3),
+        'p99_ms': round(float(np.percentile(timings_arr, 99)), 3),
+        'mean_ms': round(float(timings_arr.mean()), 3),
+        'runs': repeats,
+        'peak_kib': round(peak / 1024, 1),
+        'alloc_blocks': int(alloc_blocks),
+    }
+
+
+def run_case(n_events: int, n_clubs: int) -> Dict[str, Dict[str, float]]:
+    """Run every stage for one dataset size"""
+    dataset = SyntheticDataset(n_events=n_events, n_clubs=n_clubs)
+    stages = _build_stages(dataset)
+    return {name: measure(fn) for name, fn in stages.items()}
+
+
+def run(scale: str = 'small') -> Dict:
+    """Run all cases of a scale"""
+    _silence_logs()
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+        },
+        'cases': {},
+    }
+    for n_events, n_clubs in SCALES[scale]:
+        results['cases'][case_key(n_events, n_clubs)] = run_case(n_events, n_clubs)
+    return results
+
+
+def compare(current: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Compare one case against its baseline
+
+    Returns:
+        List of human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for stage, base in baseline.items():
+        cur = current.get(stage)
+        if cur is None:
+            continue
+        for metric, threshold in (('p50_ms', LATENCY_THRESHOLD), ('p99_ms', LATENCY_THRESHOLD * 2)):
+            limit = base[metric] * (1 + threshold)
+            if cur[metric] > limit and cur[metric] - base[metric] > LATENCY_FLOOR_MS:
+                regressions.append(f"{stage} {metric}: {cur[metric]:.2f} > {base[metric]:.2f} "
+                                   f"(+{threshold:.0%} allowed)")
+        limit = base['peak_kib'] * (1 + MEMORY_THRESHOLD)
+        if cur['peak_kib'] > limit and cur['peak_kib'] - base['peak_kib'] > MEMORY_FLOOR_KIB:
+            regressions.append(f"{stage} peak_kib: {cur['peak_kib']:.1f} > {base['peak_kib']:.1f} "
+                               f"(+{MEMORY_THRESHOLD:.0%} allowed)")
+    return regressions
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict:
+    """Load stored baseline, or an empty one if none exists"""
+    if not os.path.exists(path):
+        return {'cases': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results: Dict, path: str):
+    """Write results as JSON, merging cases into an existing file"""
+    existing = load_baseline(path)
+    existing.setdefault('cases', {}).update(results['cases'])
+    existing['meta'] = results['meta']
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(existing, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def _print_table(results: Dict):
+    header = f"{'stage':<40}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB':>12}{'allocs':>10}{'runs':>6}"
+    for key, stages in results['cases'].items():
+        print(f"\n== {key} ==")
+        print(header)
+        for stage, m in stages.items():
+            print(f"{stage:<40}{m['p50_ms']:>10.2f}{m['p99_ms']:>10.2f}"
+                  f"{m['peak_kib']:>12.1f}{m['alloc_blocks']:>10}{m['runs']:>6}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="UniMeet recommender benchmarks")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--output', help="Also write results JSON to this path")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Store these results as the new baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    results = run(args.scale)
+    _print_table(results)
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    for key, stages in results['cases'].items():
+        if key in baseline['cases']:
+            regressions += [f"[{key}] {r}" for r in compare(stages, baseline['cases'][key])]
+
+    if regressions:
+        print("\nRegressions detected:")
+        for r in regressions:
+            print(f"  {r}")
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
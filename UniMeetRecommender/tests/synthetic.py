@@ -0,0 +1,250 @@
+"""
+Synthetic datasets for UniMeet Recommender benchmarks
+Generates deterministic clubs, events and user history and serves them
+through an in-memory stand-in for DatabaseConnector
+"""
+from typing import Iterator, List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+from models.db_connector import EVENT_COLUMNS, compact_events, compact_history, concat_compact, to_epoch_seconds
+
+
+VOCABULARY = [
+    "yazılım", "robotik", "yapay", "zeka", "müzik", "tiyatro", "sinema", "fotoğraf",
+    "dans", "satranç", "doğa", "yürüyüş", "kamp", "girişimcilik", "ekonomi", "tarih",
+    "felsefe", "edebiyat", "şiir", "resim", "heykel", "gitar", "piyano", "koro",
+    "basketbol", "futbol", "voleybol", "yüzme", "tenis", "bisiklet", "oyun", "tasarım",
+    "mobil", "web", "veri", "bilim", "fizik", "kimya", "biyoloji", "matematik",
+    "astronomi", "uzay", "çevre", "gönüllü", "sosyal", "sorumluluk", "kariyer", "staj",
+    "mülakat", "liderlik", "iletişim", "sunum", "yarışma", "hackathon", "atölye", "seminer",
+    "konferans", "söyleşi", "konser", "festival", "turnuva", "gezi", "eğitim", "kurs",
+]
+
+LOCATIONS = ["Amfi A", "Amfi B", "Kütüphane", "Spor Salonu", "Konferans Salonu", "Kampüs Bahçesi"]
+
+
+def _sentence(rng: np.random.Generator, n_words: int) -> str:
+    """Build a pseudo-Turkish sentence from the benchmark vocabulary"""
+    return ' '.join(rng.choice(VOCABULARY, size=n_words))
+
+
+def _chunks(df: pd.DataFrame, chunk_size: Optional[int]) -> Iterator[pd.DataFrame]:
+    """Split a frame like a chunked read_sql would (at least one, possibly empty, chunk)"""
+    chunk_size = chunk_size or 5000
+    for start in range(0, max(len(df), 1), chunk_size):
+        yield df.iloc[start:start + chunk_size].reset_index(drop=True)
+
+
+class SyntheticDataset:
+    """Deterministic synthetic clubs, events, memberships and attendance"""
+
+    def __init__(self, n_events: int, n_clubs: int, n_users: int = 200, seed: int = 42):
+        """
+        Generate a dataset
+
+        Args:
+            n_events: Number of public, non-cancelled events
+            n_clubs: Number of clubs
+            n_users: Number of users with memberships and history
+            seed: RNG seed so every run sees the same data
+        """
+        self.n_events = n_events
+        self.n_clubs = n_clubs
+        self.n_users = n_users
+        self.now = datetime.now(timezone.utc)
+
+        rng = np.random.default_rng(seed)
+
+        club_ids = np.arange(1, n_clubs + 1)
+        self.clubs_df = pd.DataFrame({
+            'ClubId': club_ids,
+            'Name': [f"{_sentence(rng, 2).title()} Kulübü" for _ in club_ids],
+            'Description': [_sentence(rng, 25) for _ in club_ids],
+            'Purpose': [_sentence(rng, 12) for _ in club_ids],
+            'FoundedDate': [self.now - timedelta(days=int(d)) for d in rng.integers(100, 3000, n_clubs)],
+            'ManagerId': rng.integers(1, n_users + 1, n_clubs),
+        })
+
+        # Events spread from 60 days ago to 120 days ahead, popular clubs publish more
+        club_weights = rng.pareto(1.5, n_clubs) + 1
+        club_weights /= club_weights.sum()
+        event_clubs = rng.choice(club_ids, size=n_events, p=club_weights)
+        start_offsets = rng.uniform(-60, 120, n_events)
+        start_at = pd.to_datetime(
+            [self.now + timedelta(days=float(d)) for d in start_offsets], utc=True
+        )
+        club_names = dict(zip(self.clubs_df['ClubId'], self.clubs_df['Name']))
+
+        self.events_df = pd.DataFrame({
+            'EventId': np.arange(1, n_events + 1),
+            'Title': [_sentence(rng, 4).title() for _ in range(n_events)],
+            'Description': [_sentence(rng, 30) for _ in range(n_events)],
+            'Location': rng.choice(LOCATIONS, size=n_events),
+            'StartAt': start_at,
+            'EndAt': start_at + pd.Timedelta(hours=2),
+            'Quota': rng.integers(20, 300, n_events),
+            'ClubId': event_clubs,
+            'IsCancelled': False,
+            'IsPublic': True,
+            'CreatedByUserId': rng.integers(1, n_users + 1, n_events),
+            'CreatedAt': start_at - pd.Timedelta(days=14),
+            'ClubName': [club_names[c] for c in event_clubs],
+        }).sort_values('StartAt').reset_index(drop=True)
+
+        # Memberships: each user follows 0-8 clubs, weighted towards popular ones
+        self.memberships: Dict[int, List[int]] = {}
+        for user_id in range(1, n_users + 1):
+            n_follow = int(min(n_clubs, rng.integers(0, 9)))
+            self.memberships[user_id] = sorted(
+                int(c) for c in rng.choice(club_ids, size=n_follow, replace=False, p=club_weights)
+            )
+
+        # Attendance and favorites on past events
+        past_events = self.events_df[self.events_df['StartAt'] < self.now]
+        history_rows = []
+        if not past_events.empty:
+            for user_id in range(1, n_users + 1):
+                n_hist = int(min(len(past_events), rng.integers(0, 15)))
+                sampled = past_events.iloc[rng.choice(len(past_events), size=n_hist, replace=False)]
+                for _, event in sampled.iterrows():
+                    attended = bool(rng.random() < 0.8)
+                    favorited = bool(rng.random() < 0.3) or not attended
+                    history_rows.append({
+                        'UserId': user_id,
+                        'EventId': int(event['EventId']),
+                        'ClubId': int(event['ClubId']),
+                        'StartAt': event['StartAt'],
+                        'Attended': int(attended),
+                        'Favorited': int(favorited),
+                        'AttendedAt': event['StartAt'] if attended else pd.NaT,
+                        'FavoritedAt': event['StartAt'] - pd.Timedelta(days=1) if favorited else pd.NaT,
+                    })
+        self.history_df = pd.DataFrame(history_rows, columns=[
+            'UserId', 'EventId', 'ClubId', 'StartAt', 'Attended', 'Favorited', 'AttendedAt', 'FavoritedAt'
+        ])
+
+    def sample_user(self) -> int:
+        """Return a user who follows at least one club (the full pipeline path)"""
+        for user_id, clubs in self.memberships.items():
+            if clubs:
+                return user_id
+        return 1
+
+
+class InMemoryConnector:
+    """Drop-in replacement for DatabaseConnector backed by a SyntheticDataset"""
+
+    def __init__(self, dataset: SyntheticDataset):
+        self.data = dataset
+        self.config = {}
+
+    def test_connection(self) -> bool:
+        return True
+
+    def get_user_followed_clubs(self, user_id: int) -> List[int]:
+        return list(self.data.memberships.get(user_id, []))
+
+    def get_club_details(self, club_ids: Optional[List[int]] = None) -> pd.DataFrame:
+        df = self.data.clubs_df
+        if club_ids:
+            df = df[df['ClubId'].isin(club_ids)]
+        return df.copy()
+
+    def get_all_events(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        return concat_compact(list(self.iter_events(filters)))
+
+    def iter_events(self, filters: Optional[Dict] = None,
+                    chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        df = self.data.events_df
+        if filters:
+            if filters.get('min_date'):
+                df = df[df['StartAt'] >= filters['min_date']]
+            if filters.get('max_date'):
+                df = df[df['StartAt'] <= filters['max_date']]
+            if filters.get('exclude_event_ids'):
+                df = df[~df['EventId'].isin(list(filters['exclude_event_ids']))]
+        for chunk in _chunks(df[EVENT_COLUMNS], chunk_size):
+            yield compact_events(chunk)
+
+    def get_event_texts(self, event_ids: List[int]) -> pd.DataFrame:
+        df = self.data.events_df
+        df = df[df['EventId'].isin(list(event_ids))]
+        return df[['EventId', 'Title', 'Description', 'Location']].fillna('').reset_index(drop=True)
+
+    def get_event(self, event_id: int) -> Optional[Dict]:
+        rows = self.data.events_df[self.data.events_df['EventId'] == event_id]
+        if rows.empty:
+            return None
+        return rows[['EventId', 'ClubId', 'Title', 'Description', 'Location']].iloc[0].to_dict()
+
+    def iter_event_texts(self, min_date: Optional[datetime] = None,
+                         chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        df = self.data.events_df
+        if min_date:
+            df = df[df['StartAt'] >= min_date]
+        yield from _chunks(df[['EventId', 'Title', 'Description', 'Location']].fillna(''), chunk_size)
+
+    def _engagement(self, days_back: int) -> pd.DataFrame:
+        history = self.data.history_df
+        history = history[history['StartAt'] >= self.data.now - timedelta(days=days_back)]
+        attended = history[history['Attended'] == 1]
+        favorited = history[history['Favorited'] == 1]
+        return pd.DataFrame({
+            'UserId': np.concatenate([attended['UserId'], favorited['UserId']]).astype(np.int32),
+            'EventId': np.concatenate([attended['EventId'], favorited['EventId']]).astype(np.int32),
+            'ClubId': np.concatenate([attended['ClubId'], favorited['ClubId']]).astype(np.int32),
+            'CreatedAt': to_epoch_seconds(pd.concat([attended['AttendedAt'], favorited['FavoritedAt']])),
+        })
+
+    def iter_engagement(self, days_back: int = 365, user_ids: Optional[List[int]] = None,
+                        chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        rows = self._engagement(days_back)
+        if user_ids is not None:
+            rows = rows[rows['UserId'].isin(list(user_ids))]
+        yield from _chunks(rows.reset_index(drop=True), chunk_size)
+
+    def iter_memberships(self, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        rows = [(user_id, club_id) for user_id, clubs in self.data.memberships.items() for club_id in clubs]
+        yield from _chunks(pd.DataFrame(rows, columns=['UserId', 'ClubId'], dtype=np.int32), chunk_size)
+
+    def iter_club_attendance(self, days_back: int = 365,
+                             chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        history = self.data.history_df
+        history = history[(history['StartAt'] >= self.data.now - timedelta(days=days_back)) &
+                          (history['Attended'] == 1)]
+        counts = history.groupby(['UserId', 'ClubId'])['EventId'].nunique().reset_index(name='Attended')
+        yield from _chunks(counts.astype(np.int32), chunk_size)
+
+    def get_engaged_users_since(self, since: datetime) -> Optional[List[int]]:
+        rows = self._engagement(days_back=36500)
+        return sorted(set(rows.loc[rows['CreatedAt'] >= int(since.timestamp()), 'UserId'].tolist()))
+
+    def get_user_event_history(self, user_id: int, days_back: int = 365) -> pd.DataFrame:
+        history = self.data.history_df
+        cutoff = self.data.now - timedelta(days=days_back)
+        history = history[(history['UserId'] == user_id) & (history['StartAt'] >= cutoff)]
+        return compact_history(
+            history[['EventId', 'ClubId', 'Attended', 'Favorited']].drop_duplicates().reset_index(drop=True)
+        )
+
+    def get_user_favorites(self, user_id: int) -> List[int]:
+        history = self.data.history_df
+        mask = (history['UserId'] == user_id) & (history['Favorited'] == 1)
+        return history.loc[mask, 'EventId'].tolist()
+
+    def get_club_member_counts(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for clubs in self.data.memberships.values():
+            for club_id in clubs:
+                counts[club_id] = counts.get(club_id, 0) + 1
+        return counts
+
+    def get_club_event_counts(self, days_back: int = 30) -> Dict[int, int]:
+        cutoff = self.data.now - timedelta(days=days_back)
+        recent = self.data.events_df[self.data.events_df['StartAt'] >= cutoff]
+        return {int(k): int(v) for k, v in recent.groupby('ClubId').size().items()}
+
+    def close(self):
+        pass
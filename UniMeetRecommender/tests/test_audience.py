@@ -0,0 +1,106 @@
+"""
+Audience index tests
+Ranking of all users against one event: club followers first, past attendance
+and co-engagement with the user's clubs next, users without any signal last.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.audience import AudienceIndex
+from models.feature_engine import FeatureEngine
+
+WEIGHTS = {'content_similarity': 0.20, 'title_match': 0.15, 'user_past_behavior': 0.15,
+           'club_membership_match': 0.30, 'collaborative': 0.10}
+
+MEMBERSHIPS = [(1, 10), (2, 10), (2, 20), (3, 20), (4, 30)]
+# (UserId, ClubId, attended events); user 5 attends club 10 without following it
+ATTENDANCE = [(2, 10, 1), (2, 20, 4), (5, 10, 2)]
+
+CLUBS = pd.DataFrame({
+    'ClubId': [10, 20, 30],
+    'Name': ['Robotik', 'Tiyatro', 'Drone Takımı'],
+    'Description': ['robot drone elektronik', 'sahne oyun prova', 'drone yarışma robot'],
+    'Purpose': ['', '', ''],
+})
+
+EVENT = {'EventId': 1, 'ClubId': 10, 'Title': 'Robot Drone Atölyesi', 'Description': '', 'Location': ''}
+
+
+class MembershipConnector:
+    def iter_memberships(self):
+        yield pd.DataFrame(MEMBERSHIPS, columns=['UserId', 'ClubId'], dtype=np.int32)
+
+    def iter_club_attendance(self, days_back: int = 365):
+        yield pd.DataFrame(ATTENDANCE, columns=['UserId', 'ClubId', 'Attended'], dtype=np.int32)
+
+
+class FixedCoEngagement:
+    """Club 30 is co-engaged with club 10"""
+
+    club_weight = 0.5
+
+    def club_similarities(self, club_id: int) -> Dict[int, float]:
+        return {30: 0.5} if club_id == 10 else {}
+
+
+def make_index() -> AudienceIndex:
+    engine = FeatureEngine({})
+    engine.fit_club_vectors(CLUBS)
+    return AudienceIndex(MembershipConnector(), engine, FixedCoEngagement(), {'scoring_weights': WEIGHTS})
+
+
+@pytest.fixture
+def index() -> AudienceIndex:
+    index = make_index()
+    assert index.refresh()
+    return index
+
+
+def by_user(ranking: pd.DataFrame) -> Dict[int, Dict]:
+    return ranking.set_index('UserId').to_dict('index')
+
+
+def test_audience_is_none_before_the_first_build(monkeypatch):
+    index = make_index()
+    monkeypatch.setattr(index, '_refresh_in_background', lambda: None)
+    assert index.audience(EVENT, 10) is None
+
+
+def test_followers_rank_first_and_users_without_signal_last(index):
+    ranking = index.audience(EVENT, 10)
+    users = ranking['UserId'].tolist()
+    assert sorted(users) == [1, 2, 3, 4, 5]
+    assert set(users[:2]) == {1, 2}
+    assert users[-1] == 3
+    assert ranking['score'].is_monotonic_decreasing
+
+    features = by_user(ranking)
+    assert features[1]['is_following_club'] == 1.0
+    assert features[3]['score'] == 0.0
+    # Past attendance counts without membership
+    assert features[5]['is_following_club'] == 0.0
+    assert features[5]['past_club_attendance'] == 2.0
+    assert features[5]['score'] > 0.0
+    # Co-engagement reaches the follower of a similar club
+    assert features[4]['collaborative_score'] == pytest.approx(0.25)
+    assert features[1]['collaborative_score'] == 0.0
+    # Content follows the interest vector of the followed clubs
+    assert features[1]['content_similarity'] > features[2]['content_similarity'] > 0.0
+
+
+def test_limit_keeps_the_best_users(index):
+    full = index.audience(EVENT, 10)
+    assert index.audience(EVENT, 2)['UserId'].tolist() == full['UserId'].tolist()[:2]
+    assert index.audience(EVENT, 0).empty
+
+
+def test_event_of_an_unknown_club_ranks_by_content_only(index):
+    ranking = index.audience({**EVENT, 'ClubId': 99}, 10)
+    assert len(ranking) == 5
+    assert not ranking['is_following_club'].any()
+    assert not ranking['collaborative_score'].any()
+    # Followers of the robotics clubs still match the event text
+    assert set(ranking['UserId'].tolist()[:3]) == {1, 2, 4}
@@ -0,0 +1,35 @@
+"""
+Benchmark regression gate
+Runs the benchmark suite at BENCH_SCALE (default: small) and fails when any
+stage regresses beyond the configured thresholds against the stored baseline.
+"""
+import os
+import pytest
+
+from tests import benchmark
+
+
+SCALE = os.getenv('BENCH_SCALE', 'small')
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    benchmark._silence_logs()
+    return benchmark.load_baseline()
+
+
+@pytest.mark.parametrize('n_events,n_clubs', benchmark.SCALES[SCALE],
+                         ids=[benchmark.case_key(e, c) for e, c in benchmark.SCALES[SCALE]])
+def test_pipeline_has_no_regressions(baseline, n_events, n_clubs):
+    key = benchmark.case_key(n_events, n_clubs)
+    results = benchmark.run_case(n_events, n_clubs)
+
+    assert set(results) >= {'recommend', 'score_events', 'format_recommendations'}
+    for metrics in results.values():
+        assert metrics['p50_ms'] <= metrics['p99_ms']
+
+    if key not in baseline['cases']:
+        pytest.skip(f"No baseline recorded for {key}")
+
+    regressions = benchmark.compare(results, baseline['cases'][key])
+    assert not regressions, "\n".join(regressions)
@@ -0,0 +1,112 @@
+"""
+Candidate index tests
+Per-source recall caps of CandidateIndex.retrieve (followed clubs, lexical
+matches, popular slice), their union in StartAt order and the request filters.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import pandas as pd
+import pytest
+
+from models.candidate_index import CandidateIndex
+from models.db_connector import compact_events
+
+NOW = datetime.now(timezone.utc)
+
+# EventId -> (ClubId, days ahead, preprocessed text); EventIds follow StartAt order
+EVENTS = {
+    1: (10, 1, 'satranc turnuva'),
+    2: (10, 2, 'satranc egitim'),
+    3: (10, 3, 'satranc kulup'),
+    4: (10, 4, 'satranc sohbet'),
+    5: (20, 5, 'robotik atolye drone'),
+    6: (20, 6, 'robotik yarisma'),
+    7: (30, 7, 'drone ucus'),
+    8: (30, 8, 'tiyatro gosteri'),
+    9: (40, 9, 'konser muzik'),
+    10: (40, 10, 'konser caz'),
+}
+
+
+class FakeConnector:
+    def get_all_events(self, filters: Dict = None) -> pd.DataFrame:
+        return compact_events(pd.DataFrame({
+            'EventId': list(EVENTS),
+            'ClubId': [club_id for club_id, _, _ in EVENTS.values()],
+            'ClubName': [f"Kulüp {club_id}" for club_id, _, _ in EVENTS.values()],
+            'StartAt': pd.to_datetime([NOW + timedelta(days=days) for _, days, _ in EVENTS.values()], utc=True),
+        }))
+
+
+class FakeEventStore:
+    def texts(self, event_ids: List[int]) -> List[str]:
+        return [EVENTS[int(event_id)][2] for event_id in event_ids]
+
+
+class FakeFallback:
+    def __init__(self, ranking: List[int]):
+        self.ranking = ranking
+
+    def top(self, limit: int, filters: Dict = None, build: bool = True):
+        excluded = set((filters or {}).get('exclude_event_ids') or ())
+        ranked = [(event_id, 1.0) for event_id in self.ranking if event_id not in excluded]
+        return ranked[:limit], len(self.ranking)
+
+
+def make_index(fallback_ranking=(), **settings) -> CandidateIndex:
+    defaults = {'followed_candidates': 2, 'lexical_candidates': 1, 'popular_candidates': 1, 'max_token_df': 0.5}
+    return CandidateIndex(FakeConnector(), FakeEventStore(), FakeFallback(list(fallback_ranking)),
+                          {'retrieval': {**defaults, **settings}})
+
+
+def retrieved(index: CandidateIndex, club_ids=(), tokens=(), filters=None) -> List[int]:
+    return index.retrieve(list(club_ids), frozenset(tokens), filters)['EventId'].tolist()
+
+
+def make_refreshed(fallback_ranking=(), **settings) -> CandidateIndex:
+    index = make_index(fallback_ranking, **settings)
+    assert index.refresh()
+    return index
+
+
+@pytest.fixture
+def index() -> CandidateIndex:
+    return make_refreshed()
+
+
+def test_retrieve_returns_none_before_the_first_build(monkeypatch):
+    index = make_index()
+    monkeypatch.setattr(index, '_refresh_in_background', lambda: None)
+    assert not index.ready
+    assert index.retrieve([10], frozenset({'satranc'})) is None
+
+
+def test_followed_clubs_keep_the_soonest_events_up_to_the_cap(index):
+    assert retrieved(index, club_ids=[10]) == [1, 2]
+    assert retrieved(make_refreshed(followed_candidates=3), club_ids=[10, 40]) == [1, 2, 3]
+
+
+def test_lexical_matches_keep_the_best_idf_weighted_events(index):
+    # Event 5 shares both rare tokens; events 6 and 7 share one each
+    assert retrieved(index, tokens={'robotik', 'drone'}) == [5]
+    assert retrieved(make_refreshed(lexical_candidates=3), tokens={'robotik', 'drone'}) == [5, 6, 7]
+
+
+def test_tokens_in_too_many_events_are_ignored(index):
+    # 'satranc' is in 4 of 10 events, over max_token_df 0.3
+    assert retrieved(make_refreshed(max_token_df=0.3), tokens={'satranc'}) == []
+    # Under the threshold it counts; equal scores still obey the cap
+    assert len(retrieved(index, tokens={'satranc'})) == 1
+
+
+def test_sources_are_merged_in_start_order():
+    index = make_refreshed([9, 8], popular_candidates=1)
+    assert retrieved(index, club_ids=[20], tokens={'tiyatro'}) == [5, 6, 8, 9]
+
+
+def test_filters_apply_before_the_caps(index):
+    assert retrieved(index, club_ids=[10], filters={'exclude_event_ids': [1, 2]}) == [3, 4]
+    filters = {'exclude_event_ids': [1, 2], 'max_date': NOW + timedelta(days=3, hours=12)}
+    assert retrieved(index, club_ids=[10], tokens={'konser'}, filters=filters) == [3]
+
@@ -0,0 +1,143 @@
+"""
+Circuit breaker tests
+State transitions of utils.circuit_breaker on a fake clock, and the stale
+last-good fallback of DatabaseConnector while queries fail or the circuit is open.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+
+from models import db_connector
+from models.db_connector import DatabaseConnector, reset_stale_reads, stale_reads
+from utils import circuit_breaker
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    """Stands in for the time module of utils.circuit_breaker"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+
+def make_breaker(**settings) -> CircuitBreaker:
+    defaults = {'window_size': 4, 'min_calls': 4, 'failure_rate': 0.5, 'slow_call_ms': 100,
+                'slow_call_rate': 0.5, 'open_seconds': 30, 'half_open_probes': 1}
+    return CircuitBreaker('test', {**defaults, **settings})
+
+
+def test_opens_on_failure_rate_then_recovers_through_half_open(clock):
+    breaker = make_breaker()
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_success(0.01)
+    assert breaker.allow()
+    breaker.record_failure()
+    # Below min_calls nothing is judged yet
+    assert breaker.state == CLOSED
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.advance(29)
+    assert breaker.state == OPEN
+    clock.advance(1)
+    assert breaker.state == HALF_OPEN
+
+    # Only half_open_probes calls get through while half-open
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success(0.01)
+    assert breaker.state == CLOSED
+    assert breaker.status()['window_calls'] == 0
+
+
+def test_failed_or_slow_probe_reopens(clock):
+    breaker = make_breaker(min_calls=1, failure_rate=1.0)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.advance(30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    # The cool-down restarts from the failed probe
+    clock.advance(29)
+    assert breaker.state == OPEN
+    clock.advance(1)
+    assert breaker.allow()
+    breaker.record_success(0.5)
+    assert breaker.state == OPEN
+
+
+def test_opens_on_slow_call_rate(clock):
+    breaker = make_breaker()
+    for elapsed in (0.01, 0.01, 0.2, 0.2):
+        assert breaker.allow()
+        breaker.record_success(elapsed)
+    assert breaker.state == OPEN
+    assert breaker.status()['open_for_s'] == 0.0
+
+
+@pytest.fixture
+def connector(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'unimeet.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE ClubMembers (UserId INTEGER, ClubId INTEGER)"))
+        conn.execute(text("INSERT INTO ClubMembers VALUES (1, 10), (1, 11), (2, 20)"))
+    monkeypatch.setattr(DatabaseConnector, '_create_engine', lambda self, connection_string: engine)
+    connector = DatabaseConnector('unused', {
+        'circuit_breaker': {'window_size': 2, 'min_calls': 2, 'failure_rate': 0.5, 'open_seconds': 30}
+    })
+    yield connector
+    engine.dispose()
+
+
+def test_failed_queries_serve_the_last_good_result_as_stale(connector):
+    reset_stale_reads()
+    assert sorted(connector.get_user_followed_clubs(1)) == [10, 11]
+    assert not stale_reads()
+
+    with connector.engine.begin() as conn:
+        conn.execute(text("DROP TABLE ClubMembers"))
+
+    # A query error serves the last good result, marked stale (and trips the
+    # breaker: one failure in a window of two)
+    reset_stale_reads()
+    assert sorted(connector.get_user_followed_clubs(1)) == [10, 11]
+    assert stale_reads()
+    assert connector.breaker.state == OPEN
+
+    # So does a call rejected by the open circuit
+    reset_stale_reads()
+    assert sorted(connector.get_user_followed_clubs(1)) == [10, 11]
+    assert stale_reads()
+
+    # Without a last good result the default is returned, not marked stale
+    reset_stale_reads()
+    assert connector.get_user_followed_clubs(2) == []
+    assert not stale_reads()
+
+
+def test_recover_without_a_cache_key_returns_the_default(connector):
+    reset_stale_reads()
+    error = db_connector.CircuitOpenError("Database circuit breaker is open")
+    assert connector._recover(None, 'default', "Error", error) == 'default'
+    assert connector._recover(('missing',), [], "Error", error) == []
+    assert not stale_reads()
@@ -0,0 +1,110 @@
+"""
+Co-engagement model tests
+An incremental update (swapping the rows of users who engaged since the
+watermark) must serve the same similarities as a full rebuild of the same data.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.co_engagement import CoEngagementModel
+
+# (UserId, EventId, ClubId, CreatedAt epoch seconds)
+INITIAL = [
+    (1, 100, 10, 1000), (1, 101, 10, 1010), (1, 200, 20, 1020),
+    (2, 100, 10, 1030), (2, 200, 20, 1040),
+    (3, 101, 10, 1050), (3, 300, 30, 1060),
+    (4, 300, 30, 1070),
+]
+LATER = [
+    # Existing users engage again, one with a club and event not seen before
+    (2, 300, 30, 2000),
+    (4, 101, 10, 2010), (4, 400, 40, 2020),
+    # New user
+    (5, 200, 20, 2030), (5, 400, 40, 2040),
+]
+
+
+class EngagementConnector:
+    """iter_engagement / get_engaged_users_since over a list of rows"""
+
+    def __init__(self, rows: List[Tuple[int, int, int, int]]):
+        self.rows = list(rows)
+        self.unavailable = False
+
+    def _frame(self, user_ids: Optional[List[int]] = None) -> pd.DataFrame:
+        rows = [row for row in self.rows if user_ids is None or row[0] in user_ids]
+        return pd.DataFrame(rows, columns=['UserId', 'EventId', 'ClubId', 'CreatedAt'], dtype=np.int64)
+
+    def iter_engagement(self, days_back: int = 365, user_ids: Optional[List[int]] = None):
+        yield self._frame(user_ids)
+
+    def get_engaged_users_since(self, since: datetime) -> Optional[List[int]]:
+        if self.unavailable:
+            return None
+        return sorted({row[0] for row in self.rows if row[3] >= int(since.timestamp())})
+
+
+def make_model(connector: EngagementConnector) -> CoEngagementModel:
+    # No neighbor cap: ties would be cut differently under different matrix indexes
+    return CoEngagementModel(connector, {'collaborative': {'max_neighbors': 0}})
+
+
+def similarities(model: CoEngagementModel) -> Tuple[Dict, Dict]:
+    """Club and event similarities keyed by ID pairs, independent of matrix indexes"""
+    club_codes, event_codes, club_similarity, event_similarity = model._serving
+
+    def by_id(codes: Dict[int, int], matrix) -> Dict[Tuple[int, int], float]:
+        ids = {code: item_id for item_id, code in codes.items()}
+        coo = matrix.tocoo()
+        return {(ids[row], ids[col]): round(float(value), 6)
+                for row, col, value in zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist())}
+
+    return by_id(club_codes, club_similarity), by_id(event_codes, event_similarity)
+
+
+@pytest.fixture
+def connector() -> EngagementConnector:
+    return EngagementConnector(INITIAL)
+
+
+def test_incremental_update_matches_a_full_rebuild(connector):
+    model = make_model(connector)
+    assert model.refresh(full=True)
+
+    connector.rows += LATER
+    assert model.refresh()
+
+    rebuilt = make_model(EngagementConnector(connector.rows))
+    assert rebuilt.refresh(full=True)
+    assert similarities(model) == similarities(rebuilt)
+    assert (model._club_counts != model._club_counts.T).nnz == 0
+    assert model._watermark == 2040
+
+    events_df = pd.DataFrame({'EventId': [100, 200, 300, 400], 'ClubId': [10, 20, 30, 40]})
+    pd.testing.assert_frame_equal(model.score(events_df, [10], [101]), rebuilt.score(events_df, [10], [101]))
+
+
+def test_repeated_update_without_new_engagement_changes_nothing(connector):
+    model = make_model(connector)
+    assert model.refresh(full=True)
+    before = similarities(model)
+
+    # The user of the watermark row is re-read and swapped with identical rows
+    assert model.refresh()
+    assert similarities(model) == before
+    assert model._user_events.sum() == len(INITIAL)
+
+
+def test_update_fails_when_engaged_users_are_unavailable(connector):
+    model = make_model(connector)
+    assert model.refresh(full=True)
+    before = similarities(model)
+
+    connector.rows += LATER
+    connector.unavailable = True
+    assert not model.refresh()
+    assert similarities(model) == before
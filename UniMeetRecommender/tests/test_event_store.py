@@ -0,0 +1,54 @@
+"""
+Event text store tests
+Keyword tokens and MinHash signatures are encoded once when a text is loaded
+and served from the cache afterwards.
+"""
+import numpy as np
+import pytest
+
+from models.event_store import EventTextStore
+from models.feature_engine import FeatureEngine
+from tests.synthetic import InMemoryConnector, SyntheticDataset
+
+
+@pytest.fixture(scope='module')
+def dataset() -> SyntheticDataset:
+    return SyntheticDataset(n_events=200, n_clubs=10, n_users=10)
+
+
+def make_store(dataset: SyntheticDataset, mode: str) -> EventTextStore:
+    engine = FeatureEngine({'content_settings': {'keyword_overlap': mode}})
+    engine.fit_club_vectors(dataset.clubs_df)
+    return EventTextStore(InMemoryConnector(dataset), engine, 1000)
+
+
+def test_minhash_signatures_are_cached_at_load(dataset, monkeypatch):
+    store = make_store(dataset, 'minhash')
+    overlap = store.feature_engine.keyword_overlap
+    event_ids = dataset.events_df['EventId'].tolist()[:50] + [999999]
+    store.features(event_ids)
+
+    computed = []
+    original = overlap.signatures
+    monkeypatch.setattr(overlap, 'signatures', lambda rows: computed.append(rows.shape[0]) or original(rows))
+    features = store.features(event_ids)
+    user_text = store.feature_engine.build_interest_text(dataset.clubs_df.head(2))
+    scores = overlap.row_scores(user_text, features.tokens, features.cardinality, features.signatures)
+
+    # Only the query is hashed per request
+    assert computed == [1]
+    np.testing.assert_array_equal(features.signatures, original(features.tokens))
+    # An event without text keeps the empty-row signature and scores 0
+    assert (features.signatures[-1] == np.iinfo(np.uint64).max).all()
+    assert scores[-1] == 0.0
+    np.testing.assert_array_equal(features.rows(10, 20).signatures, features.signatures[10:20])
+
+
+def test_signatures_count_towards_the_byte_estimate(dataset):
+    event_ids = dataset.events_df['EventId'].tolist()
+    exact, minhash = make_store(dataset, 'exact'), make_store(dataset, 'minhash')
+    assert exact.features(event_ids).signatures is None
+    minhash.features(event_ids)
+
+    permutations = minhash.feature_engine.keyword_overlap.permutations
+    assert minhash.nbytes - exact.nbytes == len(event_ids) * permutations * 8
@@ -0,0 +1,126 @@
+"""
+User profile store tests
+Profiles are reused until memberships, attendance or the club vectors change,
+explicit invalidation drops them, and the LRU keeps its byte count.
+"""
+from typing import Dict, List
+
+import pandas as pd
+import pytest
+
+from models.feature_engine import FeatureEngine
+from models.profile_store import UserProfileStore
+
+CLUBS = pd.DataFrame({
+    'ClubId': [10, 20, 30],
+    'Name': ['Robotik', 'Tiyatro', 'Satranç'],
+    'Description': ['robot drone elektronik', 'sahne oyun prova', 'turnuva hamle'],
+    'Purpose': ['', '', ''],
+})
+
+
+def history(*attended_events) -> pd.DataFrame:
+    """History frame of attended (EventId, ClubId) pairs"""
+    return pd.DataFrame({
+        'EventId': [event_id for event_id, _ in attended_events],
+        'ClubId': [club_id for _, club_id in attended_events],
+        'Attended': [1] * len(attended_events),
+        'Favorited': [0] * len(attended_events),
+    })
+
+
+class ProfileConnector:
+    """Memberships and history looked up when the caller does not pass them"""
+
+    def __init__(self):
+        self.memberships: Dict[int, List[int]] = {1: [10], 2: [20], 3: [10, 30]}
+        self.histories: Dict[int, pd.DataFrame] = {}
+        self.lookups = 0
+
+    def get_user_followed_clubs(self, user_id: int) -> List[int]:
+        self.lookups += 1
+        return list(self.memberships.get(user_id, []))
+
+    def get_user_event_history(self, user_id: int, days_back: int = 365) -> pd.DataFrame:
+        return self.histories.get(user_id, history())
+
+
+@pytest.fixture
+def engine() -> FeatureEngine:
+    return FeatureEngine({})
+
+
+def make_store(engine: FeatureEngine, **settings) -> UserProfileStore:
+    return UserProfileStore(engine, ProfileConnector(), lambda: CLUBS, settings)
+
+
+def test_profile_is_reused_until_its_inputs_change(engine):
+    store = make_store(engine)
+    profile = store.get(1)
+    # Club vectors are fitted on first use; the profile names that version
+    assert engine.vectors_version == 1
+    assert profile.club_ids == (10,)
+    assert 'robotik' in profile.interest_tokens
+    assert store.get(1) is profile
+
+    store.db.memberships[1] = [10, 20]
+    followed_more = store.get(1)
+    assert followed_more is not profile
+    assert followed_more.club_ids == (10, 20)
+    assert 'tiyatro' in followed_more.interest_tokens
+
+    store.db.histories[1] = history((500, 30), (501, 30))
+    attended = store.get(1)
+    assert attended is not followed_more
+    assert attended.club_attendance == {30: 2}
+    assert store.get(1) is attended
+    assert len(store) == 1
+
+
+def test_refitted_club_vectors_rebuild_profiles(engine):
+    store = make_store(engine)
+    profile = store.get(1)
+    engine.fit_club_vectors(CLUBS)
+    rebuilt = store.get(1)
+    assert rebuilt is not profile
+    assert rebuilt.fingerprint[0] == engine.vectors_version == 2
+
+
+def test_memberships_passed_by_the_caller_skip_the_lookup(engine):
+    store = make_store(engine)
+    profile = store.get(3, [30, 10], history())
+    assert store.db.lookups == 0
+    assert profile.club_ids == (10, 30)
+    # The same clubs in another order identify the same profile
+    assert store.get(3, [10, 30], history()) is profile
+
+
+def test_invalidate_drops_the_given_users_or_all(engine):
+    store = make_store(engine)
+    profiles = {user_id: store.get(user_id) for user_id in (1, 2, 3)}
+    total = store.status()['bytes']
+    assert total == sum(profile.nbytes for profile in profiles.values())
+
+    assert store.invalidate([2, 99]) == 1
+    assert len(store) == 2
+    assert store.status()['bytes'] == total - profiles[2].nbytes
+    assert store.get(1) is profiles[1]
+    assert store.get(2) is not profiles[2]
+
+    assert store.invalidate() == 3
+    assert len(store) == 0
+    assert store.status()['bytes'] == 0
+    assert store.get(1) is not profiles[1]
+
+
+def test_least_recently_used_profiles_are_evicted(engine):
+    store = make_store(engine, max_users=2)
+    first = store.get(1)
+    store.get(2)
+    assert store.get(1) is first
+    store.get(3)
+
+    # User 2 was the least recently used
+    assert list(store._profiles) == [1, 3]
+    assert store.get(1) is first
+    assert store.status()['bytes'] == sum(profile.nbytes for profile in store._profiles.values())
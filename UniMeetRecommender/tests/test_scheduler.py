@@ -0,0 +1,155 @@
+"""
+Workload scheduler tests
+Strict priority between classes, per-class concurrency limits, nested slots
+and the 503 / Retry-After answer of rejected endpoints.
+"""
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import app as service
+from utils.scheduler import SchedulerRejected, WorkloadScheduler, scheduler
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not reached in time")
+        time.sleep(0.005)
+
+
+class Holder:
+    """Thread that takes a slot and keeps it until released"""
+
+    def __init__(self, sched: WorkloadScheduler, workload: str):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.error = None
+        self._sched = sched
+        self._workload = workload
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            with self._sched.slot(self._workload):
+                self.started.set()
+                self.release.wait(5)
+        except SchedulerRejected as e:
+            self.error = e
+
+    def finish(self):
+        self.release.set()
+        self.thread.join(5)
+
+
+def running(sched: WorkloadScheduler, workload: str) -> int:
+    return sched.status()['workloads'][workload]['running']
+
+
+@pytest.fixture
+def sched():
+    sched = WorkloadScheduler()
+    sched.configure({
+        'interactive': {'max_concurrent': 1, 'max_queue': 10, 'queue_timeout_seconds': 5},
+        'batch': {'max_concurrent': 1, 'max_queue': 10, 'queue_timeout_seconds': 5},
+        'background': {'max_concurrent': 1, 'max_queue': 10, 'queue_timeout_seconds': 5},
+    })
+    return sched
+
+
+def test_queued_interactive_work_starts_before_queued_batch_work(sched):
+    batch = Holder(sched, 'batch')
+    interactive = Holder(sched, 'interactive')
+    wait_until(lambda: batch.started.is_set() and interactive.started.is_set())
+
+    queued_batch = Holder(sched, 'batch')
+    wait_until(lambda: sched.waiting('batch') == 1)
+    queued_interactive = Holder(sched, 'interactive')
+    wait_until(lambda: sched.waiting('interactive') == 1)
+
+    # A free batch slot is not taken while interactive work is waiting
+    batch.finish()
+    time.sleep(0.05)
+    assert not queued_batch.started.is_set()
+    assert running(sched, 'batch') == 0
+
+    # Once the interactive request is admitted, batch work may start too
+    interactive.finish()
+    wait_until(queued_interactive.started.is_set)
+    wait_until(queued_batch.started.is_set)
+    queued_interactive.finish()
+    queued_batch.finish()
+
+
+def test_max_concurrent_limits_running_work(sched):
+    sched.configure({'batch': {'max_concurrent': 2, 'max_queue': 10, 'queue_timeout_seconds': 5}})
+    holders = [Holder(sched, 'batch') for _ in range(4)]
+    wait_until(lambda: running(sched, 'batch') == 2 and sched.waiting('batch') == 2)
+
+    holders[0].finish()
+    holders[1].finish()
+    wait_until(lambda: running(sched, 'batch') == 2 and sched.waiting('batch') == 0)
+    for holder in holders[2:]:
+        holder.finish()
+    assert running(sched, 'batch') == 0
+    assert all(holder.error is None for holder in holders)
+
+
+def test_nested_slots_reuse_the_outer_slot(sched):
+    with sched.slot('batch'):
+        with sched.slot('batch'):
+            with sched.slot('interactive'):
+                assert running(sched, 'batch') == 1
+                assert running(sched, 'interactive') == 0
+        assert running(sched, 'batch') == 1
+    assert running(sched, 'batch') == 0
+
+
+def test_full_queue_rejects_and_slow_queue_times_out(sched):
+    sched.configure({'batch': {'max_concurrent': 1, 'max_queue': 0, 'queue_timeout_seconds': 5},
+                     'background': {'max_concurrent': 1, 'max_queue': 10, 'queue_timeout_seconds': 0.05}})
+    batch = Holder(sched, 'batch')
+    background = Holder(sched, 'background')
+    wait_until(lambda: running(sched, 'batch') == 1 and running(sched, 'background') == 1)
+
+    with pytest.raises(SchedulerRejected) as rejected:
+        with sched.slot('batch'):
+            pass
+    assert rejected.value.reason == 'queue_full'
+
+    with pytest.raises(SchedulerRejected) as rejected:
+        with sched.slot('background'):
+            pass
+    assert rejected.value.reason == 'timeout'
+    assert sched.waiting('background') == 0
+    assert sched.run('background', lambda: 'ran') is None
+
+    batch.finish()
+    background.finish()
+
+
+def test_rejected_endpoint_answers_503_with_retry_after():
+    flask_app = Flask(__name__)
+
+    @flask_app.route('/batch-job')
+    @service.scheduled('batch')
+    def batch_job():
+        return 'done'
+
+    scheduler.configure({'batch': {'max_concurrent': 1, 'max_queue': 0}})
+    holder = Holder(scheduler, 'batch')
+    try:
+        wait_until(lambda: running(scheduler, 'batch') == 1)
+        response = flask_app.test_client().get('/batch-job')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == service.SCHEDULER_RETRY_AFTER['batch']
+        assert response.get_json() == {'error': 'Service busy', 'workload': 'batch', 'reason': 'queue_full'}
+    finally:
+        holder.finish()
+        scheduler.configure({})
+
+    assert flask_app.test_client().get('/batch-job').data == b'done'
@@ -0,0 +1,53 @@
+"""
+Text normalizer tests
+Turkish casing (İ/I and i/ı), accent folding to ASCII and stopwords normalized
+like the documents they filter.
+"""
+import pytest
+
+from models.feature_engine import FeatureEngine
+from utils.text_normalizer import configured_stopwords, normalize_text
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('İSTANBUL', 'istanbul'),
+    ('İzmir', 'izmir'),
+    ('IŞIK', 'isik'),
+    ('ışık', 'isik'),
+    ('Işık', 'isik'),
+    ('isik', 'isik'),
+    ('ÇİĞDEM ÖĞÜT', 'cigdem ogut'),
+    ('Müzik', 'muzik'),
+    ('Kâğıt Îmâ Ûmit', 'kagit ima umit'),
+])
+def test_turkish_casing_and_folding(raw, expected):
+    assert normalize_text(raw) == expected
+
+
+def test_dotted_capital_i_leaves_no_combining_dot():
+    # str.lower turns 'İ' into 'i' plus U+0307
+    assert 'İ'.lower() != 'i'
+    assert normalize_text('İ') == 'i'
+    assert normalize_text('İ').isascii()
+
+
+def test_accents_outside_the_turkish_alphabet_are_stripped():
+    assert normalize_text('Café Résumé Naïve') == 'cafe resume naive'
+    assert normalize_text('Ｆｕｌｌ　width') == 'full width'
+
+
+def test_whitespace_is_collapsed():
+    assert normalize_text('  Satranç\tTurnuvası \n  ') == 'satranc turnuvasi'
+    assert normalize_text('') == ''
+
+
+def test_spellings_meet_in_one_event_text():
+    engine = FeatureEngine({})
+    assert (engine.build_event_text('KIŞ KAMPI', 'Müzik', 'İstanbul') ==
+            engine.build_event_text('kış kampı', 'muzik', 'istanbul'))
+
+
+def test_stopwords_are_normalized_like_documents():
+    config = {'use_turkish_stopwords': True, 'turkish_stopwords': ['için', 'İÇİN', 'çünkü', 'mı', 'mi']}
+    assert configured_stopwords(config) == ['cunku', 'icin', 'mi']
+    assert configured_stopwords({**config, 'use_turkish_stopwords': False}) is None
@@ -0,0 +1,65 @@
+"""
+Event text similarity tests
+The default TF-IDF title match keeps the per-pair scoring the service has always
+used; scoring in the shared club vocabulary is opt-in.
+"""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from models.event_store import EventTextStore
+from models.feature_engine import FeatureEngine
+from tests.synthetic import InMemoryConnector, SyntheticDataset
+
+
+@pytest.fixture(scope='module')
+def dataset() -> SyntheticDataset:
+    return SyntheticDataset(n_events=120, n_clubs=12, n_users=20)
+
+
+def per_pair_score(user_text: str, event_text: str) -> float:
+    """Title match as originally computed: TF-IDF fitted on the pair plus word Jaccard"""
+    if not user_text or not event_text:
+        return 0.0
+    vectors = TfidfVectorizer(max_features=100, ngram_range=(1, 2), lowercase=True,
+                              strip_accents='unicode').fit_transform([user_text, event_text])
+    cosine = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
+    user_words, event_words = set(user_text.split()), set(event_text.split())
+    jaccard = len(user_words & event_words) / len(user_words | event_words)
+    return float(np.clip(cosine * 0.7 + jaccard * 0.3, 0.0, 1.0))
+
+
+def title_match(dataset: SyntheticDataset, content_settings: dict, user_id: int):
+    engine = FeatureEngine({'content_settings': content_settings})
+    engine.fit_club_vectors(dataset.clubs_df)
+    connector = InMemoryConnector(dataset)
+    store = EventTextStore(connector, engine, 1000)
+    events_df = dataset.events_df
+    features = store.features(events_df['EventId'].tolist())
+    user_club_ids = connector.get_user_followed_clubs(user_id)
+    content = engine.calculate_content_similarity(user_club_ids, events_df, dataset.clubs_df,
+                                                  text_features=features)
+    user_text = engine.build_interest_text(dataset.clubs_df[dataset.clubs_df['ClubId'].isin(user_club_ids)])
+    return content['title_match_score'].to_numpy(), user_text, features
+
+
+def test_default_title_match_is_scored_per_pair(dataset):
+    user_id = next(user for user, clubs in dataset.memberships.items() if len(clubs) >= 2)
+    scores, user_text, features = title_match(dataset, {}, user_id)
+
+    # No event vectors are cached for the pairwise scoring
+    assert features.vectors is None
+    expected = [per_pair_score(user_text, text) for text in features.texts]
+    np.testing.assert_allclose(scores, expected, atol=1e-9)
+    assert scores.max() > 0.0
+
+
+def test_shared_space_is_opt_in(dataset):
+    user_id = next(user for user, clubs in dataset.memberships.items() if clubs)
+    pairwise, _, _ = title_match(dataset, {'text_similarity': 'pairwise'}, user_id)
+    shared, _, features = title_match(dataset, {'text_similarity': 'shared_space'}, user_id)
+
+    assert features.vectors is not None and features.vectors.shape[0] == len(features)
+    assert ((shared >= 0.0) & (shared <= 1.0)).all()
+    assert not np.allclose(shared, pairwise)
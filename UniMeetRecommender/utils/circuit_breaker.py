@@ -0,0 +1,150 @@
+"""
+Circuit breaker for UniMeet Recommender Service
+Stops calling a failing or slow dependency (the database) for a cool-down
+period, then lets a few probe calls through to decide whether to close again.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = metrics.gauge(
+    'recommender_circuit_state', 'Circuit breaker state (0=closed, 1=half_open, 2=open)', ['breaker']
+)
+CIRCUIT_TRANSITIONS = metrics.counter(
+    'recommender_circuit_transitions_total', 'Circuit breaker state transitions', ['breaker', 'state']
+)
+CIRCUIT_REJECTED = metrics.counter(
+    'recommender_circuit_rejected_total', 'Calls rejected without trying while the circuit was open', ['breaker']
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Sliding-window circuit breaker tripping on error rate or slow-call rate"""
+
+    def __init__(self, name: str, settings: Optional[Dict] = None):
+        """
+        Initialize circuit breaker
+
+        Args:
+            name: Breaker name (metric label)
+            settings: Dict with optional keys 'window_size', 'min_calls',
+                'failure_rate', 'slow_call_ms', 'slow_call_rate',
+                'open_seconds' and 'half_open_probes'
+        """
+        settings = settings or {}
+        self.name = name
+        self.window_size = int(settings.get('window_size', 20))
+        self.min_calls = int(settings.get('min_calls', 5))
+        self.failure_rate = float(settings.get('failure_rate', 0.5))
+        self.slow_call_s = float(settings.get('slow_call_ms', 2000)) / 1000
+        self.slow_call_rate = float(settings.get('slow_call_rate', 0.5))
+        self.open_seconds = float(settings.get('open_seconds', 30))
+        self.half_open_probes = int(settings.get('half_open_probes', 1))
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        # Recent outcomes while closed: (failed, slow)
+        self._window: deque = deque(maxlen=self.window_size)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        CIRCUIT_STATE.set(_STATE_VALUES[CLOSED], breaker=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may proceed; every allowed call must be followed by record_*()"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+        CIRCUIT_REJECTED.inc(breaker=self.name)
+        return False
+
+    def record_success(self, elapsed_s: float):
+        """Record a completed call; slow calls count against the slow-call rate"""
+        slow = elapsed_s >= self.slow_call_s
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if slow:
+                    self._transition(OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._transition(CLOSED)
+                return
+            self._window.append((False, slow))
+            self._evaluate()
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._transition(OPEN)
+                return
+            self._window.append((True, False))
+            self._evaluate()
+
+    def status(self) -> Dict:
+        with self._lock:
+            self._maybe_half_open()
+            calls = len(self._window)
+            return {
+                'state': self._state,
+                'window_calls': calls,
+                'failures': sum(1 for failed, _ in self._window if failed),
+                'slow_calls': sum(1 for _, slow in self._window if slow),
+                'open_for_s': round(time.monotonic() - self._opened_at, 1) if self._state != CLOSED else None,
+            }
+
+    def _evaluate(self):
+        """Trip when the closed-state window exceeds a threshold (lock held)"""
+        calls = len(self._window)
+        if self._state != CLOSED or calls < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        if failures / calls >= self.failure_rate or slow / calls >= self.slow_call_rate:
+            self._transition(OPEN)
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str):
+        """Change state (lock held)"""
+        previous = self._state
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state in (OPEN, CLOSED):
+            self._window.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        CIRCUIT_STATE.set(_STATE_VALUES[state], breaker=self.name)
+        CIRCUIT_TRANSITIONS.inc(breaker=self.name, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log("Circuit breaker '%s' %s -> %s", self.name, previous, state)
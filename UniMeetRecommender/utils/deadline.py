@@ -0,0 +1,97 @@
+"""
+Latency budget helpers for UniMeet Recommender Service
+Tracks the time left for a request and learns typical stage costs so the
+pipeline can skip or approximate expensive stages before it runs out of time.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+
+class Deadline:
+    """Time budget for a single request, measured from construction"""
+
+    __slots__ = ('budget_ms', '_start')
+
+    def __init__(self, budget_ms: Optional[float]):
+        """
+        Args:
+            budget_ms: Budget in milliseconds; None or <= 0 means unlimited
+        """
+        self.budget_ms = float(budget_ms) if budget_ms and budget_ms > 0 else None
+        self._start = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def remaining_ms(self) -> float:
+        if self.budget_ms is None:
+            return float('inf')
+        return self.budget_ms - self.elapsed_ms()
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def can_afford(self, cost_ms: float, reserve_ms: float = 0.0) -> bool:
+        """Whether a step estimated at cost_ms fits, keeping reserve_ms for later steps"""
+        return cost_ms + reserve_ms <= self.remaining_ms()
+
+
+class StageCostEstimator:
+    """
+    Exponentially weighted moving average of stage costs, per unit of work
+
+    A stage skipped because its estimate does not fit is no longer observed, so
+    one bad sample (e.g. a slow cold-cache run) would keep it skipped for good.
+    probe_due lets one request run such a stage every probe_seconds to refresh
+    the estimate.
+    """
+
+    def __init__(self, alpha: float = 0.2, probe_seconds: float = 30.0):
+        """
+        Args:
+            alpha: Weight of the newest observation (0-1)
+            probe_seconds: How long a stage goes unobserved before probe_due
+                lets one request run it regardless of its estimate
+        """
+        self.alpha = alpha
+        self.probe_seconds = probe_seconds
+        self._per_unit_ms: Dict[str, float] = {}
+        # Last observation, or last probe handed out, per stage (monotonic)
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, elapsed_ms: float, units: int = 1):
+        """Record a stage run that processed `units` items (e.g. candidate events)"""
+        per_unit = elapsed_ms / max(units, 1)
+        with self._lock:
+            previous = self._per_unit_ms.get(stage)
+            if previous is None:
+                self._per_unit_ms[stage] = per_unit
+            else:
+                self._per_unit_ms[stage] = previous + self.alpha * (per_unit - previous)
+            self._checked_at[stage] = time.monotonic()
+
+    def estimate(self, stage: str, units: int = 1) -> float:
+        """Expected cost in milliseconds; 0 until the stage has been observed"""
+        per_unit = self._per_unit_ms.get(stage)
+        return per_unit * max(units, 1) if per_unit is not None else 0.0
+
+    def probe_due(self, stage: str) -> bool:
+        """
+        Whether the caller should run a stage despite its estimate, to re-measure it
+
+        True for at most one caller per probe_seconds, once the stage has not
+        been observed for that long.
+        """
+        now = time.monotonic()
+        with self._lock:
+            checked_at = self._checked_at.get(stage)
+            if checked_at is None or now - checked_at < self.probe_seconds:
+                return False
+            self._checked_at[stage] = now
+            return True
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(cost, 4) for stage, cost in self._per_unit_ms.items()}
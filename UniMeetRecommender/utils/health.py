@@ -0,0 +1,134 @@
+"""
+Background health prober for UniMeet Recommender Service
+Runs dependency checks on a timer and caches the result, so health endpoints
+answer from memory and never touch the database pool on the request path.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+HEALTH_CHECK_LATENCY = metrics.histogram(
+    'recommender_health_check_duration_seconds', 'Duration of background health checks', ['check']
+)
+HEALTH_CHECK_OK = metrics.gauge(
+    'recommender_health_check_ok', 'Result of the last background health check (1=ok)', ['check']
+)
+
+
+class HealthProber:
+    """Periodically runs registered checks and serves the cached results"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        """
+        Initialize health prober
+
+        Args:
+            settings: Dict with optional keys 'interval_seconds' (time between
+                probe rounds) and 'stale_after_seconds' (liveness fails when the
+                last completed round is older than this)
+        """
+        settings = settings or {}
+        self.interval_seconds = float(settings.get('interval_seconds', 10))
+        self.stale_after_seconds = float(settings.get('stale_after_seconds', 60))
+
+        # (name, check, critical); a check returns a dict with at least an 'ok' key
+        self._checks: List[Tuple[str, Callable[[], Dict], bool]] = []
+        self._results: Dict[str, Dict] = {}
+        self._checked_at: Optional[datetime] = None
+        self._last_round = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_check(self, name: str, check: Callable[[], Dict], critical: bool = True):
+        """
+        Register a check
+
+        Args:
+            name: Check name in the health response
+            check: Callable returning a dict with an 'ok' bool plus any details
+            critical: Whether a failing check makes the service not ready
+        """
+        self._checks.append((name, check, critical))
+
+    def start(self):
+        """Run one probe round synchronously, then keep probing in the background"""
+        if self._thread is not None:
+            return
+        self.probe()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.probe()
+
+    def probe(self):
+        """Run every check once and replace the cached results"""
+        results = {}
+        for name, check, critical in self._checks:
+            start = time.perf_counter()
+            try:
+                result = dict(check())
+            except Exception as e:
+                result = {'ok': False, 'error': str(e)}
+            elapsed = time.perf_counter() - start
+            HEALTH_CHECK_LATENCY.observe(elapsed, check=name)
+            HEALTH_CHECK_OK.set(1 if result.get('ok') else 0, check=name)
+            result['ok'] = bool(result.get('ok'))
+            result['critical'] = critical
+            result['duration_ms'] = round(elapsed * 1000, 2)
+            results[name] = result
+
+        with self._lock:
+            previous = self._results
+            self._results = results
+            self._checked_at = datetime.now(timezone.utc)
+            self._last_round = time.monotonic()
+
+        # Log state changes only, not every round
+        for name, result in results.items():
+            was_ok = previous.get(name, {}).get('ok')
+            if was_ok is not None and was_ok != result['ok']:
+                log = logger.info if result['ok'] else logger.warning
+                log("Health check '%s' is now %s", name, 'ok' if result['ok'] else 'failing',
+                    check=result)
+
+    def live(self) -> bool:
+        """The prober thread is running and has completed a recent round"""
+        with self._lock:
+            last_round = self._last_round
+        return (self._thread is not None and self._thread.is_alive() and
+                time.monotonic() - last_round <= self.stale_after_seconds)
+
+    def ready(self) -> bool:
+        """Every critical check passed in the last round"""
+        with self._lock:
+            results = self._results
+        return bool(results) and all(r['ok'] for r in results.values() if r['critical'])
+
+    def snapshot(self) -> Dict:
+        """Cached health state (no checks are run)"""
+        with self._lock:
+            results = dict(self._results)
+            checked_at = self._checked_at
+            last_round = self._last_round
+        return {
+            'live': self.live(),
+            'ready': self.ready(),
+            'checked_at': checked_at.isoformat() if checked_at else None,
+            'age_s': round(time.monotonic() - last_round, 1) if checked_at else None,
+            'checks': results,
+        }
@@ -0,0 +1,53 @@
+"""
+JSON encoding helpers for UniMeet Recommender Service
+Uses orjson when installed (optional dependency) and falls back to the
+standard library encoder otherwise.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+HAS_ORJSON = orjson is not None
+
+
+def _default(obj: Any):
+    """Serialize numpy scalars/arrays and anything else via str()"""
+    if hasattr(obj, 'item') and callable(obj.item):
+        try:
+            return obj.item()
+        except (ValueError, TypeError):
+            pass
+    if hasattr(obj, 'tolist') and callable(obj.tolist):
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Encode to UTF-8 JSON bytes"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def dumps(obj: Any) -> str:
+        """Encode to a JSON string (non-ASCII characters kept as-is)"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode('utf-8')
+
+    loads = orjson.loads
+else:
+    def dumps_bytes(obj: Any) -> bytes:
+        """Encode to UTF-8 JSON bytes"""
+        return json.dumps(obj, ensure_ascii=False, default=_default, separators=(',', ':')).encode('utf-8')
+
+    def dumps(obj: Any) -> str:
+        """Encode to a JSON string (non-ASCII characters kept as-is)"""
+        return json.dumps(obj, ensure_ascii=False, default=_default)
+
+    loads = json.loads
@@ -1,89 +1,214 @@
 """
 Logger utility for UniMeet Recommender Service
-Provides structured JSON logging
+Provides structured JSON logging with asynchronous emission and per-type sampling
 """
+import atexit
 import logging
-import json
+import logging.handlers
+import os
+import queue
+import random
 import sys
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
+from utils.json_codec import dumps
+from utils.metrics import metrics
+
+
+LOG_RECORDS_DROPPED = metrics.counter(
+    'recommender_log_records_dropped_total', 'Log records dropped because the async log queue was full'
+)
+
+
+class _JsonFormatter(logging.Formatter):
+    """Custom JSON formatter (runs on the writer thread in async mode)"""
+
+    def format(self, record):
+        log_obj = {
+            # record.created is captured on the calling thread, not at write time
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+        }
+
+        # Add extra fields if present
+        if hasattr(record, 'user_id'):
+            log_obj['userId'] = record.user_id
+        if hasattr(record, 'latency_ms'):
+            log_obj['latency_ms'] = record.latency_ms
+        if hasattr(record, 'result_count'):
+            log_obj['result_count'] = record.result_count
+        if hasattr(record, 'action'):
+            log_obj['action'] = record.action
+        if hasattr(record, 'extra'):
+            log_obj.update(record.extra)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_obj['exception'] = record.exc_text
+
+        return dumps(log_obj)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller and defers JSON formatting"""
+
+    def __init__(self, log_queue: queue.Queue, on_drop):
+        super().__init__(log_queue)
+        self._on_drop = on_drop
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Resolve the message on the calling thread (args may be mutated later),
+        # but leave JSON formatting to the writer thread.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._on_drop()
+
 
 class StructuredLogger:
     """Structured JSON logger for the recommendation service"""
-    
+
     def __init__(self, name: str = "recommender", level: str = "INFO"):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(getattr(logging, level.upper(), logging.INFO))
-        
+
         # Clear existing handlers
         self.logger.handlers.clear()
-        
-        # Console handler with JSON formatter
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(self._get_json_formatter())
-        self.logger.addHandler(handler)
-    
+
+        # Console handler with JSON formatter; wrapped by a queue handler in async mode
+        self._stream_handler = logging.StreamHandler(sys.stdout)
+        self._stream_handler.setFormatter(self._get_json_formatter())
+        self.logger.addHandler(self._stream_handler)
+
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._queue_handler: Optional[_DroppingQueueHandler] = None
+        self._sample_rates: Dict[str, float] = {}
+        # Registered once: flushes queued records at exit, a no-op unless async
+        atexit.register(self._stop_async)
+
     def _get_json_formatter(self):
         """Custom JSON formatter"""
-        class JsonFormatter(logging.Formatter):
-            def format(self, record):
-                log_obj = {
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "level": record.levelname,
-                    "message": record.getMessage(),
-                    "module": record.module,
-                    "function": record.funcName,
-                }
-                
-                # Add extra fields if present
-                if hasattr(record, 'user_id'):
-                    log_obj['userId'] = record.user_id
-                if hasattr(record, 'latency_ms'):
-                    log_obj['latency_ms'] = record.latency_ms
-                if hasattr(record, 'result_count'):
-                    log_obj['result_count'] = record.result_count
-                if hasattr(record, 'action'):
-                    log_obj['action'] = record.action
-                if hasattr(record, 'extra'):
-                    log_obj.update(record.extra)
-                
-                return json.dumps(log_obj, ensure_ascii=False)
-        
-        return JsonFormatter()
-    
-    def info(self, message: str, **kwargs):
-        """Log info message with optional extra fields"""
-        extra_dict = {'extra': kwargs} if kwargs else {}
-        self.logger.info(message, extra=extra_dict)
-    
-    def warning(self, message: str, **kwargs):
-        """Log warning message with optional extra fields"""
-        extra_dict = {'extra': kwargs} if kwargs else {}
-        self.logger.warning(message, extra=extra_dict)
-    
-    def error(self, message: str, exc_info: bool = False, **kwargs):
-        """Log error message with optional extra fields"""
-        extra_dict = {'extra': kwargs} if kwargs else {}
-        self.logger.error(message, exc_info=exc_info, extra=extra_dict)
-    
-    def debug(self, message: str, **kwargs):
-        """Log debug message with optional extra fields"""
+        return _JsonFormatter()
+
+    def configure(self, settings: Optional[Dict[str, Any]] = None):
+        """
+        Apply logging settings from config.json
+
+        Args:
+            settings: Dict with optional keys 'level', 'async', 'queue_size'
+                and 'sample_rates' (message type -> fraction kept).
+                The LOG_LEVEL environment variable overrides 'level'.
+        """
+        settings = settings or {}
+        level = os.getenv('LOG_LEVEL') or settings.get('level', 'INFO')
+        self.logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+        self._sample_rates = {k: float(v) for k, v in settings.get('sample_rates', {}).items()}
+
+        if settings.get('async', True):
+            self._start_async(int(settings.get('queue_size', 10000)))
+        else:
+            self._stop_async()
+
+    def _start_async(self, queue_size: int):
+        if self._listener is not None:
+            return
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._queue_handler = _DroppingQueueHandler(log_queue, LOG_RECORDS_DROPPED.inc)
+        self._listener = logging.handlers.QueueListener(
+            log_queue, self._stream_handler, respect_handler_level=False
+        )
+        self.logger.removeHandler(self._stream_handler)
+        self.logger.addHandler(self._queue_handler)
+        self._listener.start()
+
+    def _stop_async(self):
+        """Flush queued records and return to synchronous writes"""
+        if self._listener is None:
+            return
+        self.logger.removeHandler(self._queue_handler)
+        self.logger.addHandler(self._stream_handler)
+        self._listener.stop()
+        self._listener = None
+        self._queue_handler = None
+
+    @property
+    def dropped_count(self) -> int:
+        """Records dropped because the async queue was full (recommender_log_records_dropped_total)"""
+        return int(LOG_RECORDS_DROPPED.value())
+
+    def set_stream(self, stream):
+        """Redirect output (e.g. to os.devnull in benchmarks)"""
+        self._stream_handler.setStream(stream)
+
+    def is_enabled(self, level: str) -> bool:
+        """Check a level before building expensive log arguments"""
+        return self.logger.isEnabledFor(getattr(logging, level.upper(), logging.INFO))
+
+    def should_log(self, level: str, sample_key: Optional[str] = None) -> bool:
+        """Level check plus per-message-type sampling"""
+        if not self.is_enabled(level):
+            return False
+        return self._sampled(sample_key)
+
+    def _sampled(self, sample_key: Optional[str]) -> bool:
+        if sample_key is None:
+            return True
+        rate = self._sample_rates.get(sample_key, 1.0)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def _log(self, level: int, message: str, args: tuple, kwargs: Dict, exc_info: bool = False,
+             sample_key: Optional[str] = None):
+        if not self.logger.isEnabledFor(level) or not self._sampled(sample_key):
+            return
         extra_dict = {'extra': kwargs} if kwargs else {}
-        self.logger.debug(message, extra=extra_dict)
-    
-    def log_request(self, user_id: int, action: str, latency_ms: float, 
+        # stacklevel=3 reports the caller of info()/debug()/... as module/function
+        self.logger.log(level, message, *args, exc_info=exc_info, extra=extra_dict, stacklevel=3)
+
+    def info(self, message: str, *args, sample_key: Optional[str] = None, **kwargs):
+        """Log info message with optional %-style args and extra fields"""
+        self._log(logging.INFO, message, args, kwargs, sample_key=sample_key)
+
+    def warning(self, message: str, *args, sample_key: Optional[str] = None, **kwargs):
+        """Log warning message with optional %-style args and extra fields"""
+        self._log(logging.WARNING, message, args, kwargs, sample_key=sample_key)
+
+    def error(self, message: str, *args, exc_info: bool = False, **kwargs):
+        """Log error message with optional %-style args and extra fields"""
+        self._log(logging.ERROR, message, args, kwargs, exc_info=exc_info)
+
+    def debug(self, message: str, *args, sample_key: Optional[str] = None, **kwargs):
+        """Log debug message with optional %-style args and extra fields"""
+        self._log(logging.DEBUG, message, args, kwargs, sample_key=sample_key)
+
+    def log_request(self, user_id: int, action: str, latency_ms: float,
                     result_count: int, **kwargs):
         """Log a request with standard fields"""
+        if not self.logger.isEnabledFor(logging.INFO) or not self._sampled('request'):
+            return
         self.logger.info(
-            f"Request completed: {action}",
+            "Request completed: %s", action,
             extra={
                 'user_id': user_id,
                 'action': action,
                 'latency_ms': latency_ms,
                 'result_count': result_count,
                 'extra': kwargs
-            }
+            },
+            stacklevel=2
         )
 
 
@@ -0,0 +1,351 @@
+"""
+On-demand profiler for UniMeet Recommender Service
+Profiles the next N recommend requests or a time window, in deterministic
+(sys.setprofile) or sampling (stack snapshots) mode, and aggregates hot
+functions and flamegraph-compatible collapsed stacks.
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+
+MODES = ('deterministic', 'sampling')
+MAX_REQUESTS = 1000
+MAX_DURATION_S = 600
+DEFAULT_INTERVAL_MS = 5
+
+
+def _code_label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _builtin_label(func) -> str:
+    module = getattr(func, '__module__', None) or 'builtins'
+    return f"{module}:{getattr(func, '__qualname__', repr(func))}"
+
+
+class ProfileSession:
+    """State and aggregated results of one profiling session"""
+
+    def __init__(self, mode: str, max_requests: Optional[int], duration_s: Optional[float],
+                 interval_ms: float):
+        self.mode = mode
+        self.max_requests = max_requests
+        self.duration_s = duration_s
+        self.interval_s = interval_ms / 1000
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.monotonic()
+        self.finished_at: Optional[datetime] = None
+        self.requests_started = 0
+        self.requests_profiled = 0
+        self.samples = 0
+        self.lock = threading.Lock()
+        # Collapsed stack (tuple of labels, root first) -> seconds or sample count
+        self.stacks: Dict[Tuple[str, ...], float] = {}
+        # Function label -> [self, total, calls]
+        self.functions: Dict[str, List[float]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self.finished_at is None
+
+    def claim_request(self) -> bool:
+        """Reserve a slot for a request; False once the session is full or expired"""
+        with self.lock:
+            if not self.running:
+                return False
+            if self.duration_s is not None and time.monotonic() - self.started >= self.duration_s:
+                self.finished_at = datetime.now(timezone.utc)
+                return False
+            if self.max_requests is not None and self.requests_started >= self.max_requests:
+                return False
+            self.requests_started += 1
+            return True
+
+    def request_done(self):
+        with self.lock:
+            self.requests_profiled += 1
+            if self.max_requests is not None and self.requests_profiled >= self.max_requests:
+                self.finished_at = datetime.now(timezone.utc)
+
+    def merge(self, stacks: Dict[Tuple[str, ...], float], functions: Dict[str, List[float]]):
+        """Merge per-request results collected without locking"""
+        with self.lock:
+            for key, value in stacks.items():
+                self.stacks[key] = self.stacks.get(key, 0.0) + value
+            for label, (self_t, total_t, calls) in functions.items():
+                entry = self.functions.setdefault(label, [0.0, 0.0, 0])
+                entry[0] += self_t
+                entry[1] += total_t
+                entry[2] += calls
+
+    def results(self, top: int = 30) -> Dict:
+        with self.lock:
+            functions = dict(self.functions)
+            stacks = dict(self.stacks)
+        # Sampling mode stores sample counts; convert to milliseconds
+        scale = 1000.0 if self.mode == 'deterministic' else self.interval_s * 1000
+        hot = sorted(functions.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+        hot_functions = []
+        for label, (self_t, total_t, calls) in hot:
+            entry = {
+                'function': label,
+                'self_ms': round(self_t * scale, 3),
+                'total_ms': round(total_t * scale, 3),
+            }
+            if self.mode == 'deterministic':
+                entry['calls'] = int(calls)
+            hot_functions.append(entry)
+
+        return {
+            'status': 'running' if self.running else 'completed',
+            'mode': self.mode,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'max_requests': self.max_requests,
+            'duration_s': self.duration_s,
+            'requests_profiled': self.requests_profiled,
+            'samples': self.samples if self.mode == 'sampling' else None,
+            'hot_functions': hot_functions,
+        }
+
+    def collapsed_stacks(self) -> str:
+        """
+        Flamegraph-compatible collapsed stacks ("root;child;leaf value" per line)
+        Values are microseconds in deterministic mode and sample counts in sampling mode.
+        """
+        with self.lock:
+            stacks = list(self.stacks.items())
+        multiplier = 1_000_000 if self.mode == 'deterministic' else 1
+        lines = []
+        for key, value in sorted(stacks, key=lambda kv: kv[1], reverse=True):
+            weight = int(round(value * multiplier))
+            if weight > 0:
+                lines.append(f"{';'.join(key)} {weight}")
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+
+class _DeterministicTracer:
+    """sys.setprofile callback recording self time per full call stack"""
+
+    def __init__(self):
+        self.labels: List[str] = []
+        # Per frame on the stack: [start, child time]
+        self.timers: List[List[float]] = []
+        self.stacks: Dict[Tuple[str, ...], float] = {}
+        self.functions: Dict[str, List[float]] = {}
+
+    def _push(self, label: str):
+        self.labels.append(label)
+        self.timers.append([time.perf_counter(), 0.0])
+
+    def _pop(self):
+        if not self.timers:
+            return
+        start, child = self.timers.pop()
+        elapsed = time.perf_counter() - start
+        self_time = max(0.0, elapsed - child)
+        key = tuple(self.labels)
+        label = self.labels.pop()
+        self.stacks[key] = self.stacks.get(key, 0.0) + self_time
+        entry = self.functions.get(label)
+        if entry is None:
+            entry = self.functions[label] = [0.0, 0.0, 0]
+        entry[0] += self_time
+        # Only count total time for the outermost activation of recursive calls
+        if label not in self.labels:
+            entry[1] += elapsed
+        entry[2] += 1
+        if self.timers:
+            self.timers[-1][1] += elapsed
+
+    def __call__(self, frame, event, arg):
+        if event == 'call':
+            self._push(_code_label(frame.f_code))
+        elif event == 'return':
+            self._pop()
+        elif event == 'c_call':
+            self._push(_builtin_label(arg))
+        elif event in ('c_return', 'c_exception'):
+            self._pop()
+
+    def finish(self):
+        # Frames still open belong to the profiler's own __exit__; discard them
+        self.labels.clear()
+        self.timers.clear()
+
+
+class _ActiveRequest:
+    """Context manager wrapping one profiled request"""
+
+    __slots__ = ('_profiler', '_session', '_tracer', '_thread_id')
+
+    def __init__(self, profiler: 'RequestProfiler', session: ProfileSession):
+        self._profiler = profiler
+        self._session = session
+        self._tracer = None
+        self._thread_id = threading.get_ident()
+
+    def __enter__(self):
+        if self._session.mode == 'deterministic':
+            self._tracer = _DeterministicTracer()
+            sys.setprofile(self._tracer)
+        else:
+            # Stack walks stop at this frame so samples are rooted at the request
+            self._profiler._register_thread(self._thread_id, sys._getframe(1))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._tracer is not None:
+            sys.setprofile(None)
+            self._tracer.finish()
+            self._session.merge(self._tracer.stacks, self._tracer.functions)
+        else:
+            self._profiler._unregister_thread(self._thread_id)
+        self._session.request_done()
+        return False
+
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class RequestProfiler:
+    """Profiles recommend requests on demand"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session: Optional[ProfileSession] = None
+        # thread id -> root frame of the profiled request (sampling mode)
+        self._threads: Dict[int, object] = {}
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self, mode: str = 'sampling', requests: Optional[int] = None,
+              duration_s: Optional[float] = None, interval_ms: float = DEFAULT_INTERVAL_MS) -> Dict:
+        """
+        Start a profiling session
+
+        Args:
+            mode: 'deterministic' (exact call stacks, high overhead) or 'sampling'
+            requests: Profile the next N recommend requests
+            duration_s: Profile every recommend request in this time window
+            interval_ms: Sampling interval (sampling mode only)
+
+        Returns:
+            Session status dict
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if requests is None and duration_s is None:
+            raise ValueError("Either requests or duration_s is required")
+        if requests is not None and not 0 < int(requests) <= MAX_REQUESTS:
+            raise ValueError(f"requests must be between 1 and {MAX_REQUESTS}")
+        if duration_s is not None and not 0 < float(duration_s) <= MAX_DURATION_S:
+            raise ValueError(f"duration_s must be between 0 and {MAX_DURATION_S}")
+        if not 1 <= float(interval_ms) <= 1000:
+            raise ValueError("interval_ms must be between 1 and 1000")
+
+        with self._lock:
+            if self._session is not None and self._session.running:
+                raise RuntimeError("A profiling session is already running")
+            session = ProfileSession(
+                mode,
+                int(requests) if requests is not None else None,
+                float(duration_s) if duration_s is not None else None,
+                float(interval_ms)
+            )
+            self._session = session
+            self._threads.clear()
+            if mode == 'sampling':
+                self._sampler = threading.Thread(target=self._sample_loop, args=(session,),
+                                                 name='profiler-sampler', daemon=True)
+                self._sampler.start()
+        return session.results()
+
+    def stop(self) -> Optional[Dict]:
+        """Stop the running session and return its results"""
+        with self._lock:
+            session = self._session
+            if session is None:
+                return None
+            if session.running:
+                session.finished_at = datetime.now(timezone.utc)
+        return session.results()
+
+    def status(self, top: int = 30) -> Optional[Dict]:
+        session = self._session
+        if session is None:
+            return None
+        self._expire(session)
+        return session.results(top)
+
+    def collapsed_stacks(self) -> Optional[str]:
+        session = self._session
+        return session.collapsed_stacks() if session is not None else None
+
+    def profile_request(self):
+        """Context manager for a recommend request; a no-op unless a session wants it"""
+        session = self._session
+        if session is None or not session.running or not session.claim_request():
+            return _NOOP
+        return _ActiveRequest(self, session)
+
+    def _expire(self, session: ProfileSession):
+        if (session.running and session.duration_s is not None and
+                time.monotonic() - session.started >= session.duration_s):
+            session.finished_at = datetime.now(timezone.utc)
+
+    def _register_thread(self, thread_id: int, root_frame):
+        with self._lock:
+            self._threads[thread_id] = root_frame
+
+    def _unregister_thread(self, thread_id: int):
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+    def _sample_loop(self, session: ProfileSession):
+        """Periodically snapshot the stacks of threads serving profiled requests"""
+        while session.running:
+            time.sleep(session.interval_s)
+            self._expire(session)
+            with self._lock:
+                threads = dict(self._threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            stacks: Dict[Tuple[str, ...], float] = {}
+            functions: Dict[str, List[float]] = {}
+            for thread_id, root in threads.items():
+                frame = frames.get(thread_id)
+                labels = []
+                while frame is not None and frame is not root:
+                    labels.append(_code_label(frame.f_code))
+                    frame = frame.f_back
+                if not labels:
+                    continue
+                labels.reverse()
+                key = tuple(labels)
+                stacks[key] = stacks.get(key, 0.0) + 1
+                for label in set(labels):
+                    functions.setdefault(label, [0.0, 0.0, 0])[1] += 1
+                functions[labels[-1]][0] += 1
+            session.merge(stacks, functions)
+            with session.lock:
+                session.samples += int(sum(stacks.values()))
+
+
+# Global profiler instance
+profiler = RequestProfiler()
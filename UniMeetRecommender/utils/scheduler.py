@@ -0,0 +1,200 @@
+"""
+Workload scheduling for UniMeet Recommender Service
+Admits work per workload class (interactive, batch, background) through a
+bounded queue and a concurrency limit. Classes have strict priority: a class
+only starts work while no higher class is waiting. A batch job or background
+refresh therefore cannot take database connections and CPU from queued
+recommend requests.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+# Highest priority first
+WORKLOADS = ('interactive', 'batch', 'background')
+
+DEFAULT_SETTINGS = {
+    'interactive': {'max_concurrent': 32, 'max_queue': 200, 'queue_timeout_seconds': 5},
+    'batch': {'max_concurrent': 2, 'max_queue': 20, 'queue_timeout_seconds': 30},
+    'background': {'max_concurrent': 1, 'max_queue': 50, 'queue_timeout_seconds': 120},
+}
+
+SCHEDULER_QUEUE_DEPTH = metrics.gauge(
+    'recommender_scheduler_queue_depth', 'Work items waiting for a slot', ['workload']
+)
+SCHEDULER_RUNNING = metrics.gauge(
+    'recommender_scheduler_running', 'Work items holding a slot', ['workload']
+)
+SCHEDULER_WAIT = metrics.histogram(
+    'recommender_scheduler_wait_seconds', 'Time spent queued before starting', ['workload']
+)
+SCHEDULER_REJECTED = metrics.counter(
+    'recommender_scheduler_rejected_total', 'Work items rejected (queue_full, timeout)', ['workload', 'reason']
+)
+
+
+class SchedulerRejected(Exception):
+    """Work was not admitted: its class queue was full or it waited too long"""
+
+    def __init__(self, workload: str, reason: str):
+        super().__init__(f"{workload} work rejected ({reason})")
+        self.workload = workload
+        self.reason = reason
+
+
+class _WorkloadState:
+    """Limits, running count and FIFO of waiting tickets of one class"""
+
+    __slots__ = ('max_concurrent', 'max_queue', 'queue_timeout', 'running', 'waiting')
+
+    def __init__(self):
+        self.running = 0
+        self.waiting: deque = deque()
+
+
+class WorkloadScheduler:
+    """Bounded queues and concurrency limits per workload class, strict priority between classes"""
+
+    def __init__(self):
+        self.enabled = True
+        self._states = {workload: _WorkloadState() for workload in WORKLOADS}
+        self._cond = threading.Condition()
+        # Workload of the slot held by the current thread; nested slots are free
+        self._local = threading.local()
+        self.configure({})
+
+    def configure(self, settings: Dict):
+        """
+        Apply the 'scheduler' config block (also while work is running)
+
+        Args:
+            settings: Dict with optional 'enabled' and, per workload class, a dict
+                with 'max_concurrent', 'max_queue' and 'queue_timeout_seconds'
+                (null waits without limit)
+        """
+        with self._cond:
+            self.enabled = settings.get('enabled', True)
+            for workload, state in self._states.items():
+                merged = {**DEFAULT_SETTINGS[workload], **settings.get(workload, {})}
+                state.max_concurrent = max(1, int(merged['max_concurrent']))
+                state.max_queue = int(merged['max_queue'])
+                timeout = merged['queue_timeout_seconds']
+                state.queue_timeout = float(timeout) if timeout is not None else None
+            # Raised limits may admit waiting work
+            self._cond.notify_all()
+
+    def _can_start(self, workload: str) -> bool:
+        """Whether the class has a free slot and no higher class is waiting (lock held)"""
+        for higher in WORKLOADS[:WORKLOADS.index(workload)]:
+            if self._states[higher].waiting:
+                return False
+        state = self._states[workload]
+        return state.running < state.max_concurrent
+
+    def _acquire(self, workload: str):
+        state = self._states[workload]
+        started = time.monotonic()
+        with self._cond:
+            if not state.waiting and self._can_start(workload):
+                state.running += 1
+                SCHEDULER_RUNNING.set(state.running, workload=workload)
+                SCHEDULER_WAIT.observe(0.0, workload=workload)
+                return
+            if len(state.waiting) >= state.max_queue:
+                SCHEDULER_REJECTED.inc(workload=workload, reason='queue_full')
+                raise SchedulerRejected(workload, 'queue_full')
+
+            ticket = object()
+            state.waiting.append(ticket)
+            SCHEDULER_QUEUE_DEPTH.set(len(state.waiting), workload=workload)
+            deadline = started + state.queue_timeout if state.queue_timeout is not None else None
+            try:
+                while not (state.waiting[0] is ticket and self._can_start(workload)):
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        SCHEDULER_REJECTED.inc(workload=workload, reason='timeout')
+                        raise SchedulerRejected(workload, 'timeout')
+                    self._cond.wait(remaining)
+                state.running += 1
+                SCHEDULER_RUNNING.set(state.running, workload=workload)
+            finally:
+                state.waiting.remove(ticket)
+                SCHEDULER_QUEUE_DEPTH.set(len(state.waiting), workload=workload)
+                # The next ticket (or a lower class) may be able to start now
+                self._cond.notify_all()
+        SCHEDULER_WAIT.observe(time.monotonic() - started, workload=workload)
+
+    def _release(self, workload: str):
+        state = self._states[workload]
+        with self._cond:
+            state.running -= 1
+            SCHEDULER_RUNNING.set(state.running, workload=workload)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, workload: str):
+        """
+        Hold a slot of a workload class for the duration of the block
+
+        Waits in the class queue until the class has a free slot and no higher
+        class is waiting. A thread that already holds a slot enters nested
+        blocks directly, under its outer class.
+
+        Raises:
+            SchedulerRejected: Queue full, or queue_timeout_seconds elapsed
+        """
+        if workload not in self._states:
+            raise ValueError(f"Unknown workload class: {workload}")
+        if not self.enabled or getattr(self._local, 'workload', None) is not None:
+            yield
+            return
+        self._acquire(workload)
+        self._local.workload = workload
+        try:
+            yield
+        finally:
+            self._local.workload = None
+            self._release(workload)
+
+    def run(self, workload: str, fn: Callable, *args, **kwargs):
+        """
+        Call fn under a slot of the workload class (entry point of background threads)
+
+        Returns:
+            fn's result, or None if the work was rejected
+        """
+        try:
+            with self.slot(workload):
+                return fn(*args, **kwargs)
+        except SchedulerRejected as e:
+            logger.warning(f"Skipped {getattr(fn, '__qualname__', fn)}: {str(e)}")
+            return None
+
+    def waiting(self, workload: str) -> int:
+        """Work items queued in a class"""
+        return len(self._states[workload].waiting)
+
+    def status(self) -> Dict:
+        with self._cond:
+            return {
+                'enabled': self.enabled,
+                'workloads': {
+                    workload: {
+                        'running': state.running,
+                        'queued': len(state.waiting),
+                        'max_concurrent': state.max_concurrent,
+                        'max_queue': state.max_queue,
+                    }
+                    for workload, state in self._states.items()
+                },
+            }
+
+
+# Global scheduler instance, configured from config.json at startup
+scheduler = WorkloadScheduler()
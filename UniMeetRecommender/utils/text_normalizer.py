@@ -0,0 +1,51 @@
+"""
+Text normalization for UniMeet Recommender Service
+Turkish-aware lowercasing and accent folding with precompiled translation
+tables. Documents are normalized once, and the vectorizers run with their
+own lowercasing and accent stripping disabled.
+"""
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional
+
+
+# Turkish casing: dotted capital I lowers to i and dotless capital I to dotless i
+# (str.lower maps 'I' to 'i' and 'İ' to 'i' plus a combining dot)
+_TURKISH_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+
+# Fold Turkish letters and circumflex vowels to ASCII: users and organizers mix
+# "müzik"/"muzik" and "kış"/"kis", so both spellings must meet in one token
+_TURKISH_FOLD = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+
+
+@lru_cache(maxsize=16384)
+def normalize_text(text: str) -> str:
+    """
+    Lowercase (Turkish rules), fold accents to ASCII and collapse whitespace
+
+    Cached: club names, locations and recurring event titles repeat across
+    documents and are normalized once.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    text = text.translate(_TURKISH_LOWER).lower().translate(_TURKISH_FOLD)
+    if not text.isascii():
+        # Accents outside the Turkish alphabet: decompose and drop combining marks
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return ' '.join(text.split())
+
+
+def configured_stopwords(content_config: dict) -> Optional[List[str]]:
+    """
+    Stopwords from content_settings, normalized like the documents they filter
+
+    Returns:
+        Sorted distinct stopwords, or None when use_turkish_stopwords is off
+    """
+    if not content_config.get('use_turkish_stopwords', True):
+        return None
+    return sorted({normalize_text(word) for word in content_config.get('turkish_stopwords', [])})
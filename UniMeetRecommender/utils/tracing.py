@@ -0,0 +1,148 @@
+"""
+Lightweight request tracing for UniMeet Recommender Service
+Records nested timing spans for the active request. When no trace is active
+span() returns a shared no-op object, so instrumentation is nearly free.
+"""
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+_TRACEPARENT_RE = re.compile(r'^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$')
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """Collection of spans for a single request"""
+
+    __slots__ = ('trace_id', 'start', 'spans', '_depth')
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.start = time.perf_counter()
+        # Each span: [name, start offset s, duration s, depth, attrs]
+        self.spans: List[list] = []
+        self._depth = 0
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def to_dict(self) -> Dict:
+        """Serialize as the debug_timings block"""
+        return {
+            'trace_id': self.trace_id,
+            'total_ms': round(self.elapsed_ms(), 3),
+            'spans': [
+                {
+                    'name': name,
+                    'start_ms': round(offset * 1000, 3),
+                    'duration_ms': round(duration * 1000, 3),
+                    'depth': depth,
+                    **({'attrs': attrs} if attrs else {}),
+                }
+                for name, offset, duration, depth, attrs in self.spans
+            ],
+        }
+
+
+class _Span:
+    """Context manager that appends a timed span to the active trace"""
+
+    __slots__ = ('_trace', '_record', '_start')
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict):
+        self._trace = trace
+        self._record = [name, 0.0, 0.0, 0, attrs]
+
+    def __enter__(self):
+        trace = self._trace
+        self._start = time.perf_counter()
+        self._record[1] = self._start - trace.start
+        self._record[3] = trace._depth
+        trace._depth += 1
+        # Append on enter so spans are ordered by start time
+        trace.spans.append(self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._record[2] = time.perf_counter() - self._start
+        self._trace._depth -= 1
+        if exc_type is not None:
+            self._record[4] = dict(self._record[4], error=exc_type.__name__)
+        return False
+
+    def set(self, **attrs):
+        """Attach attributes (e.g. row counts) to the span"""
+        self._record[4] = dict(self._record[4], **attrs)
+
+
+class _NoopSpan:
+    """Shared span used when tracing is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """
+    Time a block as a span of the active trace
+
+    Usage:
+        with span('db.get_all_events') as s:
+            ...
+            s.set(rows=len(df))
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attrs)
+
+
+def start_trace(trace_id: Optional[str] = None) -> Trace:
+    """Start a trace for the current request context"""
+    trace = Trace(trace_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace():
+    """Detach the active trace from the current request context"""
+    _current_trace.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def trace_id_from_headers(headers, header_name: str = 'X-Trace-Id') -> Optional[str]:
+    """
+    Extract an incoming trace ID
+
+    Accepts the configured header verbatim (up to 64 safe characters) or
+    the trace-id part of a W3C traceparent header.
+    """
+    value = headers.get(header_name)
+    if value:
+        value = value.strip()
+        if 0 < len(value) <= 64 and re.fullmatch(r'[A-Za-z0-9\-_.:]+', value):
+            return value
+    traceparent = headers.get('traceparent')
+    if traceparent:
+        match = _TRACEPARENT_RE.match(traceparent.strip().lower())
+        if match:
+            return match.group(1)
+    return None